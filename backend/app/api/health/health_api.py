@@ -5,8 +5,11 @@ Health check API endpoints for AI Interview Platform Backend
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.utils.logger import get_logger
-from app.api.health.bucket import test_bucket_connection
-from app.api.health.firestore import test_firestore_connection
+from app.api.health.prober import health_prober
+from app.api.user_details.resume_cache import resume_cache
+from app.api.user_details.status_cache import status_cache
+from app.api.swot_details.result_cache import swot_result_cache
+from app.api.interview.opening import opening_prefetcher
 
 
 logger = get_logger(__name__)
@@ -19,81 +22,109 @@ class HealthStatus(BaseModel):
     storage: str
 
 
+def _dependency_status(*names: str) -> dict:
+    """Cached status of ``names``; 503 unless all are healthy."""
+    statuses = {name: health_prober.status(name) for name in names}
+    if any(status != "healthy" for status in statuses.values()):
+        raise HTTPException(status_code=503, detail=statuses)
+    return statuses
+
+
+@router.get("/live", response_model=dict)
+async def liveness():
+    """
+    Liveness: the worker is serving requests. Touches no dependency.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/ready", response_model=dict)
+async def readiness():
+    """
+    Readiness from the background prober's cache: 200 when every dependency
+    passed its last probe within the TTL, 503 otherwise.
+
+    Returns:
+        dict: per-dependency status, last error, probe latency and age
+    """
+    report = health_prober.report()
+    if not health_prober.ready:
+        raise HTTPException(status_code=503, detail=report)
+    return report
+
+
 @router.get("/", response_model=HealthStatus)
 async def health_check():
     """
-    Health check endpoint that tests Firestore and Cloud Storage connectivity.
-    
+    Firestore and Cloud Storage status, served from the prober's cache.
+
     Returns:
         HealthStatus: Status of firestore and storage services
     """
-    logger.info("Health check requested")
-    
-    # Test Firestore connection
-    firestore_healthy = test_firestore_connection()
-    firestore_status = "healthy" if firestore_healthy else "unhealthy"
-    
-    # Test Cloud Storage bucket connection
-    storage_healthy = test_bucket_connection()
-    storage_status = "healthy" if storage_healthy else "unhealthy"
-    
-    logger.info(f"Health check result - Firestore: {firestore_status}, Storage: {storage_status}")
-    
-    # If either service is unhealthy, return 503 Service Unavailable
-    if not (firestore_healthy and storage_healthy):
-        raise HTTPException(
-            status_code=503,
-            detail={
-                "firestore": firestore_status,
-                "storage": storage_status
-            }
-        )
-    
-    return HealthStatus(
-        firestore=firestore_status,
-        storage=storage_status
-    )
+    return HealthStatus(**_dependency_status("firestore", "storage"))
 
 
 @router.get("/firestore", response_model=dict)
 async def firestore_health():
     """
-    Health check endpoint for Firestore only.
-    
+    Cached Firestore status.
+
     Returns:
         dict: Status of firestore service
     """
-    logger.info("Firestore health check requested")
-    
-    is_healthy = test_firestore_connection()
-    status = "healthy" if is_healthy else "unhealthy"
-    
-    if not is_healthy:
-        raise HTTPException(
-            status_code=503,
-            detail={"firestore": status}
-        )
-    
-    return {"firestore": status}
+    return _dependency_status("firestore")
 
 
 @router.get("/storage", response_model=dict)
 async def storage_health():
     """
-    Health check endpoint for Cloud Storage only.
-    
+    Cached Cloud Storage status.
+
     Returns:
         dict: Status of storage service
     """
-    logger.info("Storage health check requested")
-    
-    is_healthy = test_bucket_connection()
-    status = "healthy" if is_healthy else "unhealthy"
-    
-    if not is_healthy:
-        raise HTTPException(
-            status_code=503,
-            detail={"storage": status}
-        )
-    
-    return {"storage": status}
+    return _dependency_status("storage")
+
+
+@router.get("/resume-cache", response_model=dict)
+async def resume_cache_stats():
+    """
+    Hit/miss counters for the content-addressed resume cache in this worker.
+
+    Returns:
+        dict: memory/index hits, misses, hit ratio and LRU size
+    """
+    return resume_cache.stats()
+
+
+@router.get("/status-cache", response_model=dict)
+async def status_cache_stats():
+    """
+    Hit/miss counters for the /status cache in this worker.
+
+    Returns:
+        dict: hits, misses, coalesced fetches, hit ratio and cache size
+    """
+    return status_cache.stats()
+
+
+@router.get("/swot-cache", response_model=dict)
+async def swot_cache_stats():
+    """
+    Hit/miss counters for the finished-SWOT response cache in this worker.
+
+    Returns:
+        dict: hits, misses, hit ratio and LRU size
+    """
+    return swot_result_cache.stats()
+
+
+@router.get("/opening-prefetch", response_model=dict)
+async def opening_prefetch_stats():
+    """
+    Counters for opening turns pre-generated at admission in this worker.
+
+    Returns:
+        dict: scheduled/skipped generations, in-flight count, and start-time hits and misses
+    """
+    return opening_prefetcher.stats()
@@ -0,0 +1,111 @@
+"""
+Background dependency prober.
+
+Each worker probes Firestore and Cloud Storage every
+``HEALTH_PROBE_INTERVAL_SECONDS`` with the cheapest call each supports and
+caches the outcome. Readiness is answered from that cache, so health traffic
+never touches a dependency; a result older than ``HEALTH_PROBE_TTL_SECONDS``
+(e.g. the prober is wedged) counts as unhealthy.
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.api.health.bucket import test_bucket_connection
+from app.api.health.firestore import test_firestore_connection
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "15"))
+HEALTH_PROBE_TTL_SECONDS = float(os.getenv("HEALTH_PROBE_TTL_SECONDS", "45"))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "5"))
+
+Probe = Callable[[], Awaitable[object]]
+
+
+async def _probe_storage() -> None:
+    await asyncio.to_thread(test_bucket_connection)
+
+
+class HealthProber:
+    """Caches the latest status of each dependency, refreshed in the background."""
+
+    def __init__(
+        self,
+        probes: Dict[str, Probe],
+        interval: float = HEALTH_PROBE_INTERVAL_SECONDS,
+        ttl: float = HEALTH_PROBE_TTL_SECONDS,
+        timeout: float = HEALTH_PROBE_TIMEOUT_SECONDS,
+    ):
+        self.probes = probes
+        self.interval = interval
+        self.ttl = ttl
+        self.timeout = timeout
+        self._results: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _probe(self, name: str, probe: Probe) -> None:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(probe(), self.timeout)
+            healthy, error = True, None
+        except Exception as exc:
+            healthy, error = False, str(exc) or type(exc).__name__
+        previous = self._results.get(name, {}).get("healthy")
+        if previous is not healthy:
+            log = logger.info if healthy else logger.error
+            log(f"Dependency {name} is {'healthy' if healthy else 'unhealthy'}{f': {error}' if error else ''}")
+        self._results[name] = {
+            "healthy": healthy,
+            "error": error,
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "checked_at": time.monotonic(),
+        }
+
+    async def probe_all(self) -> None:
+        await asyncio.gather(*(self._probe(name, probe) for name, probe in self.probes.items()))
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    def status(self, name: str) -> str:
+        """Return healthy, unhealthy, or unknown (no probe yet, or older than the TTL)."""
+        result = self._results.get(name)
+        if result is None or time.monotonic() - result["checked_at"] > self.ttl:
+            return "unknown"
+        return "healthy" if result["healthy"] else "unhealthy"
+
+    def report(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        report = {}
+        for name in self.probes:
+            result = self._results.get(name) or {}
+            report[name] = {
+                "status": self.status(name),
+                "error": result.get("error"),
+                "latency_ms": result.get("latency_ms"),
+                "age_seconds": round(now - result["checked_at"], 1) if result else None,
+            }
+        return report
+
+    @property
+    def ready(self) -> bool:
+        return all(self.status(name) == "healthy" for name in self.probes)
+
+
+health_prober = HealthProber({"firestore": test_firestore_connection, "storage": _probe_storage})
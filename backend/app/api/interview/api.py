@@ -1,31 +1,33 @@
 """
 Interview bot API.
 
-Exposes two endpoints:
+Exposes two endpoints, each with a Server-Sent Events variant under /stream:
   * /interview/start   - begins a fresh interview when no history exists
   * /interview/respond - continues the interview with the user's answer
 """
 
-import os
+import math
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
-import firebase_admin
-from fastapi import APIRouter, HTTPException
-from firebase_admin import credentials, firestore as fb_firestore
-from google.cloud import firestore
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.api.interview.bot_response import parse_bot_response
-from app.api.interview.prompt import (
-    build_followup_prompt,
-    build_initial_prompt,
-    build_swot_prompt,
-    history_to_text,
-    parse_swot_response,
-)
-from app.utils.gemini_wrapper import get_gemini_response
+from app.api.interview.bot_response import BotResponseStreamParser, parse_bot_response
+from app.api.interview.chat_cache import ChatState, answer_message, chat_sessions, new_chat_state
+from app.api.interview.opening import opening_prefetcher
+from app.api.interview.prompt import INTERVIEW_TURN_SCHEMA, build_opening_message
+from app.api.interview.prompt_budget import PromptStats
+from app.api.interview.history import append_turns, has_history, transcript_cache
+from app.api.swot_details.jobs import swot_jobs
+from app.api.user_details.user_api import release_and_promote
+from app.utils.firestore_connection import FirestoreRepository, SessionRecord, get_repository
+from app.utils.llm_client import LLMError, LLMRateLimitedError, get_llm_client
 from app.utils.logger import get_logger
+from app.utils.sse import SSE_HEADERS, format_sse
+from app.utils.timing import span
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/interview", tags=["interview"])
@@ -49,20 +51,7 @@ class InterviewResponse(BaseModel):
     time_remaining: int
 
 
-def get_firestore_client() -> fb_firestore.Client:
-    """Initialize Firestore client (reuse same credentials as other modules)."""
-    cred_path = os.getenv("FIRESTORE_APPLICATION_CREDENTIALS") or os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-    if not cred_path:
-        raise HTTPException(status_code=500, detail="Firestore credentials are not configured")
-
-    if not firebase_admin._apps:
-        cred = credentials.Certificate(cred_path)
-        firebase_admin.initialize_app(cred)
-
-    return fb_firestore.client()
-
-
-def compute_time_remaining(session_doc: fb_firestore.DocumentSnapshot) -> int:
+def compute_time_remaining(session_doc: SessionRecord) -> int:
     """Return positive remaining seconds for an in_session document."""
     expiry = session_doc.get("expiry_time")
     if not expiry:
@@ -73,43 +62,19 @@ def compute_time_remaining(session_doc: fb_firestore.DocumentSnapshot) -> int:
     return max(int(delta.total_seconds()), 0)
 
 
-def compute_queue_position(db: fb_firestore.Client, user_id: str) -> int:
-    """Return 1-based position of user in the queue."""
-    queue_docs = list(db.collection("queue").order_by("created_at").stream())
-    for idx, doc in enumerate(queue_docs, start=1):
-        if doc.get("user_id") == user_id or doc.id == user_id:
-            return idx
-    return 0
-
-
-def ensure_swot_analysis(db: fb_firestore.Client, user_id: str, resume_text: str, history: List[dict]) -> None:
-    """Create SWOT once and store it in the users document."""
-    user_ref = db.collection("users").document(user_id)
-    snapshot = user_ref.get()
-    if snapshot.exists and snapshot.to_dict().get("swot_analysis"):
-        return
-
-    history_block = history_to_text(history)
-    swot_prompt = build_swot_prompt(resume_text, history_block)
-    swot_text = get_gemini_response(swot_prompt)
-    swot_payload = parse_swot_response(swot_text)
-    user_ref.set({"swot_analysis": swot_payload}, merge=True)
-
-
-def finalize_session(db: fb_firestore.Client, user_id: str, user_doc: dict) -> InterviewResponse:
-    """End the interview politely, compute SWOT, and mark session as over."""
-    session_ref = db.collection("in_session").document(user_id)
-    session_ref.delete()
-    history = user_doc.get("interview_history", []) or []
-    ensure_swot_analysis(db, user_id, user_doc.get("resume_text", ""), history)
-    db.collection("users").document(user_id).set(
-        {
-            "status": "session_over",
-            "session_status": "session_over",
-            "time_remaining": 0,
-        },
-        merge=True,
-    )
+async def finalize_session(repo: FirestoreRepository, user_id: str, user_doc: dict) -> InterviewResponse:
+    """End the interview politely, queue SWOT generation, and mark session as over."""
+    if user_doc.get("status") != "session_over":
+        # Later calls after the session ended skip the release/promote transaction.
+        await release_and_promote(
+            repo,
+            user_id,
+            user_status="session_over",
+            user_fields={"session_status": "session_over", "time_remaining": 0},
+        )
+    await swot_jobs.submit(repo, user_id, user_doc)
+    transcript_cache.discard(user_id)
+    chat_sessions.discard(user_id)
     final_text = (
         "Thank you for your time. The interview session has concluded, "
         "and we wish you the very best in your journey. "
@@ -137,22 +102,42 @@ def build_user_history_entry(role: str, message: str, question: Optional[str] =
     return entry
 
 
-@router.post("/start", response_model=InterviewResponse)
-async def start_interview(request: InterviewInitRequest):
-    db = get_firestore_client()
-    logger.info(f"Starting interview session for user {request.user_id}")
-    user_ref = db.collection("users").document(request.user_id)
-    snapshot = user_ref.get()
-    if not snapshot.exists:
+@dataclass
+class TurnContext:
+    """State loaded before a model call, shared by the plain and streaming routes."""
+    user_id: str
+    user_doc: dict
+    chat: ChatState
+    message: str
+    new_entries: List[dict]
+    time_remaining: int
+    prompt_stats: PromptStats
+    summary_fields: Dict[str, Any]
+    # Opening turn generated at admission; when set no model call is needed.
+    opening: Optional[Tuple[str, str]] = None
+
+    def llm_kwargs(self) -> Dict[str, Any]:
+        """Chat arguments for the LLM client: only ``message`` is new this turn."""
+        return {
+            "system_instruction": self.chat.system_instruction,
+            "history": self.chat.history(),
+            "response_schema": INTERVIEW_TURN_SCHEMA,
+        }
+
+
+async def _prepare_start(repo: FirestoreRepository, user_id: str) -> Union[InterviewResponse, TurnContext]:
+    """Validate a start request; return an immediate response or the turn context."""
+    logger.info(f"Starting interview session for user {user_id}")
+    with span("user_read"):
+        user_doc = await repo.users.get(user_id)
+    if user_doc is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_doc = snapshot.to_dict() or {}
-    history = user_doc.get("interview_history", []) or []
-    if history:
+    if has_history(user_doc):
         raise HTTPException(status_code=400, detail="Interview already started; please use /interview/respond.")
     status = user_doc.get("status", "idle")
     if status == "idle":
         return InterviewResponse(
-            user_id=request.user_id,
+            user_id=user_id,
             status="idle",
             queue_number=0,
             bot_response=(
@@ -163,9 +148,9 @@ async def start_interview(request: InterviewInitRequest):
             time_remaining=0,
         )
     if status == "pending":
-        queue_number = compute_queue_position(db, request.user_id)
+        queue_number = await repo.queue.position(user_id)
         return InterviewResponse(
-            user_id=request.user_id,
+            user_id=user_id,
             status="queue",
             queue_number=queue_number,
             bot_response=(
@@ -178,53 +163,51 @@ async def start_interview(request: InterviewInitRequest):
     if status != "in_session":
         raise HTTPException(status_code=400, detail="User is not in an active in_session state.")
 
-    session_doc = db.collection("in_session").document(request.user_id).get()
-    if not session_doc.exists:
-        return finalize_session(db, request.user_id, user_doc)
+    with span("session_read"):
+        session_doc = await repo.in_session.get(user_id)
+    if session_doc is None:
+        return await finalize_session(repo, user_id, user_doc)
 
     time_remaining = compute_time_remaining(session_doc)
     if time_remaining <= 0:
-        return finalize_session(db, request.user_id, user_doc)
-
-    prompt_text = build_initial_prompt(user_doc.get("resume_text", ""))
-    model_output = get_gemini_response(prompt_text)
-    bot_response, next_question = parse_bot_response(model_output)
-    history.append(
-        build_user_history_entry("bot", bot_response, question=next_question)
-    )
-    user_ref.set(
-        {
-            "interview_history": history,
-            "last_bot_response": bot_response,
-            "next_question": next_question,
-            "time_remaining": time_remaining,
-        },
-        merge=True,
+        return await finalize_session(repo, user_id, user_doc)
+
+    with span("prompt_build"):
+        chat = new_chat_state(user_id, user_doc, session_doc)
+        message = build_opening_message()
+        stats = chat.stats(message)
+    with span("opening_wait"):
+        opening = await opening_prefetcher.take(user_id, session_doc)
+    logger.info(
+        f"Initial prompt for user {user_id}: {stats.describe()}"
+        f"{' (pre-generated)' if opening else ''}"
     )
-
-    return InterviewResponse(
-        user_id=request.user_id,
-        status="in_session",
-        queue_number=0,
-        bot_response=bot_response,
-        next_question=next_question,
+    return TurnContext(
+        user_id=user_id,
+        user_doc=user_doc,
+        chat=chat,
+        message=message,
+        new_entries=[],
         time_remaining=time_remaining,
+        prompt_stats=stats,
+        summary_fields={},
+        opening=opening,
     )
 
 
-@router.post("/respond", response_model=InterviewResponse)
-async def respond_to_interview(request: InterviewAnswerRequest):
-    db = get_firestore_client()
-    logger.info(f"Continuing interview for user {request.user_id}")
-    user_ref = db.collection("users").document(request.user_id)
-    snapshot = user_ref.get()
-    if not snapshot.exists:
+async def _prepare_respond(
+    repo: FirestoreRepository, user_id: str, user_response: str
+) -> Union[InterviewResponse, TurnContext]:
+    """Validate a follow-up request; return an immediate response or the turn context."""
+    logger.info(f"Continuing interview for user {user_id}")
+    with span("user_read"):
+        user_doc = await repo.users.get(user_id)
+    if user_doc is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_doc = snapshot.to_dict() or {}
     status = user_doc.get("status", "idle")
     if status == "idle":
         return InterviewResponse(
-            user_id=request.user_id,
+            user_id=user_id,
             status="idle",
             queue_number=0,
             bot_response="Your interview session has not started yet. Please wait while we prepare everything.",
@@ -232,9 +215,9 @@ async def respond_to_interview(request: InterviewAnswerRequest):
             time_remaining=0,
         )
     if status == "pending":
-        queue_number = compute_queue_position(db, request.user_id)
+        queue_number = await repo.queue.position(user_id)
         return InterviewResponse(
-            user_id=request.user_id,
+            user_id=user_id,
             status="queue",
             queue_number=queue_number,
             bot_response=(
@@ -245,43 +228,168 @@ async def respond_to_interview(request: InterviewAnswerRequest):
             time_remaining=0,
         )
     if status != "in_session":
-        return finalize_session(db, request.user_id, user_doc)
-
-    session_doc = db.collection("in_session").document(request.user_id).get()
-    if not session_doc.exists or compute_time_remaining(session_doc) <= 0:
-        return finalize_session(db, request.user_id, user_doc)
-
-    history = user_doc.get("interview_history", []) or []
-    history_text = history_to_text(history)
-    prompt_text = build_followup_prompt(
-        user_doc.get("resume_text", ""), history_text, request.user_response
+        return await finalize_session(repo, user_id, user_doc)
+
+    with span("session_read"):
+        session_doc = await repo.in_session.get(user_id)
+    if session_doc is None or compute_time_remaining(session_doc) <= 0:
+        return await finalize_session(repo, user_id, user_doc)
+
+    with span("history_load"):
+        chat = await chat_sessions.load(repo, user_id, user_doc, session_doc)
+    with span("prompt_build"):
+        message = answer_message(user_response)
+        summary_fields = chat.fit(message)
+        stats = chat.stats(message)
+    logger.info(f"Follow-up prompt for user {user_id} at turn {chat.turn_count}: {stats.describe()}")
+    return TurnContext(
+        user_id=user_id,
+        user_doc=user_doc,
+        chat=chat,
+        message=message,
+        new_entries=[build_user_history_entry("user", user_response)],
+        time_remaining=compute_time_remaining(session_doc),
+        prompt_stats=stats,
+        summary_fields=summary_fields,
     )
-    model_output = get_gemini_response(prompt_text)
-    bot_response, next_question = parse_bot_response(model_output)
 
-    history.append(build_user_history_entry("user", request.user_response))
-    history.append(build_user_history_entry("bot", bot_response, question=next_question))
-    time_remaining = compute_time_remaining(session_doc)
-    status = user_doc.get("status", "in_session")
-    queue_number = 0
-    if status == "pending":
-        queue_number = compute_queue_position(db, request.user_id)
-
-    user_ref.set(
-        {
-            "interview_history": history,
-            "last_bot_response": bot_response,
-            "next_question": next_question,
-            "time_remaining": time_remaining,
-        },
-        merge=True,
-    )
 
+async def _complete_turn(
+    repo: FirestoreRepository, ctx: TurnContext, bot_response: str, next_question: str
+) -> InterviewResponse:
+    """Append this turn's entries to the transcript, persist them, and build the API response."""
+    bot_entry = build_user_history_entry("bot", bot_response, question=next_question)
+    bot_entry["prompt_tokens"] = ctx.prompt_stats.total_tokens
+    entries = ctx.new_entries + [bot_entry]
+    with span("history_write"):
+        await append_turns(
+            repo,
+            ctx.user_id,
+            ctx.chat.turn_count,
+            entries,
+            {
+                **ctx.summary_fields,
+                "last_bot_response": bot_response,
+                "next_question": next_question,
+                "time_remaining": ctx.time_remaining,
+                "last_prompt_tokens": ctx.prompt_stats.total_tokens,
+            },
+        )
+    ctx.chat.record(entries)
+    chat_sessions.put(ctx.chat)
     return InterviewResponse(
-        user_id=request.user_id,
-        status=status,
-        queue_number=queue_number,
+        user_id=ctx.user_id,
+        status="in_session",
+        queue_number=0,
         bot_response=bot_response,
         next_question=next_question,
-        time_remaining=time_remaining,
+        time_remaining=ctx.time_remaining,
     )
+
+
+async def _stream_turn(
+    repo: FirestoreRepository, prepared: Union[InterviewResponse, TurnContext]
+) -> AsyncIterator[str]:
+    """
+    Emit SSE frames for a turn.
+
+    ``bot_response`` events carry text deltas as Gemini produces them,
+    ``next_question`` carries the full question, and ``done`` carries the same
+    payload the non-streaming route returns. History is written only after
+    the model stream has completed.
+    """
+    if isinstance(prepared, InterviewResponse):
+        yield format_sse("done", prepared.model_dump())
+        return
+
+    if prepared.opening is not None:
+        bot_response, next_question = prepared.opening
+        yield format_sse("bot_response", {"text": bot_response})
+        yield format_sse("next_question", {"text": next_question})
+    else:
+        parser = BotResponseStreamParser()
+        try:
+            chunks = get_llm_client().stream(prepared.message, admitted=True, **prepared.llm_kwargs())
+            async for chunk in chunks:
+                for event, text in parser.feed(chunk):
+                    yield format_sse(event, {"text": text})
+        except LLMError as exc:
+            logger.error(f"Interview stream failed for user {prepared.user_id}: {exc}")
+            payload = {"detail": str(exc)}
+            if isinstance(exc, LLMRateLimitedError):
+                payload["retry_after"] = max(1, math.ceil(exc.retry_after))
+            yield format_sse("error", payload)
+            return
+
+        for event, text in parser.close():
+            yield format_sse(event, {"text": text})
+        bot_response, next_question = parser.result()
+    try:
+        response = await _complete_turn(repo, prepared, bot_response, next_question)
+    except HTTPException as exc:
+        yield format_sse("error", {"detail": exc.detail})
+        return
+    yield format_sse("done", response.model_dump())
+
+
+@router.post("/start", response_model=InterviewResponse)
+async def start_interview(
+    request: InterviewInitRequest, repo: FirestoreRepository = Depends(get_repository)
+):
+    prepared = await _prepare_start(repo, request.user_id)
+    if isinstance(prepared, InterviewResponse):
+        return prepared
+
+    if prepared.opening is not None:
+        bot_response, next_question = prepared.opening
+    else:
+        model_output = await get_llm_client().generate(prepared.message, **prepared.llm_kwargs())
+        bot_response, next_question = parse_bot_response(model_output)
+    return await _complete_turn(repo, prepared, bot_response, next_question)
+
+
+@router.post("/respond", response_model=InterviewResponse)
+async def respond_to_interview(
+    request: InterviewAnswerRequest, repo: FirestoreRepository = Depends(get_repository)
+):
+    prepared = await _prepare_respond(repo, request.user_id, request.user_response)
+    if isinstance(prepared, InterviewResponse):
+        return prepared
+
+    model_output = await get_llm_client().generate(prepared.message, **prepared.llm_kwargs())
+    bot_response, next_question = parse_bot_response(model_output)
+    return await _complete_turn(repo, prepared, bot_response, next_question)
+
+
+async def _streaming_response(
+    repo: FirestoreRepository, prepared: Union[InterviewResponse, TurnContext]
+) -> StreamingResponse:
+    """
+    Admit the model call before any bytes are sent, so a rate-limited turn is
+    answered with 429 and ``Retry-After`` rather than a 200 carrying an error frame.
+    """
+    if isinstance(prepared, TurnContext) and prepared.opening is None:
+        await get_llm_client().admit(
+            prepared.message, system_instruction=prepared.chat.system_instruction, history=prepared.chat.history()
+        )
+    return StreamingResponse(
+        _stream_turn(repo, prepared), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.post("/start/stream")
+async def start_interview_stream(
+    request: InterviewInitRequest, repo: FirestoreRepository = Depends(get_repository)
+):
+    """Streaming variant of /interview/start over Server-Sent Events."""
+    prepared = await _prepare_start(repo, request.user_id)
+    return await _streaming_response(repo, prepared)
+
+
+@router.post("/respond/stream")
+async def respond_to_interview_stream(
+    request: InterviewAnswerRequest, repo: FirestoreRepository = Depends(get_repository)
+):
+    """Streaming variant of /interview/respond over Server-Sent Events."""
+    prepared = await _prepare_respond(repo, request.user_id, request.user_response)
+    return await _streaming_response(repo, prepared)
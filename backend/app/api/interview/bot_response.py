@@ -2,17 +2,48 @@
 Helpers to parse Gemini responses for the interview flow.
 """
 
-from typing import Tuple
+import json
+import re
+from typing import List, Optional, Tuple
+
+from app.utils.json_repair import loads_lenient
+from app.utils.metrics import count_structured_output
+
+_BOT_VALUE = re.compile(r'"bot_response"\s*:\s*"')
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def _looks_like_json(text: str) -> bool:
+    return text.lstrip().startswith(("{", "`"))
+
+
+def _parse_json_turn(raw: str) -> Optional[Tuple[str, str]]:
+    try:
+        data, repaired = loads_lenient(raw)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not ({"bot_response", "next_question"} & data.keys()):
+        return None
+    count_structured_output("interview", "repaired" if repaired else "valid")
+    return str(data.get("bot_response") or "").strip(), str(data.get("next_question") or "").strip()
 
 
 def parse_bot_response(raw: str) -> Tuple[str, str]:
     """
     Parse the Gemini output into bot response and the next question.
 
-    Expected format:
+    Expected format is the structured-output JSON object
+    ``{"bot_response": ..., "next_question": ...}`` (repaired if fenced or
+    truncated). Plain-text replies in the older marker format are still read:
     BOT_RESPONSE: ...
     NEXT_QUESTION: ...
     """
+    if _looks_like_json(raw):
+        parsed = _parse_json_turn(raw)
+        if parsed is not None:
+            return parsed
+    count_structured_output("interview", "fallback")
+
     bot_response = raw.strip()
     next_question = ""
 
@@ -39,3 +70,145 @@ def parse_bot_response(raw: str) -> Tuple[str, str]:
             next_question = " ".join(lines[1:]).strip()
 
     return bot_response, next_question
+
+
+MARKER_BOT = "BOT_RESPONSE:"
+MARKER_NEXT = "NEXT_QUESTION:"
+
+
+def _decode_partial_string(text: str, pos: int) -> Tuple[str, int, bool]:
+    """
+    Decode a JSON string body from ``pos`` as far as ``text`` allows.
+
+    Returns ``(decoded, next_pos, closed)``; an escape split across chunks is
+    left for the next call.
+    """
+    out: List[str] = []
+    while pos < len(text):
+        char = text[pos]
+        if char == '"':
+            return "".join(out), pos + 1, True
+        if char != "\\":
+            out.append(char)
+            pos += 1
+            continue
+        if pos + 1 >= len(text):
+            break
+        code = text[pos + 1]
+        if code != "u":
+            out.append(_SIMPLE_ESCAPES.get(code, code))
+            pos += 2
+            continue
+        size = 12 if text[pos + 2:pos + 4].lower() in ("d8", "d9", "da", "db") else 6
+        if pos + size > len(text):
+            break
+        try:
+            out.append(json.loads(f'"{text[pos:pos + size]}"'))
+        except ValueError:
+            pass
+        pos += size
+    return "".join(out), pos, False
+
+
+class BotResponseStreamParser:
+    """
+    Incrementally split streamed Gemini output into events.
+
+    ``feed`` returns ``("bot_response", delta)`` events as soon as text is
+    known to belong to the bot response. For structured (JSON) output that is
+    the decoded ``bot_response`` string value; for the older marker format it
+    is text after ``BOT_RESPONSE:`` known not to be the start of
+    ``NEXT_QUESTION:``, even when a marker is split across chunks. ``close``
+    flushes the remainder and emits the whole next question as one
+    ``("next_question", text)`` event. ``result`` returns the same tuple
+    ``parse_bot_response`` would produce.
+    """
+
+    def __init__(self):
+        self._raw: List[str] = []
+        self._buffer = ""
+        self._state = "preamble"
+        self._emitted = ""
+        self._json_pos: Optional[int] = None
+        self._result: Optional[Tuple[str, str]] = None
+
+    def _emit_bot(self, text: str) -> List[Tuple[str, str]]:
+        if not self._emitted:
+            text = text.lstrip()
+        if not text:
+            return []
+        self._emitted += text
+        return [("bot_response", text)]
+
+    def _feed_json(self) -> List[Tuple[str, str]]:
+        if self._json_pos is None:
+            match = _BOT_VALUE.search(self._buffer)
+            if match is None:
+                return []
+            self._json_pos = match.end()
+        text, self._json_pos, closed = _decode_partial_string(self._buffer, self._json_pos)
+        if closed:
+            self._state = "json_done"
+        return self._emit_bot(text)
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        self._raw.append(chunk)
+        self._buffer += chunk
+        events: List[Tuple[str, str]] = []
+
+        if self._state == "preamble":
+            if _looks_like_json(self._buffer):
+                self._state = "json"
+            elif MARKER_BOT in self._buffer:
+                self._buffer = self._buffer.split(MARKER_BOT, 1)[1]
+                self._state = "bot"
+            elif MARKER_NEXT in self._buffer:
+                before, self._buffer = self._buffer.split(MARKER_NEXT, 1)
+                events.extend(self._emit_bot(before.strip()))
+                self._state = "question"
+                return events
+            else:
+                return events
+
+        if self._state == "json":
+            return self._feed_json()
+
+        if self._state == "bot":
+            if MARKER_NEXT in self._buffer:
+                before, self._buffer = self._buffer.split(MARKER_NEXT, 1)
+                events.extend(self._emit_bot(before.rstrip()))
+                self._state = "question"
+            else:
+                # Hold back anything that could be the start of a split marker,
+                # plus trailing whitespace that the final strip would drop.
+                held = 0
+                for size in range(len(MARKER_NEXT) - 1, 0, -1):
+                    if self._buffer.endswith(MARKER_NEXT[:size]):
+                        held = size
+                        break
+                ready = self._buffer[:len(self._buffer) - held].rstrip()
+                events.extend(self._emit_bot(ready))
+                self._buffer = self._buffer[len(ready):]
+
+        return events
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Flush buffered text once the stream has ended."""
+        bot_response, next_question = self.result()
+        events: List[Tuple[str, str]] = []
+        if self._state == "preamble":
+            events.extend(self._emit_bot(bot_response))
+        elif self._state == "bot":
+            events.extend(self._emit_bot(self._buffer.rstrip()))
+        elif self._state in ("json", "json_done") and bot_response.startswith(self._emitted):
+            # Repair may have recovered text the incremental decoder could not.
+            events.extend(self._emit_bot(bot_response[len(self._emitted):]))
+        self._buffer = ""
+        if next_question:
+            events.append(("next_question", next_question))
+        return events
+
+    def result(self) -> Tuple[str, str]:
+        if self._result is None:
+            self._result = parse_bot_response("".join(self._raw))
+        return self._result
@@ -0,0 +1,197 @@
+"""
+Per-session chat state cache for the interview bot.
+
+A ``ChatState`` holds everything that is constant for a session (the system
+instruction built from the resume) plus the budgeted chat history, so a
+follow-up only adds the candidate's new answer. States are kept in a bounded
+LRU keyed by user_id and expire at the session's ``expiry_time``. On a miss,
+or when another worker has advanced the transcript (``turn_count`` differs),
+the state is rebuilt from Firestore.
+
+Callers get a copy of the cached state. A turn folds and records on that
+copy and ``put``s it back only once the turn has been persisted, so a failed
+model call leaves the cache matching Firestore.
+"""
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.api.interview.history import load_transcript
+from app.api.interview.prompt import (
+    build_answer_message,
+    build_opening_message,
+    build_system_instruction,
+    format_model_turn,
+)
+from app.api.interview.prompt_budget import (
+    ANSWER_TOKEN_BUDGET,
+    PROMPT_RECENT_ENTRIES,
+    PROMPT_TOKEN_BUDGET,
+    RESUME_TOKEN_BUDGET,
+    PromptStats,
+    estimate_tokens,
+    fold_into_summary,
+    truncate_to_tokens,
+)
+from app.utils.firestore_connection import FirestoreRepository, SessionRecord
+from app.utils.llm_client import ChatMessage
+
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "256"))
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo:
+        return value.replace(tzinfo=None)
+    return value
+
+
+@dataclass
+class ChatState:
+    """
+    Budgeted chat for one session.
+
+    ``entries`` are the transcript entries still sent verbatim; they always
+    start with a bot entry so the chat alternates after the opening message.
+    Everything before ``summary_upto`` lives only in ``summary``.
+    """
+    user_id: str
+    system_instruction: str
+    turn_count: int = 0
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+    summary: str = ""
+    summary_upto: int = 0
+    expires_at: Optional[datetime] = None
+
+    def history(self) -> List[ChatMessage]:
+        """Chat turns preceding the next user message."""
+        if not self.entries:
+            return []
+        messages: List[ChatMessage] = [{"role": "user", "text": build_opening_message(self.summary)}]
+        for entry in self.entries:
+            if entry.get("role") == "bot":
+                text = format_model_turn(entry.get("message", ""), entry.get("question", ""))
+                messages.append({"role": "model", "text": text})
+            else:
+                messages.append({"role": "user", "text": entry.get("message", "")})
+        return messages
+
+    def _fold(self, count: int) -> None:
+        self.summary = fold_into_summary(self.summary, self.entries[:count])
+        self.entries = self.entries[count:]
+        self.summary_upto += count
+
+    def fit(
+        self,
+        message: str,
+        budget_tokens: int = PROMPT_TOKEN_BUDGET,
+        recent_entries: int = PROMPT_RECENT_ENTRIES,
+    ) -> Dict[str, Any]:
+        """
+        Fold old entries into the summary until the window and token budget hold.
+
+        Returns the summary fields to persist when the summary advanced.
+        """
+        before = self.summary_upto
+        # Keep the window starting on a bot entry so roles keep alternating.
+        while self.entries and self.entries[0].get("role") != "bot":
+            self._fold(1)
+        while len(self.entries) > max(recent_entries, 1) or (
+            len(self.entries) > 1 and self.stats(message).total_tokens > budget_tokens
+        ):
+            self._fold(2)
+        if self.summary_upto == before:
+            return {}
+        return {"transcript_summary": self.summary, "summary_upto": self.summary_upto}
+
+    def record(self, new_entries: List[Dict[str, Any]]) -> None:
+        """Append entries persisted for the turn that just completed."""
+        self.entries = self.entries + list(new_entries)
+        self.turn_count += len(new_entries)
+
+    def stats(self, message: str) -> PromptStats:
+        history = self.history()
+        recent_tokens = sum(estimate_tokens(item["text"]) for item in history[1:])
+        system_tokens = estimate_tokens(self.system_instruction)
+        summary_tokens = estimate_tokens(self.summary)
+        answer_tokens = estimate_tokens(message)
+        return PromptStats(
+            total_tokens=system_tokens + estimate_tokens(history[0]["text"] if history else "")
+            + recent_tokens + answer_tokens,
+            system_tokens=system_tokens,
+            summary_tokens=summary_tokens,
+            recent_tokens=recent_tokens,
+            answer_tokens=answer_tokens,
+            recent_entries=len(self.entries),
+            summarised_entries=self.summary_upto,
+        )
+
+
+def answer_message(user_response: str) -> str:
+    """Chat message carrying the candidate's answer, capped to its token budget."""
+    return build_answer_message(truncate_to_tokens(user_response, ANSWER_TOKEN_BUDGET))
+
+
+def new_chat_state(user_id: str, user_doc: dict, session_doc: Optional[SessionRecord]) -> ChatState:
+    resume = truncate_to_tokens(user_doc.get("resume_text") or "", RESUME_TOKEN_BUDGET)
+    return ChatState(
+        user_id=user_id,
+        system_instruction=build_system_instruction(resume),
+        expires_at=_naive_utc((session_doc or {}).get("expiry_time")),
+    )
+
+
+class ChatSessionCache:
+    """Bounded LRU of ``ChatState`` keyed by user_id, expiring with the session."""
+
+    def __init__(self, max_size: int = CHAT_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, ChatState]" = OrderedDict()
+
+    def get(self, user_id: str, turn_count: int) -> Optional[ChatState]:
+        state = self._items.get(user_id)
+        if state is None:
+            return None
+        expired = state.expires_at is not None and state.expires_at <= datetime.utcnow()
+        if expired or state.turn_count != turn_count:
+            del self._items[user_id]
+            return None
+        self._items.move_to_end(user_id)
+        return state
+
+    def put(self, state: ChatState) -> None:
+        self._items[state.user_id] = state
+        self._items.move_to_end(state.user_id)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def discard(self, user_id: str) -> None:
+        self._items.pop(user_id, None)
+
+    async def load(
+        self,
+        repo: FirestoreRepository,
+        user_id: str,
+        user_doc: dict,
+        session_doc: Optional[SessionRecord],
+    ) -> ChatState:
+        """Return a copy of the cached state, rebuilding it from Firestore on a miss."""
+        turn_count = int(user_doc.get("turn_count") or 0)
+        state = self.get(user_id, turn_count)
+        if state is not None:
+            return replace(state)
+
+        transcript = await load_transcript(repo, user_id, user_doc)
+        summary_upto = min(int(user_doc.get("summary_upto") or 0), transcript.turn_count)
+        state = new_chat_state(user_id, user_doc, session_doc)
+        state.turn_count = transcript.turn_count
+        state.entries = transcript.entries[summary_upto:]
+        state.summary = user_doc.get("transcript_summary") or ""
+        state.summary_upto = summary_upto
+        self.put(state)
+        return replace(state)
+
+
+chat_sessions = ChatSessionCache()
@@ -0,0 +1,150 @@
+"""
+Append-only interview transcript storage.
+
+Turns live in ``users/{user_id}/turns`` with monotonically increasing ``seq``
+numbers, and the user document only carries ``turn_count``. Each turn writes
+just its new entries. The rendered transcript is cached per worker and
+extended incrementally instead of being re-serialised on every call.
+
+Documents that still embed an ``interview_history`` array are migrated into
+the subcollection the first time they are loaded.
+"""
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from google.api_core.exceptions import AlreadyExists, Conflict
+from google.cloud import firestore
+
+from app.api.interview.prompt import history_to_text
+from app.utils.firestore_connection import FirestoreRepository
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TRANSCRIPT_CACHE_SIZE = int(os.getenv("TRANSCRIPT_CACHE_SIZE", "512"))
+
+
+@dataclass
+class Transcript:
+    """Interview entries plus their rendered prompt text."""
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+    text: str = ""
+
+    @property
+    def turn_count(self) -> int:
+        return len(self.entries)
+
+    def extended(self, new_entries: List[Dict[str, Any]]) -> "Transcript":
+        """Return a transcript with ``new_entries`` appended, rendering only the new part."""
+        if not new_entries:
+            return self
+        addition = history_to_text(new_entries)
+        text = f"{self.text}\n{addition}" if self.text else addition
+        return Transcript(entries=self.entries + list(new_entries), text=text)
+
+
+class TranscriptCache:
+    """Bounded LRU of transcripts keyed by user_id."""
+
+    def __init__(self, max_size: int = TRANSCRIPT_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Transcript]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[Transcript]:
+        transcript = self._items.get(user_id)
+        if transcript is not None:
+            self._items.move_to_end(user_id)
+        return transcript
+
+    def put(self, user_id: str, transcript: Transcript) -> None:
+        self._items[user_id] = transcript
+        self._items.move_to_end(user_id)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def discard(self, user_id: str) -> None:
+        self._items.pop(user_id, None)
+
+
+transcript_cache = TranscriptCache()
+
+
+def has_history(user_doc: dict) -> bool:
+    """Cheap check on the user document alone, covering legacy arrays."""
+    return bool(user_doc.get("turn_count") or user_doc.get("interview_history"))
+
+
+async def _migrate_legacy_history(repo: FirestoreRepository, user_id: str, user_doc: dict) -> int:
+    """Move an embedded ``interview_history`` array into the turns subcollection."""
+    history = user_doc.get("interview_history") or []
+    batch = repo.batch()
+    for seq, entry in enumerate(history, start=1):
+        batch.set(repo.users.turn_ref(user_id, seq), {**entry, "seq": seq})
+    batch.set(
+        repo.users.ref(user_id),
+        {"turn_count": len(history), "interview_history": firestore.DELETE_FIELD},
+        merge=True,
+    )
+    await batch.commit()
+    logger.info(f"Migrated {len(history)} legacy history entries for user {user_id}")
+    return len(history)
+
+
+async def load_transcript(repo: FirestoreRepository, user_id: str, user_doc: dict) -> Transcript:
+    """
+    Return the user's transcript, reading only turns the cache has not seen.
+    """
+    if "turn_count" not in user_doc and user_doc.get("interview_history"):
+        turn_count = await _migrate_legacy_history(repo, user_id, user_doc)
+    else:
+        turn_count = int(user_doc.get("turn_count") or 0)
+
+    cached = transcript_cache.get(user_id)
+    if cached is not None and cached.turn_count == turn_count:
+        return cached
+
+    if cached is not None and cached.turn_count < turn_count:
+        transcript = cached.extended(await repo.users.list_turns(user_id, after_seq=cached.turn_count))
+    else:
+        transcript = Transcript().extended(await repo.users.list_turns(user_id))
+
+    transcript_cache.put(user_id, transcript)
+    return transcript
+
+
+async def append_turns(
+    repo: FirestoreRepository,
+    user_id: str,
+    base: int,
+    new_entries: List[Dict[str, Any]],
+    fields: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Write ``new_entries`` after the first ``base`` turns in one batch and bump ``turn_count``.
+
+    Turns are created rather than overwritten, so two concurrent requests for
+    the same turn cannot both succeed; the loser gets a 409.
+    """
+    batch = repo.batch()
+    for offset, entry in enumerate(new_entries, start=1):
+        batch.create(repo.users.turn_ref(user_id, base + offset), {**entry, "seq": base + offset})
+    batch.set(
+        repo.users.ref(user_id),
+        {**(fields or {}), "turn_count": base + len(new_entries)},
+        merge=True,
+    )
+    try:
+        await batch.commit()
+    except (AlreadyExists, Conflict) as exc:
+        transcript_cache.discard(user_id)
+        raise HTTPException(status_code=409, detail="Interview turn already recorded; please retry.") from exc
+
+    cached = transcript_cache.get(user_id)
+    if cached is not None and cached.turn_count == base:
+        transcript_cache.put(user_id, cached.extended(new_entries))
+    else:
+        transcript_cache.discard(user_id)
@@ -0,0 +1,123 @@
+"""
+Opening turn generated ahead of ``/interview/start``.
+
+The session clock starts at admission, so waiting for Gemini when the
+candidate opens the interview page costs them interview time. As soon as a
+user enters ``in_session`` (join or promotion) this worker generates the
+opening bot response and first question in the background and stores them
+on the ``in_session`` document as ``opening``. ``/interview/start`` returns
+the stored turn at once, waits for a generation still running in this worker,
+and only calls the model itself when neither exists.
+"""
+
+import asyncio
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+from google.api_core.exceptions import NotFound
+
+from app.api.interview.bot_response import parse_bot_response
+from app.api.interview.chat_cache import new_chat_state
+from app.api.interview.history import has_history
+from app.api.interview.prompt import INTERVIEW_TURN_SCHEMA, build_opening_message
+from app.utils.firestore_connection import FirestoreRepository, SessionRecord
+from app.utils.llm_client import get_llm_client
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Beyond this many generations in flight, new admissions fall back to live generation.
+OPENING_MAX_PENDING = int(os.getenv("OPENING_MAX_PENDING", "64"))
+
+
+class OpeningPrefetcher:
+    """Background opening-turn generation keyed by user_id, with hit/miss counters."""
+
+    def __init__(self, max_pending: int = OPENING_MAX_PENDING):
+        self.max_pending = max_pending
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.scheduled = 0
+        self.skipped = 0
+        self.hits = 0
+        self.misses = 0
+
+    def schedule(self, repo: FirestoreRepository, user_ids: Iterable[str]) -> None:
+        """Start generating the opening turn for newly admitted users."""
+        loop = asyncio.get_running_loop()
+        for user_id in user_ids:
+            if user_id in self._tasks:
+                continue
+            if len(self._tasks) >= self.max_pending:
+                self.skipped += 1
+                continue
+            task = loop.create_task(self._generate(repo, user_id))
+            self._tasks[user_id] = task
+            task.add_done_callback(lambda done, user_id=user_id: self._forget(user_id, done))
+            self.scheduled += 1
+
+    def _forget(self, user_id: str, task: asyncio.Task) -> None:
+        if self._tasks.get(user_id) is task:
+            del self._tasks[user_id]
+
+    async def _generate(self, repo: FirestoreRepository, user_id: str) -> Optional[Dict[str, str]]:
+        try:
+            user_doc = await repo.users.get(user_id)
+            session_doc = await repo.in_session.get(user_id)
+            if not user_doc or not session_doc or has_history(user_doc):
+                return None
+            if session_doc.get("opening"):
+                return session_doc["opening"]
+
+            chat = new_chat_state(user_id, user_doc, session_doc)
+            model_output = await get_llm_client().generate(
+                build_opening_message(),
+                system_instruction=chat.system_instruction,
+                history=chat.history(),
+                response_schema=INTERVIEW_TURN_SCHEMA,
+            )
+            bot_response, next_question = parse_bot_response(model_output)
+            opening = {"bot_response": bot_response, "next_question": next_question}
+            # update() rather than set(): a session that ended meanwhile must stay gone.
+            await repo.in_session.update(user_id, {"opening": opening})
+            logger.info(f"Opening turn ready for user {user_id}")
+            return opening
+        except NotFound:
+            logger.info(f"Session for user {user_id} ended before its opening turn was stored")
+        except Exception as exc:
+            logger.warning(f"Opening turn generation failed for user {user_id}: {exc}")
+        return None
+
+    async def take(self, user_id: str, session_doc: Optional[SessionRecord]) -> Optional[Tuple[str, str]]:
+        """Return ``(bot_response, next_question)`` if an opening turn is stored or in flight here."""
+        opening = (session_doc or {}).get("opening")
+        if not opening:
+            task = self._tasks.get(user_id)
+            if task is not None:
+                # Shielded: a disconnecting client must not cancel the shared generation.
+                opening = await asyncio.shield(task)
+        if opening and opening.get("next_question"):
+            self.hits += 1
+            return opening.get("bot_response", ""), opening["next_question"]
+        self.misses += 1
+        return None
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "scheduled": self.scheduled,
+            "skipped": self.skipped,
+            "in_flight": len(self._tasks),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+opening_prefetcher = OpeningPrefetcher()
@@ -2,8 +2,12 @@
 Prompt builders for the interview bot.
 """
 
+import json
 from typing import List, Dict
 
+from app.utils.json_repair import loads_lenient
+from app.utils.metrics import count_structured_output
+
 
 BASE_INSTRUCTIONS = """
 You are conducting an interview for a Full Stack Cloud Engineer role.
@@ -12,6 +16,26 @@ Ask only subjective, technical questions; do not request coding or SQL solutions
 Always ground your responses in the candidate's resume and previous answers.
 """
 
+RESPONSE_FORMAT = """Respond with a JSON object with two string fields:
+"bot_response": your response in a conversational tone
+"next_question": the next subjective technical question"""
+
+# Structured-output schemas; "bot_response" sorts first, so it streams first.
+INTERVIEW_TURN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "bot_response": {"type": "string", "description": "Your response in a conversational tone."},
+        "next_question": {"type": "string", "description": "The next subjective technical question."},
+    },
+    "required": ["bot_response", "next_question"],
+}
+SWOT_FIELDS = ("strengths", "weaknesses", "opportunities", "threats")
+SWOT_SCHEMA = {
+    "type": "object",
+    "properties": {field: {"type": "array", "items": {"type": "string"}} for field in SWOT_FIELDS},
+    "required": list(SWOT_FIELDS),
+}
+
 
 def history_to_text(history: List[Dict]) -> str:
     """Serialize interview history into plain text for prompt context."""
@@ -26,41 +50,39 @@ def history_to_text(history: List[Dict]) -> str:
     return "\n".join(lines)
 
 
-def build_initial_prompt(resume_text: str) -> str:
+def build_system_instruction(resume_text: str) -> str:
+    """Session-constant instruction: role, resume context and reply format."""
     resume_section = resume_text.strip() or "No resume text provided."
-    prompt = f"""{BASE_INSTRUCTIONS.strip()}
-
-Use the resume below as your sole context and start with a subjective technical question.
+    return f"""{BASE_INSTRUCTIONS.strip()}
 
 Resume:
 {resume_section}
 
-Respond using this structure:
-BOT_RESPONSE: <your response in a conversational tone>
-NEXT_QUESTION: <the next subjective technical question>
+{RESPONSE_FORMAT}
 """
-    return prompt
 
 
-def build_followup_prompt(resume_text: str, history: str, user_response: str) -> str:
-    resume_section = resume_text.strip() or "No resume text provided."
-    prompt = f"""{BASE_INSTRUCTIONS.strip()}
+def build_opening_message(summary: str = "") -> str:
+    """First user turn of the chat; also carries the rolling summary once turns are folded."""
+    message = "Use the resume as your sole context and start with a subjective technical question."
+    if summary.strip():
+        message += f"\n\nSummary of earlier conversation:\n{summary.strip()}"
+    return message
 
-Resume:
-{resume_section}
-
-Conversation so far:
-{history}
 
-Candidate response:
+def build_answer_message(user_response: str) -> str:
+    """User turn for a candidate answer; the only new text sent on follow-ups."""
+    return f"""Candidate response:
 {user_response}
 
 Based on the above, respond with a thoughtful analysis and follow it with the next subjective technical question.
-Respond using this structure:
-BOT_RESPONSE: <bot answer>
-NEXT_QUESTION: <your next subjective question for the candidate>
+{RESPONSE_FORMAT}
 """
-    return prompt
+
+
+def format_model_turn(bot_response: str, next_question: str) -> str:
+    """Render a stored bot turn back into the structure the model produced."""
+    return json.dumps({"bot_response": bot_response, "next_question": next_question}, ensure_ascii=False)
 
 
 def build_swot_prompt(resume_text: str, history: str) -> str:
@@ -88,10 +110,20 @@ Respond strictly with JSON in this shape:
 
 
 def parse_swot_response(text: str) -> Dict:
-    """Try to parse a JSON-looking SWOT response; fallback to raw string."""
-    import json
-
-    try:
-        return json.loads(text.strip())
-    except Exception:
-        return {"raw": text.strip()}
+    """
+    Parse a SWOT reply, repairing fences, trailing commas and truncation.
+
+    Raises ``ValueError`` when no SWOT can be recovered, so the job regenerates
+    it instead of storing unusable text.
+    """
+    data, repaired = loads_lenient(text)
+    if not isinstance(data, dict) or not any(data.get(field) for field in SWOT_FIELDS):
+        raise ValueError("SWOT reply has none of the expected fields")
+    count_structured_output("swot", "repaired" if repaired else "valid")
+    swot = {}
+    for field in SWOT_FIELDS:
+        items = data.get(field) or []
+        if isinstance(items, str):
+            items = [items]
+        swot[field] = [str(item).strip() for item in items if item is not None and str(item).strip()]
+    return swot
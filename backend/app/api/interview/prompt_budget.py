@@ -0,0 +1,77 @@
+"""
+Token budgeting helpers for interview turns.
+
+``ChatState`` (see ``chat_cache.py``) keeps the last ``PROMPT_RECENT_ENTRIES``
+transcript entries verbatim and folds everything older into a rolling summary
+stored on the user document (``transcript_summary`` covering entries up to
+``summary_upto``). The summary is extended only with entries that have just
+left the verbatim window, and is trimmed from the oldest side to stay within
+its own budget, so prompt size stays flat however long the interview runs.
+
+Summaries are extractive (the leading sentence of each entry) to avoid an
+extra model call per turn.
+"""
+
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+PROMPT_RECENT_ENTRIES = int(os.getenv("PROMPT_RECENT_ENTRIES", "6"))
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "1200"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "400"))
+ANSWER_TOKEN_BUDGET = int(os.getenv("ANSWER_TOKEN_BUDGET", "600"))
+
+# Rough English average; good enough for budgeting without a tokenizer dependency.
+CHARS_PER_TOKEN = 4
+SUMMARY_LINE_CHARS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    limit = tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit].rstrip() + " ..."
+
+
+@dataclass
+class PromptStats:
+    """Size breakdown of an assembled prompt, in estimated tokens."""
+    total_tokens: int
+    system_tokens: int = 0
+    summary_tokens: int = 0
+    recent_tokens: int = 0
+    answer_tokens: int = 0
+    recent_entries: int = 0
+    summarised_entries: int = 0
+
+    def describe(self) -> str:
+        return (
+            f"{self.total_tokens} tokens (system {self.system_tokens}, summary {self.summary_tokens} "
+            f"over {self.summarised_entries} entries, recent {self.recent_tokens} over "
+            f"{self.recent_entries} entries, answer {self.answer_tokens})"
+        )
+
+
+def _summary_line(entry: Dict) -> str:
+    role = entry.get("role", "unknown").upper()
+    message = " ".join((entry.get("message") or "").split())
+    first_sentence = re.split(r"(?<=[.!?])\s", message, maxsplit=1)[0]
+    line = f"{role}: {first_sentence[:SUMMARY_LINE_CHARS]}"
+    question = entry.get("question")
+    if question:
+        line += f" | Asked: {' '.join(question.split())[:SUMMARY_LINE_CHARS]}"
+    return line
+
+
+def fold_into_summary(summary: str, entries: List[Dict], budget_tokens: int = SUMMARY_TOKEN_BUDGET) -> str:
+    """Append condensed ``entries`` to ``summary``, dropping the oldest lines past the budget."""
+    lines = [line for line in summary.splitlines() if line.strip()]
+    lines.extend(_summary_line(entry) for entry in entries)
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > budget_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
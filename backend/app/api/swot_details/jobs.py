@@ -0,0 +1,289 @@
+"""
+Background SWOT generation.
+
+Ending an interview only records ``swot_status: pending`` on the user document
+and queues a job; a bounded pool of asyncio workers per process runs the
+Gemini call off the request path. Status moves pending -> running -> ready,
+or to failed once ``SWOT_MAX_ATTEMPTS`` attempts with exponential backoff are
+exhausted. Jobs left pending/running by a worker that died are picked up
+again by ``recover_stale_jobs``.
+
+Every claim writes a fresh ``swot_claim`` token that travels with the queued
+job. Workers only advance a job, in a transaction, while the token still
+matches, so a job reclaimed from a slow worker is dropped by that worker
+instead of being generated twice.
+"""
+
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Collection, Dict, Optional, Set
+
+from google.cloud import firestore
+
+from app.api.interview.history import load_transcript
+from app.api.interview.prompt import SWOT_SCHEMA, build_swot_prompt, parse_swot_response
+from app.api.swot_details.result_cache import swot_result_cache
+from app.utils.firestore_connection import FirestoreRepository
+from app.utils.llm_client import get_llm_client
+from app.utils.rate_limiter import BACKGROUND
+from app.utils.logger import get_logger
+from app.utils.metrics import count_structured_output
+
+logger = get_logger(__name__)
+
+SWOT_WORKERS = int(os.getenv("SWOT_WORKERS", "2"))
+SWOT_MAX_ATTEMPTS = int(os.getenv("SWOT_MAX_ATTEMPTS", "3"))
+SWOT_RETRY_BASE_SECONDS = float(os.getenv("SWOT_RETRY_BASE_SECONDS", "2"))
+SWOT_STALE_SECONDS = int(os.getenv("SWOT_STALE_SECONDS", "300"))
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+
+def swot_status(user_doc: dict) -> Optional[str]:
+    """Current job status, treating documents that already hold a SWOT as ready."""
+    if user_doc.get("swot_analysis"):
+        return READY
+    return user_doc.get("swot_status")
+
+
+async def generate_swot(repo: FirestoreRepository, user_id: str) -> None:
+    """Build the SWOT for ``user_id`` from resume and transcript and store it."""
+    doc = await repo.users.get(user_id)
+    if doc is None:
+        return
+    if doc.get("swot_analysis"):
+        await repo.users.set(user_id, {"swot_status": READY})
+        return
+
+    transcript = await load_transcript(repo, user_id, doc)
+    prompt = build_swot_prompt(doc.get("resume_text", ""), transcript.text)
+    reply = await get_llm_client().generate(prompt, response_schema=SWOT_SCHEMA, priority=BACKGROUND)
+    try:
+        swot_result = parse_swot_response(reply)
+    except ValueError:
+        # Nothing recoverable; the failed attempt makes the pool ask again.
+        count_structured_output("swot", "regenerated")
+        raise
+    await repo.users.set(
+        user_id,
+        {
+            "swot_analysis": swot_result,
+            "swot_status": READY,
+            "swot_error": None,
+            "swot_updated_at": datetime.utcnow(),
+        },
+    )
+    swot_result_cache.put(user_id, swot_result)
+
+
+def _claimed(claim: str) -> Dict[str, Any]:
+    return {
+        "swot_status": PENDING,
+        "swot_claim": claim,
+        "swot_attempts": 0,
+        "swot_error": None,
+        "swot_updated_at": datetime.utcnow(),
+    }
+
+
+@firestore.async_transactional
+async def _claim_job(
+    txn: firestore.AsyncTransaction,
+    repo: FirestoreRepository,
+    user_id: str,
+    retry_failed: bool,
+    claim: str,
+) -> Optional[str]:
+    """
+    Move the job to pending under ``claim`` if nobody owns it yet.
+
+    Returns None when this caller claimed it, otherwise the status it is in.
+    """
+    doc = await repo.users.get(user_id, transaction=txn)
+    if doc is None:
+        # Nothing to generate for a user that no longer exists.
+        return FAILED
+    status = swot_status(doc)
+    if status is not None and not (status == FAILED and retry_failed):
+        return status
+    txn.set(repo.users.ref(user_id), _claimed(claim), merge=True)
+    return None
+
+
+@firestore.async_transactional
+async def _reclaim_job(
+    txn: firestore.AsyncTransaction,
+    repo: FirestoreRepository,
+    user_id: str,
+    seen_updated_at: Any,
+    claim: str,
+) -> bool:
+    """
+    Take over a stale pending/running job under ``claim``.
+
+    Only succeeds if the job has not moved since ``seen_updated_at`` was
+    read, so two recovery passes cannot both take it.
+    """
+    doc = await repo.users.get(user_id, transaction=txn)
+    if doc is None or swot_status(doc) not in (PENDING, RUNNING):
+        return False
+    if doc.get("swot_updated_at") != seen_updated_at:
+        return False
+    txn.set(repo.users.ref(user_id), _claimed(claim), merge=True)
+    return True
+
+
+@firestore.async_transactional
+async def _advance_job(
+    txn: firestore.AsyncTransaction,
+    repo: FirestoreRepository,
+    user_id: str,
+    claim: str,
+    expected: Collection[str],
+    fields: Dict[str, Any],
+) -> bool:
+    """Write ``fields`` if ``claim`` still owns the job and it is in an ``expected`` status."""
+    doc = await repo.users.get(user_id, transaction=txn)
+    if doc is None or doc.get("swot_claim") != claim or swot_status(doc) not in expected:
+        return False
+    txn.set(repo.users.ref(user_id), {**fields, "swot_updated_at": datetime.utcnow()}, merge=True)
+    return True
+
+
+class SwotJobPool:
+    """Bounded per-process worker pool draining an in-memory SWOT job queue."""
+
+    def __init__(self, workers: int = SWOT_WORKERS, max_attempts: int = SWOT_MAX_ATTEMPTS):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[str] = set()
+        self._tasks: list = []
+
+    @property
+    def backlog(self) -> int:
+        return len(self._queued)
+
+    def start(self) -> None:
+        """Spawn the workers once on the running loop."""
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._queued.clear()
+        self._tasks = [loop.create_task(self._worker(idx)) for idx in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(
+        self,
+        repo: FirestoreRepository,
+        user_id: str,
+        user_doc: Optional[dict] = None,
+        retry_failed: bool = False,
+    ) -> str:
+        """
+        Queue SWOT generation for ``user_id`` unless a job already exists.
+
+        Only a user without a job (or, with ``retry_failed``, one whose job
+        failed) is claimed, in a transaction, so exactly one worker owns each
+        job; pending and running jobs anywhere are left alone. ``user_doc`` is
+        a possibly stale copy used to skip the transaction when a job clearly
+        exists. Returns the job status the caller should report.
+        """
+        if user_doc is not None:
+            status = swot_status(user_doc)
+            if status is not None and not (status == FAILED and retry_failed):
+                return status
+        if user_id in self._queued:
+            return PENDING
+
+        claim = uuid.uuid4().hex
+        status = await _claim_job(repo.transaction(), repo, user_id, retry_failed, claim)
+        if status is not None:
+            return status
+        self._enqueue(repo, user_id, claim)
+        return PENDING
+
+    def _enqueue(self, repo: FirestoreRepository, user_id: str, claim: str) -> None:
+        self.start()
+        self._queued.add(user_id)
+        self._queue.put_nowait((repo, user_id, claim))
+
+    async def _worker(self, idx: int) -> None:
+        while True:
+            repo, user_id, claim = await self._queue.get()
+            try:
+                await self._run_job(repo, user_id, claim)
+            except Exception as exc:
+                logger.error(f"SWOT worker {idx} crashed on user {user_id}: {exc}")
+            finally:
+                self._queued.discard(user_id)
+                self._queue.task_done()
+
+    async def _run_job(self, repo: FirestoreRepository, user_id: str, claim: str) -> None:
+        error = ""
+        for attempt in range(1, self.max_attempts + 1):
+            # The first attempt takes the job from pending; later ones renew it.
+            expected = (PENDING,) if attempt == 1 else (RUNNING,)
+            owned = await _advance_job(
+                repo.transaction(), repo, user_id, claim, expected,
+                {"swot_status": RUNNING, "swot_attempts": attempt},
+            )
+            if not owned:
+                logger.info(f"SWOT job for user {user_id} is owned elsewhere or done; dropping it")
+                return
+            try:
+                await generate_swot(repo, user_id)
+                logger.info(f"SWOT ready for user {user_id} after {attempt} attempt(s)")
+                return
+            except Exception as exc:
+                logger.warning(f"SWOT attempt {attempt} failed for user {user_id}: {exc}")
+                error = str(exc)
+            if attempt < self.max_attempts:
+                await asyncio.sleep(SWOT_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+
+        failed = await _advance_job(
+            repo.transaction(), repo, user_id, claim, (RUNNING,),
+            {"swot_status": FAILED, "swot_error": error},
+        )
+        if failed:
+            logger.error(f"SWOT generation failed for user {user_id}: {error}")
+
+    async def recover_stale_jobs(self, repo: FirestoreRepository, limit: int = 20) -> int:
+        """
+        Re-queue pending/running jobs nobody has touched for ``SWOT_STALE_SECONDS``.
+
+        Each job is reclaimed in a transaction under a new token, so the
+        worker that may still hold it in memory drops it when it gets there.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=SWOT_STALE_SECONDS)
+        recovered = 0
+        for status in (PENDING, RUNNING):
+            for snapshot in await repo.users.with_swot_status(status, limit):
+                data = snapshot.to_dict() or {}
+                user_id = data.get("user_id") or snapshot.id
+                seen = data.get("swot_updated_at")
+                updated_at = seen.replace(tzinfo=None) if seen is not None and seen.tzinfo else seen
+                if user_id in self._queued or (updated_at and updated_at > cutoff):
+                    continue
+                claim = uuid.uuid4().hex
+                if not await _reclaim_job(repo.transaction(), repo, user_id, seen, claim):
+                    continue
+                self._enqueue(repo, user_id, claim)
+                recovered += 1
+        if recovered:
+            logger.info(f"Re-queued {recovered} stale SWOT job(s)")
+        return recovered
+
+
+swot_jobs = SwotJobPool()
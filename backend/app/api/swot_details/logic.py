@@ -14,3 +14,14 @@ def build_swot_payload(user_id: str, swot_data: Optional[Dict]) -> Dict:
         "swot_analysis": swot_data or {},
         "found": bool(swot_data),
     }
+
+
+def build_swot_progress(user_id: str, swot_status: str, attempts: int = 0, error: Optional[str] = None) -> Dict:
+    """
+    Prepare the response for a SWOT that is still being generated (or has failed).
+    """
+    payload = build_swot_payload(user_id, None)
+    payload.update({"swot_status": swot_status, "attempts": attempts})
+    if error:
+        payload["error"] = error
+    return payload
@@ -0,0 +1,81 @@
+"""
+Per-worker cache of finished SWOT responses.
+
+A SWOT is written once and never changes, so the encoded ``/swot/{user_id}``
+body and its strong ETag are kept in a bounded LRU. Repeated views and the
+polling loops in the frontend are served from memory (or answered with 304
+when the client already holds that ETag) without reading the user document,
+which also carries the resume and transcript.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.api.swot_details.logic import build_swot_payload
+
+SWOT_CACHE_SIZE = int(os.getenv("SWOT_CACHE_SIZE", "1024"))
+
+# (etag, encoded JSON body)
+CachedSwot = Tuple[str, bytes]
+
+
+def encode_swot(user_id: str, swot_data: Optional[Dict]) -> CachedSwot:
+    """Serialize the SWOT payload once and derive its strong ETag from the bytes."""
+    body = json.dumps(
+        build_swot_payload(user_id, swot_data), ensure_ascii=False, separators=(",", ":"), sort_keys=True
+    ).encode("utf-8")
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"', body
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """``If-None-Match`` check; uses weak comparison as RFC 9110 requires for it."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class SwotResultCache:
+    """LRU of encoded SWOT responses keyed by user id, with hit/miss counters."""
+
+    def __init__(self, max_size: int = SWOT_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, CachedSwot]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> Optional[CachedSwot]:
+        item = self._items.get(user_id)
+        if item is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(user_id)
+        self.hits += 1
+        return item
+
+    def put(self, user_id: str, swot_data: Optional[Dict]) -> CachedSwot:
+        item = encode_swot(user_id, swot_data)
+        if self.max_size > 0:
+            self._items[user_id] = item
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return item
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "size": len(self._items),
+        }
+
+
+swot_result_cache = SwotResultCache()
@@ -1,44 +1,86 @@
-from typing import Dict
-
 import os
-import firebase_admin
-from fastapi import APIRouter, HTTPException
-from firebase_admin import credentials, firestore as fb_firestore
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse, Response
 
+from app.api.interview.history import has_history
+from app.api.swot_details.jobs import FAILED, READY, SWOT_RETRY_BASE_SECONDS, swot_jobs, swot_status
+from app.utils.firestore_connection import FirestoreRepository, get_repository
 from app.utils.logger import get_logger
-from app.api.swot_details.logic import build_swot_payload
+from app.api.swot_details.logic import build_swot_progress
+from app.api.swot_details.result_cache import CachedSwot, etag_matches, swot_result_cache
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/swot", tags=["swot"])
 
+# Poll hint for clients waiting on a background job.
+SWOT_POLL_SECONDS = max(int(SWOT_RETRY_BASE_SECONDS), 2)
+# Finished SWOTs never change; browsers may reuse them without revalidating for this long.
+SWOT_MAX_AGE_SECONDS = int(os.getenv("SWOT_MAX_AGE_SECONDS", "3600"))
+FINISHED_CACHE_CONTROL = f"private, max-age={SWOT_MAX_AGE_SECONDS}"
+# Progress and failure responses must always be re-fetched.
+PENDING_CACHE_CONTROL = "no-store"
 
-def get_firestore_client() -> fb_firestore.Client:
-    """Return a Firestore client using the shared credential configuration."""
-    cred_path = os.getenv("FIRESTORE_APPLICATION_CREDENTIALS") or os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-    if not cred_path:
-        raise HTTPException(status_code=500, detail="Firestore credentials are not configured")
 
-    if not firebase_admin._apps:
-        cred = credentials.Certificate(cred_path)
-        firebase_admin.initialize_app(cred)
-
-    return fb_firestore.client()
+def _swot_response(cached: CachedSwot, if_none_match: Optional[str]) -> Response:
+    etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": FINISHED_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/{user_id}", response_model=Dict)
-async def get_swot(user_id: str):
+async def get_swot(
+    user_id: str,
+    retry: bool = False,
+    if_none_match: Optional[str] = Header(default=None),
+    repo: FirestoreRepository = Depends(get_repository),
+):
     """
     Retrieve SWOT analysis stored on the user document.
+
+    A finished SWOT returns 200 with a strong ``ETag`` and ``Cache-Control``,
+    and is kept in a per-worker LRU so repeated views skip Firestore. It
+    returns 304 instead when ``If-None-Match`` matches that ETag. While the
+    background job is pending or running it returns 202 with the job's
+    progress and a ``Retry-After`` hint. A failed job returns 502 with the
+    error unless ``retry=true``, which re-queues it and returns 202. A
+    finished interview without a job gets one queued here, also with 202.
     """
-    db = get_firestore_client()
-    doc_ref = db.collection("users").document(user_id)
-    snapshot = doc_ref.get()
-    if not snapshot.exists:
+    cached = swot_result_cache.get(user_id)
+    if cached is not None:
+        return _swot_response(cached, if_none_match)
+
+    user_doc = await repo.users.get(user_id)
+    if user_doc is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    swot_data = snapshot.to_dict().get("swot_analysis")
-    if not swot_data:
-        raise HTTPException(status_code=404, detail="SWOT analysis not yet generated")
+    status = swot_status(user_doc)
+    if status == READY:
+        logger.info(f"Returning SWOT for user {user_id}")
+        return _swot_response(swot_result_cache.put(user_id, user_doc.get("swot_analysis")), if_none_match)
+
+    if status == FAILED and not retry:
+        return JSONResponse(
+            status_code=502,
+            content={
+                **build_swot_progress(
+                    user_id, FAILED, user_doc.get("swot_attempts", 0), user_doc.get("swot_error")
+                ),
+                "detail": "SWOT analysis could not be generated. Please try again.",
+            },
+            headers={"Cache-Control": PENDING_CACHE_CONTROL},
+        )
+
+    if status is None or status == FAILED:
+        if user_doc.get("status") == "in_session" or not has_history(user_doc):
+            raise HTTPException(status_code=404, detail="SWOT analysis not yet generated")
+        status = await swot_jobs.submit(repo, user_id, user_doc, retry_failed=retry)
 
-    logger.info(f"Returning SWOT for user {user_id}")
-    return build_swot_payload(user_id, swot_data)
+    return JSONResponse(
+        status_code=202,
+        content=build_swot_progress(user_id, status, user_doc.get("swot_attempts", 0)),
+        headers={"Retry-After": str(SWOT_POLL_SECONDS), "Cache-Control": PENDING_CACHE_CONTROL},
+    )
@@ -0,0 +1,169 @@
+"""
+Exact-time session expiry.
+
+Only the worker holding the ``session-expiry`` lease runs the scheduler. It
+keeps a min-heap of ``(expiry_time, user_id)`` for sessions expiring within
+``EXPIRY_LOOKAHEAD_SECONDS``, refreshed from Firestore every
+``EXPIRY_RESYNC_SECONDS``, and sleeps until the earliest deadline. Sessions
+are created minutes before they expire, so each one is in the heap well
+ahead of time and is expired at its ``expiry_time`` rather than on the next
+sweep. A backlog (e.g. after failover) is drained all at once with bounded
+concurrency.
+"""
+
+import asyncio
+import heapq
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.utils.firestore_connection import FirestoreRepository
+from app.utils.leader_lease import LeaderLease
+from app.utils.logger import get_logger
+from app.utils.metrics import set_cleanup_lag
+
+logger = get_logger(__name__)
+
+EXPIRY_LOOKAHEAD_SECONDS = float(os.getenv("EXPIRY_LOOKAHEAD_SECONDS", "60"))
+EXPIRY_RESYNC_SECONDS = float(os.getenv("EXPIRY_RESYNC_SECONDS", "10"))
+EXPIRY_RESYNC_LIMIT = int(os.getenv("EXPIRY_RESYNC_LIMIT", "500"))
+EXPIRY_CONCURRENCY = int(os.getenv("EXPIRY_CONCURRENCY", "8"))
+
+ExpireCallback = Callable[[FirestoreRepository, str], Awaitable[None]]
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo:
+        return value.replace(tzinfo=None) - (value.utcoffset() or timedelta(0))
+    return value
+
+
+class ExpiryScheduler:
+    """Fires ``on_expire`` for each session at its expiry_time, on the lease holder only."""
+
+    def __init__(
+        self,
+        repo: FirestoreRepository,
+        on_expire: ExpireCallback,
+        lease: LeaderLease,
+        housekeeping: Optional[Callable[[FirestoreRepository], Awaitable[None]]] = None,
+        housekeeping_interval: float = 60,
+    ):
+        self.repo = repo
+        self.on_expire = on_expire
+        self.lease = lease
+        self.housekeeping = housekeeping
+        self.housekeeping_interval = housekeeping_interval
+        self._heap: List[Tuple[datetime, str]] = []
+        self._due: Dict[str, datetime] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._next_resync = 0.0
+        self._next_housekeeping = 0.0
+
+    @property
+    def scheduled(self) -> int:
+        return len(self._due)
+
+    def start(self) -> None:
+        self.lease.start()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.lease.stop()
+
+    def schedule(self, user_id: str, expiry_time: datetime) -> None:
+        """Track (or move) a session's deadline; a no-op cost on non-leaders."""
+        expiry_time = _naive_utc(expiry_time)
+        if self._due.get(user_id) == expiry_time:
+            return
+        self._due[user_id] = expiry_time
+        heapq.heappush(self._heap, (expiry_time, user_id))
+        self._wake.set()
+
+    async def _resync(self) -> None:
+        cutoff = datetime.utcnow() + timedelta(seconds=EXPIRY_LOOKAHEAD_SECONDS)
+        sessions = await self.repo.in_session.expired(cutoff, limit=EXPIRY_RESYNC_LIMIT)
+        for snapshot in sessions:
+            data = snapshot.to_dict() or {}
+            expiry = data.get("expiry_time")
+            if expiry is not None:
+                self.schedule(data.get("user_id") or snapshot.id, expiry)
+
+    def _pop_due(self, now: datetime) -> List[str]:
+        due = []
+        lag = 0.0
+        while self._heap and self._heap[0][0] <= now:
+            expiry, user_id = heapq.heappop(self._heap)
+            if self._due.get(user_id) == expiry:  # skip entries superseded by a later schedule()
+                del self._due[user_id]
+                due.append(user_id)
+                lag = max(lag, (now - expiry).total_seconds())
+        if due:
+            set_cleanup_lag(lag)
+        return due
+
+    async def _expire(self, user_ids: List[str]) -> None:
+        limiter = asyncio.Semaphore(EXPIRY_CONCURRENCY)
+
+        async def expire_one(user_id: str) -> None:
+            async with limiter:
+                try:
+                    await self.on_expire(self.repo, user_id)
+                except Exception as exc:
+                    logger.error(f"Failed to expire session for user {user_id}: {exc}")
+
+        await asyncio.gather(*(expire_one(user_id) for user_id in user_ids))
+        logger.info(f"Expired {len(user_ids)} session(s)")
+
+    def _reset(self) -> None:
+        self._heap.clear()
+        self._due.clear()
+        self._next_resync = 0.0
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.lease.is_leader:
+                self._reset()
+                self.lease.changed.clear()
+                await self.lease.changed.wait()
+                continue
+
+            try:
+                if loop.time() >= self._next_resync:
+                    await self._resync()
+                    self._next_resync = loop.time() + EXPIRY_RESYNC_SECONDS
+                due = self._pop_due(datetime.utcnow())
+                if due:
+                    await self._expire(due)
+                if self.housekeeping is not None and loop.time() >= self._next_housekeeping:
+                    self._next_housekeeping = loop.time() + self.housekeeping_interval
+                    await self.housekeeping(self.repo)
+            except Exception as exc:
+                logger.error(f"Expiry scheduler error: {exc}")
+
+            timeout = max(self._next_resync - loop.time(), 0)
+            if self._heap:
+                until_due = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+                timeout = min(timeout, max(until_due, 0))
+            self._wake.clear()
+            self.lease.changed.clear()
+            try:
+                await asyncio.wait_for(self._wait_any(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _wait_any(self) -> None:
+        wake = asyncio.ensure_future(self._wake.wait())
+        changed = asyncio.ensure_future(self.lease.changed.wait())
+        try:
+            await asyncio.wait({wake, changed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            wake.cancel()
+            changed.cancel()
@@ -0,0 +1,212 @@
+"""
+Resume text extraction off the event loop.
+
+PyPDF2 and python-docx are CPU-bound, so extraction runs in a small process
+pool. Each task is bounded by an address-space limit set when the worker
+starts and a per-file alarm, and stops reading as soon as ``MAX_LEN``
+characters have been collected. PDFs longer than ``RESUME_PDF_CHUNK_PAGES``
+are split into page ranges that are extracted in parallel, one wave of
+``RESUME_EXTRACT_WORKERS`` chunks at a time, so a long document still stops
+early once enough text is in.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import List, Optional, Tuple, Union
+
+from PyPDF2 import PdfReader
+from docx import Document
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAX_LEN = 10000  # avoid oversized payloads in Firestore
+
+RESUME_EXTRACT_WORKERS = int(os.getenv("RESUME_EXTRACT_WORKERS", "2"))
+RESUME_EXTRACT_TIMEOUT_SECONDS = float(os.getenv("RESUME_EXTRACT_TIMEOUT_SECONDS", "10"))
+RESUME_EXTRACT_MEMORY_MB = int(os.getenv("RESUME_EXTRACT_MEMORY_MB", "512"))
+RESUME_PDF_CHUNK_PAGES = int(os.getenv("RESUME_PDF_CHUNK_PAGES", "8"))
+
+
+# Raw bytes, or a path to a spooled file so workers read from disk instead of
+# receiving the whole upload pickled across the process boundary.
+ResumeSource = Union[bytes, str]
+
+
+class ExtractionTimeout(Exception):
+    """Raised inside a worker when a single file exceeds its time budget."""
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout("resume extraction timed out")
+
+
+def _init_worker(memory_mb: int) -> None:
+    """Cap the worker's address space so a hostile file cannot exhaust the host."""
+    signal.signal(signal.SIGALRM, _on_alarm)
+    try:
+        import resource
+
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as exc:
+        logger.warning(f"Could not apply extraction memory limit: {exc}")
+
+
+def _with_deadline(func, *args):
+    """Run ``func`` under a SIGALRM deadline when called inside a worker."""
+    signal.setitimer(signal.ITIMER_REAL, RESUME_EXTRACT_TIMEOUT_SECONDS)
+    try:
+        return func(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _open(source: ResumeSource):
+    return BytesIO(source) if isinstance(source, bytes) else source
+
+
+def _extract_pdf_pages(source: ResumeSource, start: int, stop: Optional[int], limit: int) -> Tuple[str, int]:
+    """
+    Extract pages ``[start, stop)`` until ``limit`` characters are collected.
+
+    Returns the text and the document's total page count.
+    """
+    reader = PdfReader(_open(source))
+    total = len(reader.pages)
+    text: List[str] = []
+    collected = 0
+    for idx in range(start, min(stop if stop is not None else total, total)):
+        try:
+            page_text = reader.pages[idx].extract_text() or ""
+        except ExtractionTimeout:
+            raise
+        except Exception as exc:
+            logger.warning(f"Failed to extract text from PDF page {idx}: {exc}")
+            continue
+        if page_text:
+            text.append(page_text)
+            collected += len(page_text) + 1
+        if collected >= limit:
+            break
+    return "\n".join(text), total
+
+
+def _extract_from_docx(source: ResumeSource, limit: int = MAX_LEN) -> str:
+    doc = Document(_open(source))
+    text: List[str] = []
+    collected = 0
+    for paragraph in doc.paragraphs:
+        if paragraph.text:
+            text.append(paragraph.text)
+            collected += len(paragraph.text) + 1
+            if collected >= limit:
+                break
+    return "\n".join(text)
+
+
+def _extract_other(source: ResumeSource, limit: int = MAX_LEN) -> str:
+    # txt or other: try decode; utf-8 needs at most 4 bytes per character
+    if isinstance(source, bytes):
+        head = source[: limit * 4]
+    else:
+        with open(source, "rb") as handle:
+            head = handle.read(limit * 4)
+    return head.decode("utf-8", errors="ignore")
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Return the process-wide extraction pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        # spawn rather than fork: the parent holds gRPC threads that do not survive fork.
+        _pool = ProcessPoolExecutor(
+            max_workers=RESUME_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(RESUME_EXTRACT_MEMORY_MB,),
+        )
+    return _pool
+
+
+def _discard_pool() -> None:
+    """Drop a pool whose worker stopped responding; the next call starts a fresh one."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def shutdown_extraction_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def _run(func, *args):
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(get_extraction_pool(), _with_deadline, func, *args)
+    try:
+        # The in-worker alarm normally fires first; this only catches a wedged worker.
+        return await asyncio.wait_for(future, RESUME_EXTRACT_TIMEOUT_SECONDS + 5)
+    except asyncio.TimeoutError:
+        _discard_pool()
+        raise ExtractionTimeout("resume extraction worker did not respond")
+    except BrokenProcessPool:
+        # A worker died (e.g. killed past its memory limit); start over next time.
+        _discard_pool()
+        raise
+
+
+async def _extract_pdf_async(content: ResumeSource) -> str:
+    chunk = max(RESUME_PDF_CHUNK_PAGES, 1)
+    text, total = await _run(_extract_pdf_pages, content, 0, chunk, MAX_LEN)
+    parts = [text] if text else []
+    collected = len(text)
+    start = chunk
+    while start < total and collected < MAX_LEN:
+        wave = []
+        for _ in range(max(RESUME_EXTRACT_WORKERS, 1)):
+            if start >= total:
+                break
+            wave.append(_run(_extract_pdf_pages, content, start, start + chunk, MAX_LEN - collected))
+            start += chunk
+        for chunk_text, _ in await asyncio.gather(*wave):
+            if chunk_text:
+                parts.append(chunk_text)
+                collected += len(chunk_text) + 1
+    return "\n".join(parts)
+
+
+async def extract_resume_text_async(filename: str, content: ResumeSource) -> str:
+    """
+    Extract resume text in the process pool, bounded in time and memory.
+
+    Returns an empty string when the file cannot be parsed within its limits.
+    """
+    lower = (filename or "").lower()
+    try:
+        if lower.endswith(".pdf"):
+            text = await _extract_pdf_async(content)
+        elif lower.endswith(".docx"):
+            text = await _run(_extract_from_docx, content, MAX_LEN)
+        else:
+            text = _extract_other(content)
+    except (ExtractionTimeout, MemoryError) as exc:
+        logger.warning(f"Resume extraction for {filename} exceeded its limits: {exc}")
+        return ""
+    except Exception as exc:
+        logger.warning(f"Failed to extract resume text for {filename}: {exc}")
+        return ""
+
+    return text[:MAX_LEN]
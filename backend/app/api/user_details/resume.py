@@ -4,84 +4,106 @@ Resume upload helper for user details flow.
 Uses the shared storage_connection utility to upload resumes to GCS.
 """
 
+import asyncio
+import hashlib
 import os
 import tempfile
-from io import BytesIO
-from typing import Optional, Dict, Tuple
+from typing import BinaryIO, Optional, Dict, Tuple
 
-from fastapi import UploadFile
-from PyPDF2 import PdfReader
-from docx import Document
+from fastapi import HTTPException, UploadFile
 
+from app.api.user_details.extraction import extract_resume_text_async
+from app.api.user_details.resume_cache import resume_cache
+from app.utils.firestore_connection import FirestoreRepository
 from app.utils.storage_connection import upload_resume
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-
-def _extract_from_pdf(content: bytes) -> str:
-    reader = PdfReader(BytesIO(content))
-    text = []
-    for page in reader.pages:
-        try:
-            text.append(page.extract_text() or "")
-        except Exception as exc:
-            logger.warning(f"Failed to extract text from a PDF page: {exc}")
-    return "\n".join(filter(None, text))
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(5 * 1024 * 1024)))
+SPOOL_CHUNK_BYTES = 256 * 1024
 
 
-def _extract_from_docx(content: bytes) -> str:
-    doc = Document(BytesIO(content))
-    return "\n".join([p.text for p in doc.paragraphs if p.text])
+class ResumeTooLarge(Exception):
+    pass
 
 
-def extract_resume_text(filename: str, content: bytes) -> str:
-    """
-    Extract textual content from common resume formats (pdf, docx, txt).
-    Falls back to best-effort utf-8 decode.
+def _spool_to_disk(source: BinaryIO, suffix: str, max_bytes: int) -> Tuple[str, int, str]:
     """
-    MAX_LEN = 10000  # avoid oversized payloads in Firestore
-    name = filename or ""
-    lower = name.lower()
-    try:
-        if lower.endswith(".pdf"):
-            text = _extract_from_pdf(content)
-        elif lower.endswith(".docx"):
-            text = _extract_from_docx(content)
-        else:
-            # txt or other: try decode
-            text = content.decode("utf-8", errors="ignore")
-    except Exception as exc:
-        logger.warning(f"Failed to extract resume text for {filename}: {exc}")
-        return ""
-
-    return text[:MAX_LEN]
+    Copy the upload to a named temp file one chunk at a time, enforcing ``max_bytes``.
 
-
-async def upload_resume_to_gcs(upload: Optional[UploadFile]) -> Optional[Dict[str, str]]:
+    Returns the temp path, the size and the SHA-256 hex digest of the bytes.
+    """
+    source.seek(0)
+    size = 0
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        try:
+            while True:
+                chunk = source.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResumeTooLarge(f"resume exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+    return tmp.name, size, digest.hexdigest()
+
+
+async def upload_resume_to_gcs(
+    upload: Optional[UploadFile], repo: Optional[FirestoreRepository] = None
+) -> Optional[Dict[str, str]]:
     """
     Upload the provided resume file to GCS and return upload metadata + extracted text.
 
+    The file is never held in memory as a whole: it is copied to disk in
+    chunks, then the chunked resumable upload and text extraction (which reads
+    the same file in the process pool) run concurrently. When ``repo`` is
+    given, files already seen (same SHA-256) reuse the stored object and text.
+
     Returns dict: file_name, gcs_path, bucket, resume_text
     """
     if upload is None:
         logger.info("No resume file supplied; skipping upload.")
         return None
 
-    content = await upload.read()
-    extracted_text = extract_resume_text(upload.filename or "", content)
+    too_large = HTTPException(
+        status_code=413, detail=f"Resume exceeds the {RESUME_MAX_BYTES // 1024} KB limit"
+    )
+    if upload.size is not None and upload.size > RESUME_MAX_BYTES:
+        raise too_large
 
     # Preserve extension if present so downstream consumers see expected formats.
     _, ext = os.path.splitext(upload.filename or "")
-    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-        tmp.write(content)
-        tmp_path = tmp.name
+    try:
+        tmp_path, size, digest = await asyncio.to_thread(_spool_to_disk, upload.file, ext, RESUME_MAX_BYTES)
+    except ResumeTooLarge as exc:
+        raise too_large from exc
 
     try:
-        logger.info("Uploading resume to GCS...")
-        info = upload_resume(tmp_path)
+        if repo is not None:
+            cached = await resume_cache.get(repo, digest)
+            if cached is not None:
+                logger.info(f"Reusing resume {digest[:12]} at {cached.get('gcs_path')}")
+                return {
+                    key: cached.get(key)
+                    for key in ("file_name", "gcs_path", "bucket", "resume_text")
+                }
+
+        logger.info(f"Uploading resume to GCS ({size} bytes)...")
+        info, extracted_text = await asyncio.gather(
+            asyncio.to_thread(upload_resume, tmp_path, upload.content_type, digest),
+            extract_resume_text_async(upload.filename or "", tmp_path),
+        )
         info["resume_text"] = extracted_text
         logger.info(f"Resume uploaded to {info.get('gcs_path')} in bucket {info.get('bucket')}")
+        if repo is not None:
+            await resume_cache.put(repo, digest, {**info, "size": size})
         return info
     finally:
         try:
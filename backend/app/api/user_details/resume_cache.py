@@ -0,0 +1,76 @@
+"""
+Content-addressed resume cache.
+
+Resumes are keyed by the SHA-256 of their bytes. A bounded per-worker LRU sits
+in front of the persistent ``resumes/{sha256}`` index in Firestore, so a
+candidate re-applying with the same CV reuses the stored GCS object and the
+text extracted the first time instead of parsing and uploading it again.
+"""
+
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.utils.firestore_connection import FirestoreRepository, ResumeRecord
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RESUME_CACHE_SIZE = int(os.getenv("RESUME_CACHE_SIZE", "256"))
+
+
+class ResumeCache:
+    """LRU of resume records in front of the Firestore index, with hit/miss counters."""
+
+    def __init__(self, max_size: int = RESUME_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, ResumeRecord]" = OrderedDict()
+        self.memory_hits = 0
+        self.index_hits = 0
+        self.misses = 0
+
+    def _remember(self, digest: str, record: ResumeRecord) -> None:
+        self._items[digest] = record
+        self._items.move_to_end(digest)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    async def get(self, repo: FirestoreRepository, digest: str) -> Optional[ResumeRecord]:
+        record = self._items.get(digest)
+        if record is not None:
+            self._items.move_to_end(digest)
+            self.memory_hits += 1
+            return record
+
+        record = await repo.resumes.get(digest)
+        if record and record.get("gcs_path"):
+            self._remember(digest, record)
+            self.index_hits += 1
+            return record
+
+        self.misses += 1
+        return None
+
+    async def put(self, repo: FirestoreRepository, digest: str, record: ResumeRecord) -> None:
+        record = {**record, "sha256": digest, "created_at": datetime.utcnow()}
+        self._remember(digest, record)
+        try:
+            await repo.resumes.set(digest, record, merge=False)
+        except Exception as exc:
+            # The upload already succeeded; a missing index entry only costs a future re-upload.
+            logger.warning(f"Failed to index resume {digest}: {exc}")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.index_hits + self.misses
+        hits = self.memory_hits + self.index_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "index_hits": self.index_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "size": len(self._items),
+        }
+
+
+resume_cache = ResumeCache()
@@ -0,0 +1,146 @@
+"""
+Session slot accounting.
+
+Occupancy lives in small counter documents (``counters/slots-{shard}``), each
+owning a fixed share of ``SESSION_LIMIT``, instead of being derived by
+streaming the ``in_session`` collection inside every join transaction.
+Admission is a read-modify-write of one shard document. Exits, expiries and
+queue promotion share one transaction that reads every shard once
+(``read_slots``), releases the departing slot and claims as many free slots
+as there are waiting users (``claim_slots``), writing each changed shard once.
+
+Each ``in_session`` document records the shard it occupies in ``slot_shard``.
+Sessions created before the counters existed are counted into shard 0 the
+first time it is read.
+"""
+
+import os
+import random
+from typing import Dict, List, Optional
+
+from google.cloud import firestore
+
+from app.utils.firestore_connection import FirestoreRepository
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SLOT_SHARDS = max(int(os.getenv("SLOT_SHARDS", "1")), 1)
+
+
+def shard_capacity(shard: int, limit: int, shards: Optional[int] = None) -> int:
+    """Slots owned by ``shard`` when ``limit`` slots are spread over ``shards`` (default ``SLOT_SHARDS``)."""
+    shards = shards or SLOT_SHARDS
+    return limit // shards + (1 if shard < limit % shards else 0)
+
+
+async def _occupied(
+    txn: firestore.AsyncTransaction, repo: FirestoreRepository, shard: int, limit: int
+) -> int:
+    state = await repo.counters.get(repo.counters.slot_id(shard), transaction=txn)
+    if state is not None:
+        return int(state.get("occupied", 0))
+    if shard != 0:
+        return 0
+    # Seed shard 0 from sessions that predate slot accounting.
+    legacy = await repo.in_session.active(limit + 1, transaction=txn)
+    return sum(1 for doc in legacy if (doc.to_dict() or {}).get("slot_shard") in (None, 0))
+
+
+async def acquire_slot(
+    txn: firestore.AsyncTransaction, repo: FirestoreRepository, limit: int
+) -> Optional[int]:
+    """
+    Reserve a slot inside ``txn`` and return its shard, or None when all are taken.
+
+    Shards are probed from a random start so concurrent joins mostly touch
+    different documents. It only writes when a slot was taken, so callers may
+    keep reading in the transaction when it returns None.
+    """
+    start = random.randrange(SLOT_SHARDS)
+    for offset in range(SLOT_SHARDS):
+        shard = (start + offset) % SLOT_SHARDS
+        capacity = shard_capacity(shard, limit)
+        if capacity == 0:
+            continue
+        occupied = max(await _occupied(txn, repo, shard, limit), 0)
+        if occupied < capacity:
+            txn.set(
+                repo.counters.ref(repo.counters.slot_id(shard)),
+                {"occupied": occupied + 1, "capacity": capacity},
+                merge=True,
+            )
+            return shard
+    return None
+
+
+async def read_slots(
+    txn: firestore.AsyncTransaction, repo: FirestoreRepository, limit: int
+) -> Dict[int, List[int]]:
+    """Read every shard inside ``txn``: ``{shard: [occupied, capacity]}``."""
+    slots: Dict[int, List[int]] = {}
+    for shard in range(SLOT_SHARDS):
+        occupied = max(await _occupied(txn, repo, shard, limit), 0)
+        slots[shard] = [occupied, shard_capacity(shard, limit)]
+    return slots
+
+
+def free_slots(slots: Dict[int, List[int]]) -> int:
+    return sum(max(capacity - occupied, 0) for occupied, capacity in slots.values())
+
+
+def claim_slots(
+    txn: firestore.AsyncTransaction,
+    repo: FirestoreRepository,
+    slots: Dict[int, List[int]],
+    count: int,
+    released: Optional[int] = None,
+) -> List[int]:
+    """
+    Assign ``count`` slots from ``slots`` (as read by ``read_slots``) and write
+    the new occupancy of every shard that changed, including a ``released`` one.
+    Returns one shard per claimed slot.
+    """
+    dirty = set()
+    if released is not None and released in slots:
+        slots[released][0] = max(slots[released][0] - 1, 0)
+        dirty.add(released)
+    shards: List[int] = []
+    for _ in range(count):
+        shard = max(slots, key=lambda key: slots[key][1] - slots[key][0])
+        if slots[shard][1] - slots[shard][0] <= 0:
+            break
+        slots[shard][0] += 1
+        dirty.add(shard)
+        shards.append(shard)
+    for shard in dirty:
+        occupied, capacity = slots[shard]
+        txn.set(
+            repo.counters.ref(repo.counters.slot_id(shard)),
+            {"occupied": occupied, "capacity": capacity},
+            merge=True,
+        )
+    return shards
+
+
+@firestore.async_transactional
+async def _reconcile(txn: firestore.AsyncTransaction, repo: FirestoreRepository, limit: int) -> List[int]:
+    sessions = await repo.in_session.active(limit * 2 + 1, transaction=txn)
+    counts: Dict[int, int] = {shard: 0 for shard in range(SLOT_SHARDS)}
+    for doc in sessions:
+        shard = (doc.to_dict() or {}).get("slot_shard") or 0
+        counts[shard % SLOT_SHARDS] += 1
+    for shard, occupied in counts.items():
+        txn.set(
+            repo.counters.ref(repo.counters.slot_id(shard)),
+            {"occupied": occupied, "capacity": shard_capacity(shard, limit)},
+            merge=True,
+        )
+    return [counts[shard] for shard in range(SLOT_SHARDS)]
+
+
+async def reconcile_slots(repo: FirestoreRepository, limit: int) -> List[int]:
+    """Recount occupancy from ``in_session`` to repair drift (e.g. manual deletes)."""
+    occupied = await _reconcile(repo.transaction(), repo, limit)
+    logger.info(f"Slot occupancy reconciled: {occupied}")
+    return occupied
@@ -1,19 +1,28 @@
 """
-Status API for polling user queue state.
+Status API for user queue state.
+
+``/status/{user_id}`` answers a single poll; ``/status/{user_id}/events``
+pushes changes over Server-Sent Events from the shared status watcher.
 """
 
+import asyncio
 import os
 
-import firebase_admin
-from fastapi import APIRouter, HTTPException
-from firebase_admin import credentials, firestore as fb_firestore
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from app.api.user_details.status_cache import status_cache
+from app.api.user_details.status_watcher import NOT_FOUND, status_watcher
+from app.utils.firestore_connection import FirestoreRepository, get_repository
 from app.utils.logger import get_logger
+from app.utils.sse import SSE_HEADERS, format_sse, sse_comment
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/status", tags=["status"])
 
+STATUS_HEARTBEAT_SECONDS = float(os.getenv("STATUS_HEARTBEAT_SECONDS", "15"))
+
 
 class StatusResponse(BaseModel):
     user_id: str
@@ -21,52 +30,48 @@ class StatusResponse(BaseModel):
     queue_number: int
 
 
-def get_firestore_client() -> fb_firestore.Client:
-    """Initialize and return a Firestore client."""
-    cred_path = os.getenv("FIRESTORE_APPLICATION_CREDENTIALS") or os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-    if not cred_path:
-        raise HTTPException(status_code=500, detail="FIRESTORE_APPLICATION_CREDENTIALS is not set")
-
-    if not firebase_admin._apps:
-        cred = credentials.Certificate(cred_path)
-        firebase_admin.initialize_app(cred)
-
-    return fb_firestore.client()
-
-
 @router.get("/{user_id}", response_model=StatusResponse)
-async def get_status(user_id: str):
-    """Fetch status and queue number for a user by ID."""
-    logger.info(f"Status requested for user_id={user_id}")
-    db = get_firestore_client()
-
-    # Check in_session first, then queue, then user
-    data = None
-    in_session_doc = db.collection("in_session").document(user_id).get()
-    if in_session_doc.exists:
-        data = in_session_doc.to_dict() or {}
-    else:
-        queue_doc = db.collection("queue").document(user_id).get()
-        if queue_doc.exists:
-            data = queue_doc.to_dict() or {}
-
-    if data is None:
-        user_doc = db.collection("users").document(user_id).get()
-        if not user_doc.exists:
-            raise HTTPException(status_code=404, detail="User not found")
-        data = user_doc.to_dict() or {}
-
-    status = data.get("status")
+async def get_status(user_id: str, repo: FirestoreRepository = Depends(get_repository)):
+    """
+    Fetch status and queue number for a user by ID.
+
+    in_session, queue and users are read in one batched round-trip (in that
+    precedence) and served from the short-TTL, single-flight status cache.
+    """
+    status, queue_number = await status_cache.get(repo, user_id)
+    if status == NOT_FOUND:
+        raise HTTPException(status_code=404, detail="User not found")
     if status is None:
         raise HTTPException(status_code=500, detail="Status information incomplete")
+    return StatusResponse(user_id=user_id, status=status, queue_number=int(queue_number))
 
-    # Derive queue number dynamically (1-based) using created_at ordering
-    queue_number = 0
-    if status == "pending":
-        queue_docs = list(db.collection("queue").order_by("created_at").stream())
-        for idx, doc in enumerate(queue_docs, start=1):
-            if doc.get("user_id") == user_id or doc.id == user_id:
-                queue_number = idx
-                break
 
-    return StatusResponse(user_id=user_id, status=status, queue_number=int(queue_number))
+@router.get("/{user_id}/events")
+async def status_events(user_id: str):
+    """
+    Stream status and queue-position changes for a user.
+
+    The stream ends once the user is in_session or unknown; clients fall back
+    to polling ``/status/{user_id}`` if the connection drops.
+    """
+    logger.info(f"Status stream opened for user_id={user_id}")
+
+    async def stream():
+        queue = status_watcher.subscribe(user_id)
+        try:
+            while True:
+                try:
+                    update = await asyncio.wait_for(queue.get(), STATUS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield sse_comment()
+                    continue
+                if update["status"] == NOT_FOUND:
+                    yield format_sse("gone", {"detail": "User not found"})
+                    return
+                yield format_sse("status", update)
+                if update["status"] == "in_session":
+                    return
+        finally:
+            status_watcher.unsubscribe(user_id, queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,116 @@
+"""
+Per-worker status cache for ``/status/{user_id}`` polling.
+
+A miss fetches the user's ``in_session``, ``queue`` and ``users`` documents
+plus ``counters/queue`` in one batched ``get_all`` and resolves them with
+``derive_status``. Results live for ``STATUS_CACHE_TTL_SECONDS``, and
+concurrent polls for the same user share a single in-flight fetch
+(single-flight). Join, exit, expiry and promotion in this worker call
+``invalidate`` for every user whose state they changed; other workers catch
+up within the TTL. Queue positions of users who did not move themselves can
+lag by up to the TTL as the head advances.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.api.user_details.status_watcher import NOT_FOUND, derive_status
+from app.utils.firestore_connection import FirestoreRepository
+
+STATUS_CACHE_TTL_SECONDS = float(os.getenv("STATUS_CACHE_TTL_SECONDS", "1"))
+STATUS_CACHE_SIZE = int(os.getenv("STATUS_CACHE_SIZE", "10000"))
+
+# (status, queue_number); status is NOT_FOUND when no document exists for the user
+# and None when the document lacks a status.
+StatusValue = Tuple[Optional[str], int]
+
+
+async def fetch_status(repo: FirestoreRepository, user_id: str) -> StatusValue:
+    """One batched read of everything ``/status`` needs."""
+    refs = [
+        repo.in_session.ref(user_id),
+        repo.queue.ref(user_id),
+        repo.users.ref(user_id),
+        repo.counters.ref(repo.counters.QUEUE),
+    ]
+    docs = await repo.get_all(refs)
+    session_doc, queue_doc, user_doc, counters = (docs[ref.path] for ref in refs)
+    if session_doc is None and queue_doc is None and user_doc is None:
+        return NOT_FOUND, 0
+    status, queue_number = derive_status(
+        session_doc, queue_doc, user_doc, int((counters or {}).get("head", 1))
+    )
+    if queue_number < 0:
+        # Legacy queue entry without a ticket.
+        queue_number = await repo.queue.position(user_id, entry=queue_doc)
+    return status, queue_number
+
+
+class StatusCache:
+    """TTL cache with single-flight fetches and per-user invalidation."""
+
+    def __init__(self, ttl_seconds: float = STATUS_CACHE_TTL_SECONDS, max_size: int = STATUS_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, StatusValue]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, repo: FirestoreRepository, user_id: str) -> StatusValue:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(user_id)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # The fetch runs in its own task so a poller that disconnects
+            # cancels only its own wait, never the fetch the others share.
+            task = asyncio.get_running_loop().create_task(fetch_status(repo, user_id))
+            self._inflight[user_id] = task
+            task.add_done_callback(lambda done: self._finish(user_id, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, user_id: str, task: asyncio.Task) -> None:
+        # Reading the exception also marks it retrieved when every waiter has gone.
+        failed = task.cancelled() or task.exception() is not None
+        # invalidate() drops the in-flight entry: the value may predate the change.
+        if self._inflight.get(user_id) is not task:
+            return
+        del self._inflight[user_id]
+        if not failed:
+            self._store(user_id, task.result())
+
+    def _store(self, user_id: str, value: StatusValue) -> None:
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids: Iterable[Optional[str]]) -> None:
+        for user_id in user_ids:
+            if not user_id:
+                continue
+            self._entries.pop(user_id, None)
+            self._inflight.pop(user_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+
+status_cache = StatusCache()
@@ -0,0 +1,165 @@
+"""
+Shared status watcher for the waiting-room event stream.
+
+Each worker runs at most one poll loop, and only while clients are connected.
+Every tick fetches the in_session, queue and users documents of all watched
+users plus the queue counters in a single batched read, then pushes changed
+states to subscribers. Idle connections only cost a periodic heartbeat.
+Failed ticks are logged and retried with exponential backoff up to
+``STATUS_WATCH_MAX_BACKOFF_SECONDS``.
+"""
+
+import asyncio
+import os
+from typing import Dict, Optional, Set, Tuple
+
+from app.utils.firestore_connection import FirestoreRepository, get_firestore_repository
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STATUS_WATCH_INTERVAL_SECONDS = float(os.getenv("STATUS_WATCH_INTERVAL_SECONDS", "2"))
+STATUS_WATCH_MAX_BACKOFF_SECONDS = float(os.getenv("STATUS_WATCH_MAX_BACKOFF_SECONDS", "30"))
+
+# Pushed when none of the user's documents exist.
+NOT_FOUND = "not_found"
+
+
+def derive_status(
+    session_doc: Optional[dict],
+    queue_doc: Optional[dict],
+    user_doc: Optional[dict],
+    queue_head: int,
+) -> Tuple[Optional[str], int]:
+    """
+    Resolve status with the same precedence as ``/status``: in_session, then
+    queue, then users. Returns ``(status, queue_number)``; ``queue_number`` is
+    -1 when a legacy queue entry without a ticket needs a positional lookup.
+    """
+    data = session_doc or queue_doc or user_doc
+    if data is None:
+        return None, 0
+
+    status = data.get("status")
+    queue_number = 0
+    if status == "pending":
+        ticket = (queue_doc or {}).get("ticket")
+        if ticket is None:
+            queue_number = -1 if queue_doc else 0
+        else:
+            queue_number = max(int(ticket) - queue_head + 1, 1)
+    return status, queue_number
+
+
+class StatusWatcher:
+    """Fan out status changes for watched users from one shared poll loop."""
+
+    def __init__(
+        self,
+        interval_seconds: float = STATUS_WATCH_INTERVAL_SECONDS,
+        max_backoff_seconds: float = STATUS_WATCH_MAX_BACKOFF_SECONDS,
+    ):
+        self.interval_seconds = interval_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._last: Dict[str, dict] = {}
+        self._incomplete: Set[str] = set()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def watched_users(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        """Register interest in ``user_id`` and return the queue updates arrive on."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        last = self._last.get(user_id)
+        if last is not None:
+            self._offer(queue, last)
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+            self._last.pop(user_id, None)
+            self._incomplete.discard(user_id)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, update: dict) -> None:
+        """Deliver ``update``, replacing any state the subscriber has not read yet."""
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(update)
+
+    async def _run(self) -> None:
+        repo: Optional[FirestoreRepository] = None
+        failures = 0
+        while self._subscribers:
+            self._wake.clear()
+            try:
+                if repo is None:
+                    repo = get_firestore_repository()
+                await self._tick(repo)
+                failures = 0
+            except Exception as exc:
+                failures += 1
+                delay = min(self.interval_seconds * 2 ** failures, self.max_backoff_seconds)
+                logger.error(f"Status watcher tick failed ({failures} in a row), retrying in {delay:.1f}s: {exc}")
+                # New subscribers do not cut the backoff short.
+                await asyncio.sleep(delay)
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _tick(self, repo: FirestoreRepository) -> None:
+        user_ids = list(self._subscribers)
+        refs = [repo.counters.ref(repo.counters.QUEUE)]
+        for user_id in user_ids:
+            refs.extend(
+                [repo.in_session.ref(user_id), repo.queue.ref(user_id), repo.users.ref(user_id)]
+            )
+        docs = await repo.get_all(refs)
+        counters = docs[refs[0].path] or {}
+        queue_head = int(counters.get("head", 1))
+
+        for idx, user_id in enumerate(user_ids):
+            session_ref, queue_ref, user_ref = refs[1 + idx * 3: 4 + idx * 3]
+            found = [docs[ref.path] for ref in (session_ref, queue_ref, user_ref)]
+            if all(doc is None for doc in found):
+                status, queue_number = NOT_FOUND, 0
+            else:
+                status, queue_number = derive_status(*found, queue_head)
+            if status is None:
+                # The user exists but has no status yet; keep waiting rather
+                # than telling the client it is gone.
+                if user_id not in self._incomplete:
+                    self._incomplete.add(user_id)
+                    logger.warning(f"Status watcher: no status field for user_id={user_id}")
+                continue
+            self._incomplete.discard(user_id)
+            if queue_number < 0:
+                queue_number = await repo.queue.position(user_id)
+            update = {
+                "user_id": user_id,
+                "status": status,
+                "queue_number": queue_number,
+            }
+            if self._last.get(user_id) == update or user_id not in self._subscribers:
+                continue
+            self._last[user_id] = update
+            for queue in list(self._subscribers[user_id]):
+                self._offer(queue, update)
+
+
+status_watcher = StatusWatcher()
@@ -3,28 +3,32 @@ User details API for creating users, uploading resumes to GCS,
 queuing them in Firestore, and managing session lifecycle.
 """
 
-import asyncio
 import os
 from datetime import datetime, timedelta
-from typing import Optional, List
+from typing import Any, Dict, List, Optional, Tuple
 
-import firebase_admin
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from firebase_admin import credentials, firestore as fb_firestore
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from firebase_admin import firestore as fb_firestore
 from google.cloud import firestore
 from pydantic import BaseModel, EmailStr
 
+from app.api.interview.opening import opening_prefetcher
 from app.api.user_details.details import build_user_document, generate_user_id
-from app.api.interview.prompt import build_swot_prompt, history_to_text, parse_swot_response
+from app.api.swot_details.jobs import swot_jobs
 from app.api.user_details.resume import upload_resume_to_gcs
-from app.utils.gemini_wrapper import get_gemini_response
+from app.api.user_details.expiry import ExpiryScheduler
+from app.api.user_details.slots import acquire_slot, claim_slots, free_slots, read_slots, reconcile_slots
+from app.api.user_details.status_cache import status_cache
+from app.utils.firestore_connection import FirestoreRepository, get_firestore_repository, get_repository
+from app.utils.leader_lease import LeaderLease
 from app.utils.logger import get_logger
-from app.utils.task_queue import enqueue_user_for_join
+from app.utils.metrics import set_queue_gauges
+from app.utils.task_queue import JoinBacklogFull, enqueue_user_for_join
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/users", tags=["users"])
 
-SESSION_LIMIT = 3
+SESSION_LIMIT = int(os.getenv("SESSION_LIMIT", "3"))
 SESSION_DURATION_MINUTES = 5
 CLEANUP_INTERVAL_SECONDS = 60
 
@@ -46,102 +50,151 @@ class JoinResponse(BaseModel):
     queue_number: int
 
 
-def get_firestore_client() -> fb_firestore.Client:
-    """Initialize and return a Firestore client."""
-    cred_path = os.getenv("FIRESTORE_APPLICATION_CREDENTIALS") or os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-    if not cred_path:
-        raise HTTPException(status_code=500, detail="FIRESTORE_APPLICATION_CREDENTIALS is not set")
-
-    if not firebase_admin._apps:
-        cred = credentials.Certificate(cred_path)
-        firebase_admin.initialize_app(cred)
-
-    return fb_firestore.client()
+def _session_record(user_id: str, now: datetime, shard: Optional[int]) -> dict:
+    return {
+        "user_id": user_id,
+        "start_time": now,
+        "expiry_time": now + timedelta(minutes=SESSION_DURATION_MINUTES),
+        "status": "in_session",
+        "slot_shard": shard or 0,
+        "created_at": now,
+    }
 
 
-def _compute_queue_position(db: fb_firestore.Client, user_id: str) -> int:
+@firestore.async_transactional
+async def _release_and_promote(
+    txn: firestore.AsyncTransaction,
+    repo: FirestoreRepository,
+    user_id: Optional[str] = None,
+    user_status: str = "idle",
+    expired_before: Optional[datetime] = None,
+    user_fields: Optional[Dict[str, Any]] = None,
+) -> Tuple[bool, List[str]]:
     """
-    Compute queue position (1-based) based on created_at ordering.
+    Single transaction that optionally ends ``user_id``'s session and then fills
+    every free slot from the head of the queue.
+
+    Reads the session, all slot shards and exactly as many queue entries as
+    there are free slots, then writes the in_session/users/queue/counters
+    changes together. With ``expired_before`` the session is only ended if it
+    has expired by then. ``user_fields`` are written to the user document
+    together with ``user_status``. Returns ``(ended, promoted_user_ids)``.
     """
-    queue_coll = db.collection("queue")
-    docs: List[fb_firestore.DocumentSnapshot] = list(
-        queue_coll.order_by("created_at").stream()
-    )
-    for idx, doc in enumerate(docs, start=1):
-        if doc.get("user_id") == user_id or doc.id == user_id:
-            return idx
-    return 0
-
+    session = await repo.in_session.get(user_id, transaction=txn) if user_id else None
+    if session is not None and expired_before is not None:
+        expiry = session.get("expiry_time")
+        if expiry is not None and expiry.replace(tzinfo=None) > expired_before:
+            # A newer session replaced the one that was scheduled to expire.
+            return False, []
+
+    slots = await read_slots(txn, repo, SESSION_LIMIT)
+    released = (session.get("slot_shard") or 0) if session is not None else None
+    free = free_slots(slots) + (1 if released is not None else 0)
+    queue_docs = await repo.queue.oldest(limit=free, transaction=txn) if free > 0 else []
 
-def ensure_swot_for_user(db: fb_firestore.Client, user_id: str):
-    """Generate and store SWOT analysis if missing for the user."""
-    user_ref = db.collection("users").document(user_id)
-    snapshot = user_ref.get()
-    if not snapshot.exists:
-        return
+    now = datetime.utcnow()
+    if session is not None:
+        txn.delete(repo.in_session.ref(user_id))
+    if user_id and (session is not None or expired_before is None):
+        txn.set(
+            repo.users.ref(user_id),
+            {**(user_fields or {}), "status": user_status, "updated_at": now},
+            merge=True,
+        )
+    if session is None and not queue_docs:
+        return False, []
+
+    shards = claim_slots(txn, repo, slots, len(queue_docs), released=released)
+    promoted: List[str] = []
+    head = None
+    for doc, shard in zip(queue_docs, shards):
+        data = doc.to_dict() or {}
+        queued_user_id = data.get("user_id") or doc.id
+        txn.delete(doc.reference)
+        txn.set(repo.in_session.ref(queued_user_id), _session_record(queued_user_id, now, shard))
+        txn.set(repo.users.ref(queued_user_id), {"status": "in_session", "updated_at": now}, merge=True)
+        if data.get("ticket") is not None:
+            head = max(head or 0, int(data["ticket"]) + 1)
+        promoted.append(queued_user_id)
+
+    # Advance the head past the promoted tickets
+    if head is not None:
+        txn.set(repo.counters.ref(repo.counters.QUEUE), {"head": head}, merge=True)
+
+    return session is not None, promoted
+
+
+async def release_and_promote(
+    repo: FirestoreRepository,
+    user_id: Optional[str] = None,
+    user_status: str = "idle",
+    expired_before: Optional[datetime] = None,
+    user_fields: Optional[Dict[str, Any]] = None,
+) -> Tuple[bool, List[str]]:
+    ended, promoted = await _release_and_promote(
+        repo.transaction(), repo, user_id, user_status, expired_before, user_fields
+    )
+    status_cache.invalidate([user_id, *promoted])
+    if promoted:
+        logger.info(f"Promoted {len(promoted)} queued user(s): {', '.join(promoted)}")
+        opening_prefetcher.schedule(repo, promoted)
+    return ended, promoted
 
-    doc = snapshot.to_dict() or {}
-    if doc.get("swot_analysis"):
-        return
 
-    history = doc.get("interview_history", []) or []
-    prompt = build_swot_prompt(doc.get("resume_text", ""), history_to_text(history))
-    swot_result = parse_swot_response(get_gemini_response(prompt))
-    user_ref.set({"swot_analysis": swot_result}, merge=True)
+async def promote_waiting_users(repo: FirestoreRepository) -> List[str]:
+    """Fill every free slot from the head of the queue."""
+    _, promoted = await release_and_promote(repo)
+    return promoted
 
 
-def promote_next_user(db: fb_firestore.Client):
+async def expire_session(repo: FirestoreRepository, user_id: str) -> None:
     """
-    Promote the oldest queued user into in_session (non-transactional).
+    End an expired session, freeing its slot, promote waiting users and queue SWOT.
     """
-    queue_docs = list(
-        db.collection("queue").order_by("created_at").limit(1).stream()
-    )
-    if not queue_docs:
-        return
-
-    oldest = queue_docs[0]
-    queued_user_id = oldest.to_dict().get("user_id") or oldest.id
-    oldest.reference.delete()
-
-    now = datetime.utcnow()
-    db.collection("in_session").document(queued_user_id).set(
-        {
-            "user_id": queued_user_id,
-            "start_time": now,
-            "expiry_time": now + timedelta(minutes=SESSION_DURATION_MINUTES),
-            "status": "in_session",
-            "created_at": now,
-        }
-    )
-    db.collection("users").document(queued_user_id).set(
-        {"status": "in_session", "updated_at": now}, merge=True
-    )
+    ended, _ = await release_and_promote(repo, user_id, expired_before=datetime.utcnow())
+    if ended:
+        await swot_jobs.submit(repo, user_id)
 
 
-def cleanup_expired_sessions(db: fb_firestore.Client):
+async def cleanup_expired_sessions(repo: FirestoreRepository, limit: int = 100):
     """
-    Remove expired sessions and promote queued users (non-transactional).
+    One-off sweep of sessions already past expiry (the scheduler normally handles them).
     """
-    now = datetime.utcnow()
-    expired = list(
-        db.collection("in_session")
-        .where("expiry_time", "<", now)
-        .limit(20)
-        .stream()
-    )
+    expired = await repo.in_session.expired(datetime.utcnow(), limit=limit)
     for session in expired:
-        user_id = session.to_dict().get("user_id") or session.id
-        ensure_swot_for_user(db, user_id)
-        session.reference.delete()
-        db.collection("users").document(user_id).set({"status": "idle"}, merge=True)
-        promote_next_user(db)
+        await expire_session(repo, session.to_dict().get("user_id") or session.id)
 
 
-@firestore.transactional
-def _join_transaction(
-    txn: firestore.Transaction,
-    db: fb_firestore.Client,
+@firestore.async_transactional
+async def _ticket_legacy_entries(txn: firestore.AsyncTransaction, repo: FirestoreRepository) -> int:
+    """
+    Number queue entries that predate tickets just ahead of ``head``, oldest
+    first, and move ``head`` back to the first of them. They waited longest, so
+    promotion takes them before anyone who joined with a ticket.
+    """
+    counters = await repo.counters.queue_state(transaction=txn)
+    legacy = await repo.queue.untracked(transaction=txn)
+    if not legacy:
+        return 0
+    head = counters["head"] - len(legacy)
+    for offset, doc in enumerate(legacy):
+        txn.set(doc.reference, {"ticket": head + offset}, merge=True)
+    txn.set(repo.counters.ref(repo.counters.QUEUE), {"head": head}, merge=True)
+    return len(legacy)
+
+
+async def assign_legacy_tickets(repo: FirestoreRepository) -> int:
+    """One-off migration of ticketless queue entries; a no-op once none are left."""
+    numbered = await _ticket_legacy_entries(repo.transaction(), repo)
+    if numbered:
+        logger.info(f"Assigned tickets to {numbered} legacy queue entr{'y' if numbered == 1 else 'ies'}")
+    return numbered
+
+
+@firestore.async_transactional
+async def _join_transaction(
+    txn: firestore.AsyncTransaction,
+    repo: FirestoreRepository,
     user_id: str,
 ) -> str:
     """
@@ -151,40 +204,36 @@ def _join_transaction(
     """
     now = datetime.utcnow()
 
-    user_ref = db.collection("users").document(user_id)
-    existing_user = user_ref.get(transaction=txn)
-    if not existing_user.exists:
+    existing_user = await repo.users.get(user_id, transaction=txn)
+    if existing_user is None:
         raise RuntimeError("User document not found")
 
-    existing_status = existing_user.to_dict().get("status")
+    existing_status = existing_user.get("status")
     if existing_status in ("in_session", "pending"):
         return existing_status
 
-    # Count in_session inside transaction (limit to SESSION_LIMIT+1 for efficiency)
-    in_session_ref = db.collection("in_session")
-    in_session_docs = list(in_session_ref.limit(SESSION_LIMIT + 1).stream(transaction=txn))
+    # One small read-modify-write on a slot counter shard decides admission
+    shard = await acquire_slot(txn, repo, SESSION_LIMIT)
 
-    if len(in_session_docs) < SESSION_LIMIT:
+    if shard is not None:
         status = "in_session"
-        session_ref = in_session_ref.document(user_id)
+        txn.set(repo.in_session.ref(user_id), _session_record(user_id, now, shard), merge=True)
+    else:
+        status = "pending"
+        # Hand out a monotonic ticket; the counter read makes concurrent joins
+        # conflict and retry rather than share a number.
+        counters = await repo.counters.queue_state(transaction=txn)
+        ticket = counters["next_ticket"]
         txn.set(
-            session_ref,
-            {
-                "user_id": user_id,
-                "start_time": now,
-                "expiry_time": now + timedelta(minutes=SESSION_DURATION_MINUTES),
-                "status": "in_session",
-                "created_at": now,
-            },
+            repo.counters.ref(repo.counters.QUEUE),
+            {"next_ticket": ticket + 1},
             merge=True,
         )
-    else:
-        status = "pending"
-        queue_ref = db.collection("queue").document(user_id)
         txn.set(
-            queue_ref,
+            repo.queue.ref(user_id),
             {
                 "user_id": user_id,
+                "ticket": ticket,
                 "created_at": fb_firestore.SERVER_TIMESTAMP,
                 "status": "pending",
             },
@@ -192,7 +241,7 @@ def _join_transaction(
         )
 
     txn.set(
-        user_ref,
+        repo.users.ref(user_id),
         {"status": status, "updated_at": now},
         merge=True,
     )
@@ -200,77 +249,57 @@ def _join_transaction(
     return status
 
 
-@firestore.transactional
-def _exit_and_promote(txn: firestore.Transaction, db: fb_firestore.Client, user_id: str) -> Optional[str]:
+async def _housekeeping(repo: FirestoreRepository):
     """
-    Remove user from in_session, promote oldest queued user if present.
-    Returns promoted user_id (or None).
+    Periodic leader-only upkeep: re-queue stale SWOT jobs, ticket queue entries
+    written by instances that predate tickets, repair slot counters and publish
+    the queue/in_session gauges.
     """
-    queue_query = db.collection("queue").order_by("created_at").limit(1)
-    queue_docs = list(queue_query.stream(transaction=txn))
-    if not queue_docs:
-        session_ref = db.collection("in_session").document(user_id)
-        txn.delete(session_ref)
-        txn.set(
-            db.collection("users").document(user_id), {"status": "idle"}, merge=True
-        )
-        return None
+    await swot_jobs.recover_stale_jobs(repo)
+    await assign_legacy_tickets(repo)
+    occupied = await reconcile_slots(repo, SESSION_LIMIT)
+    promoted = await promote_waiting_users(repo)
+    queue = await repo.counters.queue_state()
+    set_queue_gauges(queue["next_ticket"] - queue["head"], sum(occupied) + len(promoted))
 
-    oldest = queue_docs[0]
-    queued_user_id = oldest.to_dict().get("user_id") or oldest.id
 
-    session_ref = db.collection("in_session").document(user_id)
-    txn.delete(session_ref)
+_expiry_scheduler: Optional[ExpiryScheduler] = None
 
-    # Delete from queue
-    txn.delete(oldest.reference)
 
-    # Move to in_session
-    now = datetime.utcnow()
-    session_ref_new = db.collection("in_session").document(queued_user_id)
-    txn.set(
-        session_ref_new,
-        {
-            "user_id": queued_user_id,
-            "start_time": now,
-            "expiry_time": now + timedelta(minutes=SESSION_DURATION_MINUTES),
-            "status": "in_session",
-            "created_at": now,
-        },
-        merge=True,
-    )
-
-    # Update statuses
-    txn.set(db.collection("users").document(user_id), {"status": "idle"}, merge=True)
-    txn.set(db.collection("users").document(queued_user_id), {"status": "in_session"}, merge=True)
-
-    return queued_user_id
-
-
-async def _cleanup_expired_sessions():
+async def start_cleanup_task():
     """
-    Background task: remove expired sessions and promote next queued users.
+    Start the session expiry scheduler once per worker, after numbering any
+    queue entries that predate tickets.
+
+    Every worker competes for the ``session-expiry`` lease; only the holder
+    expires sessions and runs housekeeping.
     """
-    db = get_firestore_client()
-    while True:
+    global _expiry_scheduler
+    if _expiry_scheduler is None:
+        try:
+            repo = get_firestore_repository()
+        except RuntimeError as exc:
+            logger.error(f"Session expiry scheduler not started: {exc}")
+            return
         try:
-            cleanup_expired_sessions(db)
+            await assign_legacy_tickets(repo)
         except Exception as exc:
-            logger.error(f"Cleanup task error: {exc}")
-
-        await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
-
-
-_cleanup_task: Optional[asyncio.Task] = None
+            # Housekeeping retries this on the lease holder.
+            logger.error(f"Legacy queue migration failed: {exc}")
+        _expiry_scheduler = ExpiryScheduler(
+            repo,
+            expire_session,
+            LeaderLease(repo, "session-expiry"),
+            housekeeping=_housekeeping,
+            housekeeping_interval=CLEANUP_INTERVAL_SECONDS,
+        )
+    _expiry_scheduler.start()
 
 
-async def start_cleanup_task():
-    """Start the background cleanup task once."""
-    global _cleanup_task
-    if _cleanup_task and not _cleanup_task.done():
-        return
-    loop = asyncio.get_running_loop()
-    _cleanup_task = loop.create_task(_cleanup_expired_sessions())
+async def stop_cleanup_task():
+    """Stop the scheduler and hand the lease over immediately."""
+    if _expiry_scheduler is not None:
+        await _expiry_scheduler.stop()
 
 
 @router.post("/", response_model=UserCreateResponse)
@@ -280,6 +309,7 @@ async def create_user(
     email: EmailStr = Form(...),
     phone: str = Form(...),
     resume: Optional[UploadFile] = File(None),
+    repo: FirestoreRepository = Depends(get_repository),
 ):
     """
     Create a user record, upload resume to GCS, and enqueue user in Firestore.
@@ -287,13 +317,12 @@ async def create_user(
     logger.info("Received user creation request")
 
     # Upload resume if provided
-    resume_info = await upload_resume_to_gcs(resume)
+    resume_info = await upload_resume_to_gcs(resume, repo)
     resume_path = resume_info.get("gcs_path") if resume_info else None
     resume_bucket = resume_info.get("bucket") if resume_info else None
     resume_text = resume_info.get("resume_text") if resume_info else None
 
     user_id = generate_user_id()
-    db = get_firestore_client()
 
     base_payload = {
         "user_id": user_id,
@@ -309,16 +338,22 @@ async def create_user(
     now = datetime.utcnow()
     try:
         user_doc = build_user_document(base_payload)
-        db.collection("users").document(user_id).set(
-            {**user_doc, "status": "idle", "created_at": now},
-            merge=True,
-        )
-        enqueue_user_for_join(user_id)
-        message = "User created and enqueued for join"
+        await repo.users.set(user_id, {**user_doc, "status": "idle", "created_at": now})
     except Exception as exc:
         logger.error(f"Failed to create user {user_id}: {exc}")
         raise HTTPException(status_code=500, detail="Failed to persist user data") from exc
 
+    try:
+        await enqueue_user_for_join(user_id)
+        message = "User created and enqueued for join"
+    except JoinBacklogFull as exc:
+        logger.error(f"Join backlog full; user {user_id} not enqueued")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many sign-ups in progress; please try again shortly.",
+            headers={"Retry-After": "5"},
+        ) from exc
+
     return UserCreateResponse(
         user_id=user_id,
         status="idle",
@@ -329,30 +364,28 @@ async def create_user(
 
 
 @router.post("/{user_id}/exit", response_model=dict)
-async def exit_session(user_id: str):
+async def exit_session(user_id: str, repo: FirestoreRepository = Depends(get_repository)):
     """
-    Mark user as exited from session and promote the next queued user (if any).
+    Mark user as exited from session and promote queued users into every free slot.
     """
-    db = get_firestore_client()
     try:
-        transaction = db.transaction()
-        promoted = _exit_and_promote(transaction, db, user_id)
+        _, promoted = await release_and_promote(repo, user_id)
     except Exception as exc:
         logger.error(f"Failed to exit/promote for user {user_id}: {exc}")
         raise HTTPException(status_code=500, detail="Failed to exit session") from exc
 
-    return {"exited": user_id, "promoted": promoted}
+    return {"exited": user_id, "promoted": promoted[0] if promoted else None, "promoted_all": promoted}
 
 
 @router.post("/join", response_model=JoinResponse)
-async def join_user(payload: JoinRequest):
+async def join_user(payload: JoinRequest, repo: FirestoreRepository = Depends(get_repository)):
     """
     Cloud Tasks / API entrypoint for actually joining the queue/session.
     """
-    db = get_firestore_client()
     try:
-        transaction = db.transaction()
-        status = _join_transaction(transaction, db, payload.user_id)
+        transaction = repo.transaction()
+        status = await _join_transaction(transaction, repo, payload.user_id)
+        status_cache.invalidate([payload.user_id])
     except RuntimeError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
     except Exception as exc:
@@ -361,6 +394,8 @@ async def join_user(payload: JoinRequest):
 
     queue_number = 0
     if status == "pending":
-        queue_number = _compute_queue_position(db, payload.user_id)
+        queue_number = await repo.queue.position(payload.user_id)
+    elif status == "in_session":
+        opening_prefetcher.schedule(repo, [payload.user_id])
 
     return JoinResponse(user_id=payload.user_id, status=status, queue_number=queue_number)
@@ -2,15 +2,27 @@
 Main FastAPI application for AI Interview Platform Backend
 """
 
+import math
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from app.utils.body_limit import BodySizeLimitMiddleware
+from app.utils.llm_client import LLMError, LLMRateLimitedError, LLMTimeoutError
+from app.utils.metrics import MetricsMiddleware, render_metrics
+from app.utils.timing import TimingMiddleware
+from app.utils.task_queue import get_join_dispatcher, init_join_dispatcher
 from app.utils.logger import get_logger
 from app.api.health.health_api import router as health_router
+from app.api.health.prober import health_prober
 from app.api.interview.api import router as interview_router
-from app.api.user_details.user_api import router as user_router, start_cleanup_task
+from app.api.user_details.user_api import router as user_router, start_cleanup_task, stop_cleanup_task
 from app.api.user_details.status import router as status_router
 from app.api.swot_details.swot_api import router as swot_router
+from app.api.swot_details.jobs import swot_jobs
+from app.api.interview.opening import opening_prefetcher
+from app.api.user_details.extraction import shutdown_extraction_pool
+from app.api.user_details.resume import RESUME_MAX_BYTES
 
 
 logger = get_logger(__name__)
@@ -35,8 +47,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the chat window honour Retry-After on 429s from the interview routes.
+    expose_headers=["Retry-After"],
 )
 
+# Reject oversized resume uploads before multipart parsing (allowing for form fields).
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=RESUME_MAX_BYTES + 64 * 1024,
+    path_prefixes=("/users",),
+)
+
+# Sampled phase breakdowns (Server-Timing header + one structured log line).
+app.add_middleware(TimingMiddleware)
+
+# Outermost, so latency covers every other middleware.
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(health_router)
 app.include_router(user_router)
@@ -45,19 +72,44 @@ app.include_router(interview_router)
 app.include_router(swot_router)
 
 
+@app.exception_handler(LLMError)
+async def llm_error_handler(request: Request, exc: LLMError):
+    """Translate model failures into gateway errors instead of bare 500s."""
+    if isinstance(exc, LLMRateLimitedError):
+        logger.warning(f"LLM rate limited on {request.url.path}: {exc}")
+        retry_after = max(1, math.ceil(exc.retry_after))
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(exc), "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)},
+        )
+    logger.error(f"LLM failure on {request.url.path}: {exc}")
+    status_code = 504 if isinstance(exc, LLMTimeoutError) else 502
+    return JSONResponse(status_code=status_code, content={"detail": str(exc)})
+
+
 @app.on_event("startup")
 async def startup_event():
     """Startup event handler"""
     logger.info("Application starting up...")
     logger.info(f"Environment: {os.getenv('ENVIRONMENT', 'development')}")
     logger.info(f"Log Level: {os.getenv('LOG_LEVEL', 'INFO')}")
+    health_prober.start()
     await start_cleanup_task()
+    swot_jobs.start()
+    init_join_dispatcher(app)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event handler"""
     logger.info("Application shutting down...")
+    await health_prober.stop()
+    await stop_cleanup_task()
+    await swot_jobs.stop()
+    await opening_prefetcher.stop()
+    await get_join_dispatcher().stop()
+    shutdown_extraction_pool()
 
 
 @app.get("/")
@@ -71,6 +123,13 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (aggregated across gunicorn workers)."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -0,0 +1,50 @@
+"""
+ASGI middleware that rejects oversized request bodies before they are parsed.
+
+Requests with a ``Content-Length`` above the limit get a 413 without reading
+the body at all; chunked bodies are counted as they stream in and aborted
+with a 413 as soon as they pass the limit.
+"""
+
+from typing import Iterable
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app: ASGIApp, max_bytes: int, path_prefixes: Iterable[str] = ("/",)):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefixes = tuple(path_prefixes)
+
+    def _too_large(self) -> JSONResponse:
+        return JSONResponse(
+            status_code=413, content={"detail": f"Request body exceeds {self.max_bytes} bytes"}
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._too_large()(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the app, so FastAPI's exception handling turns it into a 413.
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {self.max_bytes} bytes")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,547 @@
+"""
+In-memory stand-ins for Firestore and Cloud Storage.
+
+``FakeFirestoreClient`` implements the slice of ``firestore.AsyncClient`` the
+repository uses: document get/set/delete (with ``merge``, ``Increment``,
+``DELETE_FIELD`` and ``SERVER_TIMESTAMP``), subcollections, ``where`` /
+``order_by`` / ``limit`` queries, ``get_all``, write batches and transactions
+that work with ``@firestore.async_transactional``. Transactions lock what
+they read and resolve conflicts wound-wait style, so contention shows up as
+lock waits and retried ``Aborted`` commits, as it does on Firestore. Datetimes are stored timezone-aware in UTC, as Firestore
+returns them.
+
+``FakeStorageClient`` keeps uploaded objects in memory behind the
+``bucket().blob().upload_from_filename()`` surface.
+
+Both take a ``FaultProfile`` that adds latency (with jitter) to every RPC and
+fails a fraction of them, and both count their operations so benchmarks can
+report reads and writes per candidate. ``FakeLLMBackend`` in ``llm_client``
+is the Gemini counterpart.
+"""
+
+import asyncio
+import copy
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1.transforms import DELETE_FIELD, SERVER_TIMESTAMP, Increment
+
+
+class FaultProfile:
+    """Latency and failure injection applied to each simulated RPC."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    def delay_seconds(self) -> float:
+        jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(self.latency_ms + jitter, 0.0) / 1000
+
+    def should_fail(self) -> bool:
+        return self.failure_rate > 0 and self._random.random() < self.failure_rate
+
+    async def apply(self, operation: str) -> None:
+        delay = self.delay_seconds()
+        if delay:
+            await asyncio.sleep(delay)
+        if self.should_fail():
+            raise exceptions.ServiceUnavailable(f"injected failure in {operation}")
+
+    def apply_sync(self, operation: str) -> None:
+        delay = self.delay_seconds()
+        if delay:
+            time.sleep(delay)
+        if self.should_fail():
+            raise exceptions.ServiceUnavailable(f"injected failure in {operation}")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _store_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    if isinstance(value, dict):
+        return {key: _store_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_store_value(item) for item in value]
+    return value
+
+
+def _apply_fields(target: Dict[str, Any], data: Dict[str, Any], merge: bool) -> Dict[str, Any]:
+    for key, value in data.items():
+        if value is DELETE_FIELD:
+            target.pop(key, None)
+        elif value is SERVER_TIMESTAMP:
+            target[key] = _now()
+        elif isinstance(value, Increment):
+            current = target.get(key)
+            target[key] = (current if isinstance(current, (int, float)) else 0) + value.value
+        elif merge and isinstance(value, dict) and isinstance(target.get(key), dict):
+            _apply_fields(target[key], value, merge)
+        else:
+            target[key] = _store_value(copy.deepcopy(value))
+    return target
+
+
+def _field(data: Dict[str, Any], path: str) -> Tuple[bool, Any]:
+    current: Any = data
+    for part in path.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return False, None
+        current = current[part]
+    return True, current
+
+
+def _comparable(value: Any) -> Any:
+    return _store_value(value) if isinstance(value, datetime) else value
+
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+class FakeSnapshot:
+    def __init__(self, reference: "FakeDocumentReference", data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        found, value = _field(self._data or {}, field_path)
+        if not found:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class FakeDocumentReference:
+    def __init__(self, client: "FakeFirestoreClient", parent: str, doc_id: str):
+        self._client = client
+        self.parent_path = parent
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self.parent_path}/{self.id}"
+
+    def collection(self, name: str) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, f"{self.path}/{name}")
+
+    async def get(self, transaction: Optional["FakeTransaction"] = None) -> FakeSnapshot:
+        await self._client.rpc("get")
+        if transaction is not None:
+            await transaction._lock(self)
+        return self._client.read(self)
+
+    async def set(self, data: Dict[str, Any], merge: bool = False) -> None:
+        await self._client.rpc("commit")
+        self._client.apply([("set", self, data, merge)])
+
+    async def create(self, data: Dict[str, Any]) -> None:
+        await self._client.rpc("commit")
+        self._client.apply([("create", self, data, False)])
+
+    async def update(self, data: Dict[str, Any]) -> None:
+        await self._client.rpc("commit")
+        self._client.apply([("update", self, data, True)])
+
+    async def delete(self) -> None:
+        await self._client.rpc("commit")
+        self._client.apply([("delete", self, None, False)])
+
+
+class FakeQuery:
+    def __init__(
+        self,
+        client: "FakeFirestoreClient",
+        path: str,
+        filters: Tuple[Tuple[str, str, Any], ...] = (),
+        orders: Tuple[Tuple[str, str], ...] = (),
+        limit_to: Optional[int] = None,
+    ):
+        self._client = client
+        self._path = path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit_to
+
+    def where(self, field_path: str, op_string: str, value: Any) -> "FakeQuery":
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported operator {op_string}")
+        return FakeQuery(self._client, self._path, self._filters + ((field_path, op_string, value),), self._orders, self._limit)
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "FakeQuery":
+        return FakeQuery(self._client, self._path, self._filters, self._orders + ((field_path, direction),), self._limit)
+
+    def limit(self, count: int) -> "FakeQuery":
+        return FakeQuery(self._client, self._path, self._filters, self._orders, count)
+
+    def _matches(self, data: Dict[str, Any]) -> bool:
+        for field_path, op_string, value in self._filters:
+            found, current = _field(data, field_path)
+            if not found:
+                return False
+            try:
+                if not _OPERATORS[op_string](current, _comparable(value)):
+                    return False
+            except TypeError:
+                return False
+        # Like Firestore, ordering on a field excludes documents without it.
+        return all(_field(data, field_path)[0] for field_path, _ in self._orders)
+
+    async def stream(self, transaction: Optional["FakeTransaction"] = None) -> AsyncIterator[FakeSnapshot]:
+        await self._client.rpc("query")
+        docs = self._client.documents(self._path)
+        matched = [(doc_id, data) for doc_id, data in docs.items() if self._matches(data)]
+        for field_path, direction in reversed(self._orders):
+            matched.sort(key=lambda item: _field(item[1], field_path)[1], reverse=direction == "DESCENDING")
+        if not self._orders:
+            matched.sort(key=lambda item: item[0])
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        # Firestore bills a query that returns nothing as one read.
+        self._client.count("reads", max(len(matched), 1))
+        for doc_id, data in matched:
+            reference = FakeDocumentReference(self._client, self._path, doc_id)
+            if transaction is not None:
+                await transaction._lock(reference)
+                data = self._client.documents(self._path).get(doc_id)
+                if data is None:
+                    continue
+            yield FakeSnapshot(reference, copy.deepcopy(data))
+
+    async def get(self, transaction: Optional["FakeTransaction"] = None) -> List[FakeSnapshot]:
+        return [snapshot async for snapshot in self.stream(transaction=transaction)]
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client: "FakeFirestoreClient", path: str):
+        super().__init__(client, path)
+
+    @property
+    def id(self) -> str:
+        return self._path.rsplit("/", 1)[-1]
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, self._path, document_id or uuid.uuid4().hex[:20])
+
+
+class FakeWriteBatch:
+    def __init__(self, client: "FakeFirestoreClient"):
+        self._client = client
+        self._writes: List[Tuple[str, FakeDocumentReference, Optional[Dict[str, Any]], bool]] = []
+
+    def set(self, reference: FakeDocumentReference, document_data: Dict[str, Any], merge: bool = False) -> None:
+        self._writes.append(("set", reference, document_data, merge))
+
+    def create(self, reference: FakeDocumentReference, document_data: Dict[str, Any]) -> None:
+        self._writes.append(("create", reference, document_data, False))
+
+    def update(self, reference: FakeDocumentReference, field_updates: Dict[str, Any]) -> None:
+        self._writes.append(("update", reference, field_updates, True))
+
+    def delete(self, reference: FakeDocumentReference) -> None:
+        self._writes.append(("delete", reference, None, False))
+
+    async def commit(self) -> list:
+        await self._client.rpc("commit")
+        writes, self._writes = self._writes, []
+        self._client.apply(writes)
+        return []
+
+
+class FakeTransaction(FakeWriteBatch):
+    """
+    Locking transaction compatible with ``@firestore.async_transactional``.
+
+    Documents read in the transaction are locked until it commits or rolls
+    back. Conflicts resolve wound-wait style, like Firestore's server SDKs:
+    an older transaction takes the lock and aborts the younger holder, a
+    younger one waits. An aborted attempt raises ``Aborted`` at commit, which
+    the decorator retries with the original start time.
+    """
+
+    def __init__(self, client: "FakeFirestoreClient", max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id: Optional[bytes] = None
+        self._started = 0.0
+        self._reads: Dict[str, int] = {}
+        self._wounded = False
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    @property
+    def id(self) -> Optional[bytes]:
+        return self._id
+
+    async def _lock(self, reference: FakeDocumentReference) -> None:
+        path = reference.path
+        while not self._wounded:
+            holder = self._client.lock_holder(path)
+            if holder is None or holder is self:
+                break
+            if self._started < holder._started:
+                holder._wound()
+                break
+            await self._client.wait_for_unlock(path)
+        if not self._wounded:
+            self._client.lock(path, self)
+        self._reads.setdefault(path, self._client.version(path))
+
+    def _wound(self) -> None:
+        self._wounded = True
+        self._client.unlock_all(self)
+
+    def _clean_up(self) -> None:
+        self._client.unlock_all(self)
+        self._writes = []
+        self._reads = {}
+        self._wounded = False
+        self._id = None
+
+    async def _begin(self, retry_id: Optional[bytes] = None) -> None:
+        await self._client.rpc("begin")
+        if retry_id is None:
+            self._started = time.monotonic()
+        self._id = uuid.uuid4().bytes
+
+    async def _rollback(self) -> None:
+        self._clean_up()
+
+    async def _commit(self) -> list:
+        await self._client.rpc("commit")
+        stale = any(self._client.version(path) != seen for path, seen in self._reads.items())
+        if self._wounded or stale:
+            self._clean_up()
+            self._client.count("aborted")
+            raise exceptions.Aborted("transaction aborted by a conflicting transaction")
+        writes = self._writes
+        try:
+            self._client.apply(writes)
+        finally:
+            self._clean_up()
+        return []
+
+    async def get(self, ref_or_query) -> Any:
+        if isinstance(ref_or_query, FakeDocumentReference):
+            return await ref_or_query.get(transaction=self)
+        return ref_or_query.stream(transaction=self)
+
+
+class FakeFirestoreClient:
+    """In-memory ``firestore.AsyncClient`` with per-operation counters."""
+
+    def __init__(self, faults: Optional[FaultProfile] = None):
+        self.faults = faults or FaultProfile()
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._versions: Dict[str, int] = {}
+        self._clock = 0
+        self._locks: Dict[str, FakeTransaction] = {}
+        self._unlocked: Dict[str, asyncio.Event] = {}
+        self.counters: Counter = Counter()
+
+    # -- public AsyncClient surface -------------------------------------------------
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def document(self, path: str) -> FakeDocumentReference:
+        parent, doc_id = path.rsplit("/", 1)
+        return FakeDocumentReference(self, parent, doc_id)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> FakeTransaction:
+        return FakeTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    async def get_all(
+        self, references: List[FakeDocumentReference], transaction: Optional[FakeTransaction] = None
+    ) -> AsyncIterator[FakeSnapshot]:
+        await self.rpc("get_all")
+        self.count("reads", len(references))
+        for reference in references:
+            if transaction is not None:
+                await transaction._lock(reference)
+            yield FakeSnapshot(reference, copy.deepcopy(self._doc(reference)))
+
+    # -- bookkeeping ----------------------------------------------------------------
+
+    async def rpc(self, operation: str) -> None:
+        self.count(f"rpc_{operation}")
+        await self.faults.apply(f"firestore.{operation}")
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters)
+
+    def reset_stats(self) -> None:
+        self.counters.clear()
+
+    def documents(self, collection_path: str) -> Dict[str, Dict[str, Any]]:
+        return self._collections.get(collection_path, {})
+
+    def lock_holder(self, path: str) -> Optional[FakeTransaction]:
+        return self._locks.get(path)
+
+    def lock(self, path: str, transaction: FakeTransaction) -> None:
+        self._locks[path] = transaction
+
+    async def wait_for_unlock(self, path: str) -> None:
+        self.count("lock_waits")
+        await self._unlocked.setdefault(path, asyncio.Event()).wait()
+
+    def unlock_all(self, transaction: FakeTransaction) -> None:
+        for path in [path for path, holder in self._locks.items() if holder is transaction]:
+            del self._locks[path]
+            event = self._unlocked.pop(path, None)
+            if event is not None:
+                event.set()
+
+    def version(self, path: str) -> int:
+        return self._versions.get(path, 0)
+
+    def _doc(self, reference: FakeDocumentReference) -> Optional[Dict[str, Any]]:
+        return self._collections.get(reference.parent_path, {}).get(reference.id)
+
+    def read(self, reference: FakeDocumentReference) -> FakeSnapshot:
+        self.count("reads")
+        return FakeSnapshot(reference, copy.deepcopy(self._doc(reference)))
+
+    def apply(self, writes: List[Tuple[str, FakeDocumentReference, Optional[Dict[str, Any]], bool]]) -> None:
+        """Apply a commit's writes atomically (there is no await in here)."""
+        for kind, reference, _, _ in writes:
+            if kind == "update" and self._doc(reference) is None:
+                raise exceptions.NotFound(f"No document to update: {reference.path}")
+            if kind == "create" and self._doc(reference) is not None:
+                raise exceptions.AlreadyExists(f"Document already exists: {reference.path}")
+        for kind, reference, data, merge in writes:
+            collection = self._collections.setdefault(reference.parent_path, {})
+            if kind == "delete":
+                collection.pop(reference.id, None)
+            else:
+                base = collection.get(reference.id, {}) if merge else {}
+                collection[reference.id] = _apply_fields(base, data or {}, merge)
+            self._clock += 1
+            self._versions[reference.path] = self._clock
+            self.count("writes")
+
+
+class FakeBlob:
+    def __init__(self, bucket: "FakeBucket", name: str, chunk_size: Optional[int] = None):
+        self.bucket = bucket
+        self.name = name
+        self.chunk_size = chunk_size
+        self.content_type: Optional[str] = None
+
+    @property
+    def size(self) -> Optional[int]:
+        data = self.bucket.objects.get(self.name)
+        return len(data) if data is not None else None
+
+    def upload_from_filename(self, filename: str, content_type: Optional[str] = None) -> None:
+        self.bucket.client.operation("upload")
+        with open(filename, "rb") as handle:
+            data = handle.read()
+        self.bucket.objects[self.name] = data
+        self.content_type = content_type
+        self.bucket.client.counters["bytes_uploaded"] += len(data)
+
+    def upload_from_string(self, data: Any, content_type: Optional[str] = None) -> None:
+        self.bucket.client.operation("upload")
+        payload = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        self.bucket.objects[self.name] = payload
+        self.content_type = content_type
+        self.bucket.client.counters["bytes_uploaded"] += len(payload)
+
+    def download_as_bytes(self) -> bytes:
+        self.bucket.client.operation("download")
+        if self.name not in self.bucket.objects:
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        return self.bucket.objects[self.name]
+
+    def exists(self) -> bool:
+        self.bucket.client.operation("get")
+        return self.name in self.bucket.objects
+
+
+class FakeBucket:
+    def __init__(self, client: "FakeStorageClient", name: str):
+        self.client = client
+        self.name = name
+        self.objects: Dict[str, bytes] = client.buckets.setdefault(name, {})
+
+    def exists(self) -> bool:
+        self.client.operation("get_bucket")
+        return True
+
+    def blob(self, blob_name: str, chunk_size: Optional[int] = None) -> FakeBlob:
+        return FakeBlob(self, blob_name, chunk_size=chunk_size)
+
+    def list_blobs(self, max_results: Optional[int] = None) -> List[FakeBlob]:
+        self.client.operation("list")
+        names = sorted(self.objects)[:max_results]
+        return [FakeBlob(self, name) for name in names]
+
+
+class FakeStorageClient:
+    """In-memory ``storage.Client``; methods are synchronous like the real one."""
+
+    def __init__(self, faults: Optional[FaultProfile] = None):
+        self.faults = faults or FaultProfile()
+        self.buckets: Dict[str, Dict[str, bytes]] = {}
+        self.counters: Counter = Counter()
+
+    def operation(self, name: str) -> None:
+        self.counters[name] += 1
+        self.faults.apply_sync(f"storage.{name}")
+
+    def bucket(self, bucket_name: str) -> FakeBucket:
+        return FakeBucket(self, bucket_name)
+
+    def get_bucket(self, bucket_name: str) -> FakeBucket:
+        self.operation("get_bucket")
+        return FakeBucket(self, bucket_name)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters)
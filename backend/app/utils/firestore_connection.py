@@ -1 +1,346 @@
+"""
+Shared async Firestore data-access layer.
 
+A single ``AsyncClient`` is created per process and wrapped in a
+``FirestoreRepository`` exposing typed accessors for the ``users``, ``queue``,
+``in_session``, ``counters``, ``resumes`` and ``leases`` collections. Routers receive the
+repository through ``Depends(get_repository)`` so Firestore round-trips never
+block the event loop.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, TypedDict
+
+import firebase_admin
+from fastapi import HTTPException
+from firebase_admin import credentials, firestore_async
+from google.cloud import firestore
+
+from app.utils.logger import get_logger
+from app.utils.metrics import count_firestore
+
+logger = get_logger(__name__)
+
+
+class UserRecord(TypedDict, total=False):
+    user_id: str
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    resume_path: Optional[str]
+    resume_bucket: Optional[str]
+    resume_text: Optional[str]
+    status: str
+    turn_count: int
+    interview_history: List[Dict[str, Any]]  # legacy; migrated into the turns subcollection
+    swot_analysis: Dict[str, Any]
+    swot_status: str  # pending | running | ready | failed
+    swot_attempts: int
+    swot_error: Optional[str]
+    swot_updated_at: datetime
+    created_at: datetime
+    updated_at: datetime
+
+
+class QueueEntry(TypedDict, total=False):
+    user_id: str
+    status: str
+    ticket: int
+    created_at: datetime
+
+
+class QueueCounters(TypedDict):
+    next_ticket: int
+    head: int
+
+
+class SessionRecord(TypedDict, total=False):
+    user_id: str
+    status: str
+    slot_shard: int
+    start_time: datetime
+    expiry_time: datetime
+    created_at: datetime
+    # Pre-generated opening turn: {"bot_response": ..., "next_question": ...}
+    opening: Dict[str, str]
+
+
+class ResumeRecord(TypedDict, total=False):
+    sha256: str
+    file_name: str
+    gcs_path: str
+    bucket: str
+    resume_text: str
+    size: int
+    created_at: datetime
+
+
+class Collection:
+    """Async accessor for a top-level collection whose documents are keyed by user_id."""
+
+    name = ""
+
+    def __init__(self, client: firestore.AsyncClient):
+        self.client = client
+        self.collection = client.collection(self.name)
+
+    def ref(self, doc_id: str) -> firestore.AsyncDocumentReference:
+        return self.collection.document(doc_id)
+
+    async def get(
+        self, doc_id: str, transaction: Optional[firestore.AsyncTransaction] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return the document as a dict, or None when it does not exist."""
+        count_firestore(self.name, "get")
+        snapshot = await self.ref(doc_id).get(transaction=transaction)
+        if not snapshot.exists:
+            return None
+        return snapshot.to_dict() or {}
+
+    async def set(self, doc_id: str, data: Dict[str, Any], merge: bool = True) -> None:
+        count_firestore(self.name, "set")
+        await self.ref(doc_id).set(data, merge=merge)
+
+    async def update(self, doc_id: str, data: Dict[str, Any]) -> None:
+        """Update fields of an existing document; raises ``NotFound`` if it is gone."""
+        count_firestore(self.name, "update")
+        await self.ref(doc_id).update(data)
+
+    async def delete(self, doc_id: str) -> None:
+        count_firestore(self.name, "delete")
+        await self.ref(doc_id).delete()
+
+
+class InterviewTurn(TypedDict, total=False):
+    seq: int
+    role: str
+    message: str
+    question: str
+    timestamp: str
+
+
+class UsersCollection(Collection):
+    name = "users"
+
+    async def get(self, doc_id: str, transaction=None) -> Optional[UserRecord]:
+        return await super().get(doc_id, transaction=transaction)
+
+    def turns(self, user_id: str) -> firestore.AsyncCollectionReference:
+        """Append-only ``users/{user_id}/turns`` subcollection, one document per turn."""
+        return self.ref(user_id).collection("turns")
+
+    def turn_ref(self, user_id: str, seq: int) -> firestore.AsyncDocumentReference:
+        # Zero-padded ids keep the console listing in conversation order.
+        return self.turns(user_id).document(f"{seq:06d}")
+
+    async def list_turns(self, user_id: str, after_seq: int = 0) -> List[InterviewTurn]:
+        """Return turns with ``seq`` greater than ``after_seq`` in order."""
+        count_firestore("turns", "query")
+        query = self.turns(user_id).where("seq", ">", after_seq).order_by("seq")
+        return [doc.to_dict() async for doc in query.stream()]
+
+    async def with_swot_status(self, status: str, limit: int) -> List[firestore.DocumentSnapshot]:
+        count_firestore(self.name, "query")
+        query = self.collection.where("swot_status", "==", status).limit(limit)
+        return [doc async for doc in query.stream()]
+
+
+class QueueCollection(Collection):
+    name = "queue"
+
+    def __init__(self, client: firestore.AsyncClient, counters: "CountersCollection"):
+        super().__init__(client)
+        self.counters = counters
+
+    async def get(self, doc_id: str, transaction=None) -> Optional[QueueEntry]:
+        return await super().get(doc_id, transaction=transaction)
+
+    async def oldest(
+        self, limit: int = 1, transaction: Optional[firestore.AsyncTransaction] = None
+    ) -> List[firestore.DocumentSnapshot]:
+        """Return up to ``limit`` queue snapshots in ticket order."""
+        count_firestore(self.name, "query")
+        query = self.collection.order_by("ticket").limit(limit)
+        return [doc async for doc in query.stream(transaction=transaction)]
+
+    async def untracked(
+        self, transaction: Optional[firestore.AsyncTransaction] = None
+    ) -> List[firestore.DocumentSnapshot]:
+        """
+        Entries queued before tickets existed, oldest first.
+
+        They are invisible to the ticket ordering until ``assign_legacy_tickets``
+        numbers them; this scans the whole queue, so it is for upkeep only.
+        """
+        count_firestore(self.name, "query")
+        query = self.collection.order_by("created_at")
+        return [doc async for doc in query.stream(transaction=transaction) if (doc.to_dict() or {}).get("ticket") is None]
+
+    async def position(self, user_id: str, entry: Optional[QueueEntry] = None) -> int:
+        """
+        Return 1-based position of user in the queue (0 if not queued).
+
+        Tickets are handed out monotonically at join time and promotion always
+        pops the lowest ticket, so the position is ``ticket - head + 1`` and
+        costs at most two document reads regardless of queue length.
+        """
+        if entry is None:
+            entry = await self.get(user_id)
+            if entry is None:
+                return 0
+
+        ticket = entry.get("ticket")
+        if ticket is None:
+            return await self._scan_position(user_id)
+
+        counters = await self.counters.queue_state()
+        return max(int(ticket) - counters["head"] + 1, 1)
+
+    async def _scan_position(self, user_id: str) -> int:
+        """
+        Position of a legacy entry not yet given a ticket. Legacy entries are
+        numbered ahead of every ticketed one, oldest first, so count those.
+        """
+        for idx, doc in enumerate(await self.untracked(), start=1):
+            if (doc.to_dict() or {}).get("user_id") == user_id or doc.id == user_id:
+                return idx
+        return 0
+
+
+class SessionsCollection(Collection):
+    name = "in_session"
+
+    async def get(self, doc_id: str, transaction=None) -> Optional[SessionRecord]:
+        return await super().get(doc_id, transaction=transaction)
+
+    async def expired(self, now: datetime, limit: int) -> List[firestore.DocumentSnapshot]:
+        """Return sessions whose expiry_time is before ``now``."""
+        count_firestore(self.name, "query")
+        query = self.collection.where("expiry_time", "<", now).limit(limit)
+        return [doc async for doc in query.stream()]
+
+    async def active(
+        self, limit: int, transaction: Optional[firestore.AsyncTransaction] = None
+    ) -> List[firestore.DocumentSnapshot]:
+        """Return up to ``limit`` in_session snapshots."""
+        count_firestore(self.name, "query")
+        query = self.collection.limit(limit)
+        return [doc async for doc in query.stream(transaction=transaction)]
+
+
+class CountersCollection(Collection):
+    """
+    Small bookkeeping documents.
+
+    ``counters/queue`` holds ``next_ticket`` (the ticket the next queued user
+    receives) and ``head`` (the lowest ticket still waiting).
+    ``counters/slots-{n}`` hold ``occupied`` and ``capacity`` for one shard of
+    the session slots.
+    """
+
+    name = "counters"
+    QUEUE = "queue"
+
+    @staticmethod
+    def slot_id(shard: int) -> str:
+        return f"slots-{shard}"
+
+    async def queue_state(
+        self, transaction: Optional[firestore.AsyncTransaction] = None
+    ) -> QueueCounters:
+        data = await self.get(self.QUEUE, transaction=transaction) or {}
+        return {
+            "next_ticket": int(data.get("next_ticket", 1)),
+            "head": int(data.get("head", 1)),
+        }
+
+
+class ResumesCollection(Collection):
+    """Content-addressed resume index keyed by the SHA-256 of the file bytes."""
+
+    name = "resumes"
+
+    async def get(self, doc_id: str, transaction=None) -> Optional[ResumeRecord]:
+        return await super().get(doc_id, transaction=transaction)
+
+
+class LeasesCollection(Collection):
+    """Leader-election leases: ``holder`` and ``expires_at`` per named role."""
+
+    name = "leases"
+
+
+class FirestoreRepository:
+    """Process-wide entry point for all Firestore reads and writes."""
+
+    def __init__(self, client: firestore.AsyncClient):
+        self.client = client
+        self.users = UsersCollection(client)
+        self.counters = CountersCollection(client)
+        self.queue = QueueCollection(client, self.counters)
+        self.in_session = SessionsCollection(client)
+        self.resumes = ResumesCollection(client)
+        self.leases = LeasesCollection(client)
+
+    def transaction(self) -> firestore.AsyncTransaction:
+        count_firestore("*", "transaction")
+        return self.client.transaction()
+
+    def batch(self) -> firestore.AsyncWriteBatch:
+        count_firestore("*", "batch")
+        return self.client.batch()
+
+    async def get_all(
+        self, refs: List[firestore.AsyncDocumentReference]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch many documents in one round-trip, keyed by document path."""
+        results: Dict[str, Optional[Dict[str, Any]]] = {ref.path: None for ref in refs}
+        if not refs:
+            return results
+        for ref in refs:
+            count_firestore(ref.path.split("/", 1)[0], "get_all")
+        async for snapshot in self.client.get_all(refs):
+            if snapshot.exists:
+                results[snapshot.reference.path] = snapshot.to_dict() or {}
+        return results
+
+
+def get_async_client() -> firestore.AsyncClient:
+    """Initialise Firebase Admin once and return its async Firestore client."""
+    cred_path = os.getenv("FIRESTORE_APPLICATION_CREDENTIALS") or os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    if not cred_path:
+        raise RuntimeError("FIRESTORE_APPLICATION_CREDENTIALS is not set")
+
+    if not firebase_admin._apps:
+        cred = credentials.Certificate(cred_path)
+        firebase_admin.initialize_app(cred)
+
+    return firestore_async.client()
+
+
+_repository: Optional[FirestoreRepository] = None
+
+
+def get_firestore_repository() -> FirestoreRepository:
+    """Return the process-wide repository, creating the client on first use."""
+    global _repository
+    if _repository is None:
+        _repository = FirestoreRepository(get_async_client())
+        logger.info("Async Firestore repository initialised")
+    return _repository
+
+
+def set_firestore_repository(repository: Optional[FirestoreRepository]) -> None:
+    """Replace the process-wide repository (used by tests and local tooling)."""
+    global _repository
+    _repository = repository
+
+
+def get_repository() -> FirestoreRepository:
+    """FastAPI dependency returning the shared repository."""
+    try:
+        return get_firestore_repository()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
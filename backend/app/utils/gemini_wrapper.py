@@ -1,19 +1,88 @@
 import os
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import google.generativeai as genai
+from google.api_core.exceptions import ResourceExhausted
 
+from app.utils.llm_client import ChatMessage, LLMBackend, LLMError, LLMRateLimitedError
 
-def get_gemini_response(prompt: str, model_name: str = "models/gemini-flash-latest") -> str:
+# Each interview session has its own system instruction, so handles are bounded.
+MODEL_CACHE_SIZE = int(os.getenv("GEMINI_MODEL_CACHE_SIZE", "256"))
+# Retry hint passed on when Gemini itself reports an exhausted quota.
+GEMINI_QUOTA_RETRY_SECONDS = float(os.getenv("GEMINI_QUOTA_RETRY_SECONDS", "10"))
+
+
+class GeminiBackend(LLMBackend):
     """
-    Generate a response from the Gemini model for the given prompt.
+    Gemini implementation of ``LLMBackend``.
+
+    ``genai.configure`` runs once and ``GenerativeModel`` handles are cached per
+    model name and system instruction; calls use the SDK's native async API so
+    they never block the loop.
     """
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        raise RuntimeError("GEMINI_API_KEY is not configured")
-
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel(model_name)
-    chat = model.start_chat()
-    response = chat.send_message(prompt)
-    return response.text or ""
+
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None):
+        api_key = api_key or os.environ.get("GEMINI_API_KEY")
+        if not api_key:
+            raise RuntimeError("GEMINI_API_KEY is not configured")
+
+        genai.configure(api_key=api_key)
+        self._models: "OrderedDict[Tuple[str, Optional[str]], genai.GenerativeModel]" = OrderedDict()
+
+    def _model(self, model_name: str, system_instruction: Optional[str] = None) -> genai.GenerativeModel:
+        key = (model_name, system_instruction)
+        model = self._models.get(key)
+        if model is None:
+            model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+            self._models[key] = model
+            while len(self._models) > MODEL_CACHE_SIZE:
+                self._models.popitem(last=False)
+        else:
+            self._models.move_to_end(key)
+        return model
+
+    @staticmethod
+    def _contents(prompt: str, history: Optional[List[ChatMessage]]) -> list:
+        contents = [{"role": message["role"], "parts": [message["text"]]} for message in history or []]
+        contents.append({"role": "user", "parts": [prompt]})
+        return contents
+
+    @staticmethod
+    def _generation_config(response_schema: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if response_schema is None:
+            return None
+        return {"response_mime_type": "application/json", "response_schema": response_schema}
+
+    async def generate(
+        self, prompt, model_name, system_instruction=None, history=None, response_schema=None
+    ) -> str:
+        try:
+            response = await self._model(model_name, system_instruction).generate_content_async(
+                self._contents(prompt, history), generation_config=self._generation_config(response_schema)
+            )
+            return response.text or ""
+        except ResourceExhausted as exc:
+            raise LLMRateLimitedError(f"Gemini quota exhausted: {exc}", GEMINI_QUOTA_RETRY_SECONDS) from exc
+        except Exception as exc:
+            raise LLMError(f"Gemini request failed: {exc}") from exc
+
+    async def stream(
+        self, prompt, model_name, system_instruction=None, history=None, response_schema=None
+    ) -> AsyncIterator[str]:
+        try:
+            response = await self._model(model_name, system_instruction).generate_content_async(
+                self._contents(prompt, history),
+                generation_config=self._generation_config(response_schema),
+                stream=True,
+            )
+            async for chunk in response:
+                text = chunk.text
+                if text:
+                    yield text
+        except ResourceExhausted as exc:
+            raise LLMRateLimitedError(f"Gemini quota exhausted: {exc}", GEMINI_QUOTA_RETRY_SECONDS) from exc
+        except Exception as exc:
+            raise LLMError(f"Gemini stream failed: {exc}") from exc
@@ -0,0 +1,171 @@
+"""
+Tolerant JSON parsing for model output.
+
+Structured-output requests usually return clean JSON, but a model can still
+wrap it in markdown fences, add prose around it, leave trailing commas or be
+cut off mid-object by a token limit or timeout. ``loads_lenient`` repairs
+those cases locally so a usable reply is not thrown away and paid for again.
+"""
+
+import json
+from typing import Any, List, Tuple
+
+_LITERALS = ("true", "false", "null")
+
+
+def loads_lenient(text: str) -> Tuple[Any, bool]:
+    """
+    Parse ``text`` as JSON, repairing it if needed.
+
+    Returns ``(value, repaired)``; ``repaired`` is False when the text was
+    valid JSON as-is. Raises ``ValueError`` when no JSON value can be recovered.
+    """
+    stripped = (text or "").strip()
+    try:
+        return json.loads(stripped), False
+    except ValueError:
+        pass
+    candidate = repair_json(stripped)
+    if not candidate:
+        raise ValueError("no JSON object or array found")
+    return json.loads(candidate), True
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort rewrite of ``text`` into valid JSON.
+
+    Skips everything before the first ``{``/``[`` (prose, markdown fences) and
+    after the matching close, drops trailing commas, and closes whatever a
+    truncated reply left open: the current string, a key without a value,
+    a partial literal or number, and every open object and array.
+    """
+    start = min((idx for idx in (text.find("{"), text.find("[")) if idx >= 0), default=-1)
+    if start < 0:
+        return ""
+
+    out: List[str] = []
+    # One entry per open container: [closer, expecting] where expecting is
+    # "key", "colon", "value" or "comma".
+    stack: List[List[str]] = []
+    in_string = False
+    idx = start
+    while idx < len(text):
+        char = text[idx]
+        if in_string:
+            if char == "\\":
+                size = _escape_size(text, idx)
+                if idx + size > len(text):
+                    break
+                out.append(text[idx:idx + size])
+                idx += size
+                continue
+            out.append(char)
+            if char == '"':
+                in_string = False
+                _after_value(stack)
+            idx += 1
+            continue
+
+        if char == '"':
+            in_string = True
+            out.append(char)
+        elif char in "{[":
+            stack.append(["}" if char == "{" else "]", "key" if char == "{" else "value"])
+            out.append(char)
+        elif char in "}]":
+            if not stack or stack[-1][0] != char:
+                break
+            _drop_trailing_comma(out)
+            stack.pop()
+            out.append(char)
+            _after_value(stack)
+            if not stack:
+                return "".join(out)
+        elif char == ":":
+            if stack and stack[-1][1] == "colon":
+                stack[-1][1] = "value"
+            out.append(char)
+        elif char == ",":
+            if stack:
+                stack[-1][1] = "key" if stack[-1][0] == "}" else "value"
+            out.append(char)
+        elif char.isspace():
+            out.append(char)
+        else:
+            # Bare literal or number.
+            end = idx
+            while end < len(text) and (text[end].isalnum() or text[end] in "+-."):
+                end += 1
+            if end == idx:
+                break
+            out.append(text[idx:end])
+            _after_value(stack)
+            idx = end
+            continue
+        idx += 1
+
+    if in_string:
+        out.append('"')
+        _after_value(stack)
+    _complete_bare_token(out)
+
+    while stack:
+        closer, expecting = stack.pop()
+        body = "".join(out).rstrip()
+        if body.endswith(":"):
+            body += "null"
+        elif closer == "}" and expecting == "colon":
+            body += ":null"
+        out = [body]
+        _drop_trailing_comma(out)
+        out.append(closer)
+    return "".join(out)
+
+
+def _after_value(stack: List[List[str]]) -> None:
+    if not stack:
+        return
+    frame = stack[-1]
+    if frame[0] == "}" and frame[1] == "key":
+        frame[1] = "colon"
+    else:
+        frame[1] = "comma"
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    body = "".join(out).rstrip()
+    if body.endswith(","):
+        body = body[:-1]
+    out[:] = [body]
+
+
+def _escape_size(text: str, idx: int) -> int:
+    """Length of the escape sequence at ``idx``; a surrogate pair counts as one."""
+    if text[idx + 1:idx + 2] != "u":
+        return 2
+    if text[idx + 2:idx + 4].lower() in ("d8", "d9", "da", "db"):
+        return 12
+    return 6
+
+
+def _complete_bare_token(out: List[str]) -> None:
+    """Finish or drop a literal/number cut off at the end of the text."""
+    body = "".join(out)
+    end = len(body)
+    start = end
+    while start > 0 and (body[start - 1].isalnum() or body[start - 1] in "+-."):
+        start -= 1
+    token = body[start:end]
+    if not token:
+        return
+    for literal in _LITERALS:
+        if literal.startswith(token):
+            out[:] = [body[:start] + literal]
+            return
+    trimmed = token.rstrip("+-.eE")
+    try:
+        json.loads(trimmed)
+    except ValueError:
+        trimmed = ""
+    out[:] = [body[:start] + trimmed]
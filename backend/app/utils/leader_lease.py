@@ -0,0 +1,134 @@
+"""
+Lease-based leader election over Firestore.
+
+A lease is a ``leases/{name}`` document holding the current ``holder`` and an
+``expires_at`` deadline. Each worker runs ``LeaderLease`` which tries to claim
+or renew the lease every ``ttl / 3`` seconds inside a transaction; whoever
+holds an unexpired lease is the leader. If the leader dies its lease simply
+runs out and another worker claims it within one renewal interval, so
+failover takes at most ``ttl + ttl / 3`` seconds. A graceful shutdown deletes
+the lease so failover is immediate.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from google.cloud import firestore
+
+from app.utils.firestore_connection import FirestoreRepository
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", "15"))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@firestore.async_transactional
+async def _claim(
+    txn: firestore.AsyncTransaction, repo: FirestoreRepository, name: str, holder: str, ttl: float
+) -> bool:
+    lease = await repo.leases.get(name, transaction=txn)
+    now = _now()
+    if lease and lease.get("holder") != holder and (_aware(lease.get("expires_at")) or now) > now:
+        return False
+    txn.set(
+        repo.leases.ref(name),
+        {"holder": holder, "expires_at": now + timedelta(seconds=ttl), "renewed_at": now},
+        merge=False,
+    )
+    return True
+
+
+@firestore.async_transactional
+async def _release(
+    txn: firestore.AsyncTransaction, repo: FirestoreRepository, name: str, holder: str
+) -> None:
+    lease = await repo.leases.get(name, transaction=txn)
+    if lease and lease.get("holder") == holder:
+        txn.delete(repo.leases.ref(name))
+
+
+class LeaderLease:
+    """Keeps trying to hold ``leases/{name}``; ``is_leader`` reflects the last attempt."""
+
+    def __init__(self, repo: FirestoreRepository, name: str, ttl_seconds: float = LEASE_TTL_SECONDS):
+        self.repo = repo
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.is_leader:
+            try:
+                await _release(self.repo.transaction(), self.repo, self.name, self.holder)
+            except Exception as exc:
+                logger.warning(f"Failed to release lease {self.name}: {exc}")
+        self._set_leader(False)
+
+    def _set_leader(self, value: bool) -> None:
+        if value != self.is_leader:
+            self.is_leader = value
+            logger.info(f"{self.holder} {'acquired' if value else 'lost'} lease {self.name}")
+            self.changed.set()
+
+    async def _try_claim(self) -> bool:
+        transaction = self.repo.transaction()
+        try:
+            return await _claim(transaction, self.repo, self.name, self.holder, self.ttl_seconds)
+        except BaseException:
+            # A timed-out or cancelled attempt still holds the lease document's
+            # lock; roll back so release and other workers are not blocked on it.
+            if transaction.in_progress:
+                await transaction._rollback()
+            raise
+
+    async def _claim_within(self, timeout: float) -> bool:
+        # asyncio.wait rather than wait_for: on 3.10/3.11 wait_for can swallow a
+        # cancellation that races with the claim finishing, and stop() would hang.
+        attempt = asyncio.ensure_future(self._try_claim())
+        try:
+            done, _ = await asyncio.wait({attempt}, timeout=timeout)
+        finally:
+            if not attempt.done():
+                attempt.cancel()
+                await asyncio.gather(attempt, return_exceptions=True)
+        if not done:
+            raise asyncio.TimeoutError(f"lease claim took longer than {timeout:.1f}s")
+        return attempt.result()
+
+    async def _run(self) -> None:
+        interval = self.ttl_seconds / 3
+        while True:
+            try:
+                claimed = await self._claim_within(interval)
+            except Exception as exc:
+                # Without a confirmed renewal we must assume someone else may lead.
+                logger.warning(f"Lease {self.name} renewal failed: {exc}")
+                claimed = False
+            self._set_leader(claimed)
+            await asyncio.sleep(interval)
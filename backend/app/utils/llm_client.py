@@ -0,0 +1,310 @@
+"""
+Async LLM client shared by the interview and SWOT flows.
+
+The client owns a single backend instance per process (so model handles are
+built once and reused), bounds the number of in-flight calls and applies a
+per-call timeout. Backends are pluggable; ``FakeLLMBackend`` stands in for
+Gemini in tests and offline development (``LLM_BACKEND=fake``).
+
+Calls take the new user message as ``prompt`` plus an optional
+``system_instruction`` and prior chat ``history`` (``ChatMessage`` dicts with
+``role`` "user" or "model"). Passing a JSON ``response_schema`` asks the
+backend for structured output that conforms to it.
+
+Before taking a concurrency slot every call is admitted by the host-wide
+rate limiter (``rate_limiter.py``) at its ``priority``; a call that cannot be
+admitted in time raises ``LLMRateLimitedError`` with a ``retry_after`` hint.
+Streaming routes call ``admit`` themselves before the response starts, so a
+rejection can still become an HTTP 429, and then pass ``admitted=True``.
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, TypedDict, Union
+
+from app.utils.logger import get_logger
+from app.utils.metrics import observe_llm
+from app.utils.rate_limiter import INTERACTIVE, RateLimitExceeded, get_rate_limiter
+from app.utils.timing import span
+
+logger = get_logger(__name__)
+
+DEFAULT_MODEL_NAME = os.getenv("GEMINI_MODEL", "models/gemini-flash-latest")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+# Output tokens charged to the token bucket up front, on top of the prompt estimate.
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "512"))
+CHARS_PER_TOKEN = 4
+
+
+class ChatMessage(TypedDict):
+    role: str
+    text: str
+
+
+class LLMError(RuntimeError):
+    """Raised when the model backend fails to produce a response."""
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when a model call exceeds its timeout."""
+
+
+class LLMRateLimitedError(LLMError):
+    """Raised when the rate limiter or the provider's quota turns a call away."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _prompt_chars(prompt: str, system_instruction: Optional[str], history: Optional[List[ChatMessage]]) -> int:
+    return len(prompt) + len(system_instruction or "") + sum(len(message["text"]) for message in history or [])
+
+
+class LLMBackend:
+    """Interface implemented by concrete model providers."""
+
+    name = "base"
+
+    async def generate(
+        self,
+        prompt: str,
+        model_name: str,
+        system_instruction: Optional[str] = None,
+        history: Optional[List[ChatMessage]] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        raise NotImplementedError
+
+    async def stream(
+        self,
+        prompt: str,
+        model_name: str,
+        system_instruction: Optional[str] = None,
+        history: Optional[List[ChatMessage]] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[str]:
+        """Yield the response in chunks; defaults to a single chunk."""
+        yield await self.generate(prompt, model_name, system_instruction, history, response_schema)
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Deterministic local backend.
+
+    ``reply`` is either a fixed string or a callable receiving the prompt.
+    Every prompt is recorded in ``calls`` so tests can assert on it.
+    ``latency_jitter_seconds`` and ``failure_rate`` make it usable as a
+    stand-in for Gemini under load (see ``benchmarks/load_test.py``).
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        reply: Union[str, Callable[[str], str], None] = None,
+        latency_seconds: float = 0.0,
+        chunk_size: int = 16,
+        latency_jitter_seconds: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.reply = reply if reply is not None else (
+            '{"bot_response": "Thanks for sharing that.", '
+            '"next_question": "How would you design a scalable FastAPI service on Google Cloud?"}'
+        )
+        self.latency_seconds = latency_seconds
+        self.chunk_size = max(1, chunk_size)
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.failure_rate = failure_rate
+        self.failures = 0
+        self._random = random.Random(seed)
+        self.calls: List[str] = []
+
+    async def generate(
+        self, prompt, model_name, system_instruction=None, history=None, response_schema=None
+    ) -> str:
+        self.calls.append(prompt)
+        delay = self.latency_seconds
+        if self.latency_jitter_seconds:
+            delay += self._random.uniform(-self.latency_jitter_seconds, self.latency_jitter_seconds)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.failures += 1
+            raise LLMError("injected failure from fake backend")
+        return self.reply(prompt) if callable(self.reply) else self.reply
+
+    async def stream(
+        self, prompt, model_name, system_instruction=None, history=None, response_schema=None
+    ) -> AsyncIterator[str]:
+        text = await self.generate(prompt, model_name, system_instruction, history, response_schema)
+        for start in range(0, len(text), self.chunk_size):
+            await asyncio.sleep(0)
+            yield text[start:start + self.chunk_size]
+
+
+class LLMClient:
+    """Concurrency-limited, timeout-aware front for an ``LLMBackend``."""
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout_seconds: float = LLM_TIMEOUT_SECONDS,
+        default_model: str = DEFAULT_MODEL_NAME,
+    ):
+        self.backend = backend
+        self.timeout_seconds = timeout_seconds
+        self.default_model = default_model
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def admit(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        history: Optional[List[ChatMessage]] = None,
+        priority: int = INTERACTIVE,
+    ) -> None:
+        """Take this call's rate-limit budget, or raise ``LLMRateLimitedError``."""
+        tokens = _prompt_chars(prompt, system_instruction, history) / CHARS_PER_TOKEN + LLM_EXPECTED_OUTPUT_TOKENS
+        try:
+            await get_rate_limiter().acquire(tokens, priority)
+        except RateLimitExceeded as exc:
+            logger.warning(f"LLM call rejected by rate limiter ({self.backend.name}): {exc}")
+            raise LLMRateLimitedError(str(exc), exc.retry_after) from exc
+
+    async def generate(
+        self,
+        prompt: str,
+        model_name: Optional[str] = None,
+        timeout_seconds: Optional[float] = None,
+        system_instruction: Optional[str] = None,
+        history: Optional[List[ChatMessage]] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        priority: int = INTERACTIVE,
+    ) -> str:
+        """Generate a single response for ``prompt``."""
+        timeout = timeout_seconds or self.timeout_seconds
+        await self.admit(prompt, system_instruction, history, priority)
+        async with self._semaphore:
+            started = time.perf_counter()
+            outcome, text = "error", ""
+            try:
+                with span("llm"):
+                    text = await asyncio.wait_for(
+                        self.backend.generate(
+                            prompt, model_name or self.default_model, system_instruction, history, response_schema
+                        ),
+                        timeout,
+                    )
+                outcome = "ok"
+                return text
+            except asyncio.TimeoutError as exc:
+                outcome = "timeout"
+                logger.warning(f"LLM call timed out after {timeout}s ({self.backend.name})")
+                raise LLMTimeoutError(f"LLM call timed out after {timeout}s") from exc
+            finally:
+                observe_llm(
+                    self.backend.name,
+                    "generate",
+                    outcome,
+                    time.perf_counter() - started,
+                    _prompt_chars(prompt, system_instruction, history),
+                    len(text),
+                )
+
+    async def stream(
+        self,
+        prompt: str,
+        model_name: Optional[str] = None,
+        timeout_seconds: Optional[float] = None,
+        system_instruction: Optional[str] = None,
+        history: Optional[List[ChatMessage]] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        priority: int = INTERACTIVE,
+        admitted: bool = False,
+    ) -> AsyncIterator[str]:
+        """
+        Stream response chunks for ``prompt``.
+
+        The timeout bounds the whole stream, and the concurrency slot is held
+        until the stream is exhausted or closed. ``admitted=True`` means the
+        caller already went through ``admit`` for this call.
+        """
+        timeout = timeout_seconds or self.timeout_seconds
+        if not admitted:
+            await self.admit(prompt, system_instruction, history, priority)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        async with self._semaphore:
+            started = time.perf_counter()
+            outcome, received = "error", 0
+            chunks = self.backend.stream(
+                prompt, model_name or self.default_model, system_instruction, history, response_schema
+            ).__aiter__()
+            try:
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        with span("llm"):
+                            chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        outcome = "ok"
+                        return
+                    if chunk:
+                        received += len(chunk)
+                        yield chunk
+            except asyncio.TimeoutError as exc:
+                outcome = "timeout"
+                logger.warning(f"LLM stream timed out after {timeout}s ({self.backend.name})")
+                raise LLMTimeoutError(f"LLM stream timed out after {timeout}s") from exc
+            except GeneratorExit:
+                outcome = "closed"
+                raise
+            finally:
+                closer = getattr(chunks, "aclose", None)
+                if closer is not None:
+                    await closer()
+                observe_llm(
+                    self.backend.name,
+                    "stream",
+                    outcome,
+                    time.perf_counter() - started,
+                    _prompt_chars(prompt, system_instruction, history),
+                    received,
+                )
+
+
+def _build_default_backend() -> LLMBackend:
+    backend_name = os.getenv("LLM_BACKEND", "gemini").lower()
+    if backend_name == "fake":
+        return FakeLLMBackend()
+
+    from app.utils.gemini_wrapper import GeminiBackend
+
+    return GeminiBackend()
+
+
+_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = LLMClient(_build_default_backend())
+        logger.info(f"LLM client initialised with backend '{_client.backend.name}'")
+    return _client
+
+
+def set_llm_backend(backend: LLMBackend, **client_kwargs) -> LLMClient:
+    """Replace the process-wide client with one wrapping ``backend``."""
+    global _client
+    _client = LLMClient(backend, **client_kwargs)
+    return _client
@@ -0,0 +1,161 @@
+"""
+Prometheus instrumentation.
+
+Routers and utils record through the small functions below; metric objects
+and their label children are created once, so the hot path is a dict lookup
+plus an in-memory increment.
+
+Under gunicorn every worker is its own process. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (``gunicorn.conf.py`` sets and clears it
+on start), each worker writes its samples to memory-mapped files in that
+directory and ``/metrics`` aggregates all of them, so a scrape that lands on
+any worker sees the whole deployment. Without it (a single uvicorn process)
+the default registry is used.
+"""
+
+import os
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 8192, 16384, 32768, 65536, 131072)
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from request start until the response body is sent, by route template.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "Model call latency (whole stream for streamed calls).",
+    ["backend", "kind", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_PROMPT_CHARS = Histogram(
+    "llm_prompt_chars",
+    "Characters sent per model call (system instruction, history and prompt).",
+    ["backend", "kind"],
+    buckets=SIZE_BUCKETS,
+)
+LLM_RESPONSE_CHARS = Histogram(
+    "llm_response_chars",
+    "Characters received per model call.",
+    ["backend", "kind"],
+    buckets=SIZE_BUCKETS,
+)
+LLM_STRUCTURED_OUTPUT = Counter(
+    "llm_structured_output_total",
+    "Parsed model replies by outcome: valid, repaired, fallback (legacy text parsing) or regenerated.",
+    ["kind", "outcome"],
+)
+LLM_RATE_LIMIT_WAIT = Histogram(
+    "llm_rate_limit_wait_seconds",
+    "Time model calls spent queued for the rate limiter, by priority and outcome (admitted or rejected).",
+    ["priority", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+FIRESTORE_OPERATIONS = Counter(
+    "firestore_operations_total",
+    "Firestore operations issued through the repository, by collection and kind.",
+    ["collection", "kind"],
+)
+# Set by the expiry leader only; the most recent write from a live worker wins.
+QUEUE_LENGTH = Gauge("queue_length", "Candidates waiting in the queue.", multiprocess_mode="livemostrecent")
+IN_SESSION = Gauge("in_session_count", "Candidates currently in session.", multiprocess_mode="livemostrecent")
+CLEANUP_LAG = Gauge(
+    "cleanup_loop_lag_seconds",
+    "How late the last batch of session expiries ran relative to expiry_time.",
+    multiprocess_mode="livemostrecent",
+)
+
+_http_children: Dict[Tuple[str, str, str], Histogram] = {}
+_firestore_children: Dict[Tuple[str, str], Counter] = {}
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    key = (method, route, str(status))
+    child = _http_children.get(key)
+    if child is None:
+        child = _http_children[key] = HTTP_LATENCY.labels(*key)
+    child.observe(seconds)
+
+
+def observe_llm(
+    backend: str, kind: str, outcome: str, seconds: float, prompt_chars: int, response_chars: int
+) -> None:
+    LLM_LATENCY.labels(backend, kind, outcome).observe(seconds)
+    LLM_PROMPT_CHARS.labels(backend, kind).observe(prompt_chars)
+    if outcome == "ok":
+        LLM_RESPONSE_CHARS.labels(backend, kind).observe(response_chars)
+
+
+def count_structured_output(kind: str, outcome: str) -> None:
+    LLM_STRUCTURED_OUTPUT.labels(kind, outcome).inc()
+
+
+def observe_rate_limit(priority: str, outcome: str, seconds: float) -> None:
+    LLM_RATE_LIMIT_WAIT.labels(priority, outcome).observe(seconds)
+
+
+def count_firestore(collection: str, kind: str, amount: int = 1) -> None:
+    key = (collection, kind)
+    child = _firestore_children.get(key)
+    if child is None:
+        child = _firestore_children[key] = FIRESTORE_OPERATIONS.labels(*key)
+    child.inc(amount)
+
+
+def set_queue_gauges(queue_length: int, in_session: int) -> None:
+    QUEUE_LENGTH.set(max(queue_length, 0))
+    IN_SESSION.set(max(in_session, 0))
+
+
+def set_cleanup_lag(seconds: float) -> None:
+    CLEANUP_LAG.set(max(seconds, 0.0))
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the exposition payload and its content type."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    Records ``http_request_duration_seconds`` per route template.
+
+    The template (``/status/{user_id}``) comes from the route the router
+    matched, so user ids never become label values; unmatched paths share
+    one ``unmatched`` label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            observe_request(scope["method"], route, status, time.perf_counter() - started)
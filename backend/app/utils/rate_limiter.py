@@ -0,0 +1,218 @@
+"""
+Host-wide token-bucket limiter for model calls.
+
+Gemini enforces per-minute quotas on both requests and tokens. Every gunicorn
+worker on a host draws from the same two buckets. The bucket state (three
+doubles) lives in a small file at ``LLM_RATE_LIMIT_FILE`` and is updated
+under ``flock``, so the workers share one budget without a network hop.
+Limits are per host, so divide the project quota by the number of instances.
+``0`` disables a limit.
+
+Callers wait in a per-worker priority queue until the buckets can cover them:
+interactive calls (interview turns) always go ahead of background work (SWOT)
+in the same worker. Background calls also leave ``LLM_BACKGROUND_RESERVE`` of
+each bucket untouched, which keeps headroom for interview turns arriving on
+other workers. A call that cannot be admitted within its queue deadline fails
+fast with ``RateLimitExceeded`` carrying a retry hint, instead of waiting
+until it times out. The hint covers the head waiter's remaining bucket wait
+plus one refill interval per caller queued ahead, so it does not invite an
+immediate retry.
+"""
+
+import asyncio
+import fcntl
+import heapq
+import itertools
+import os
+import struct
+import time
+from typing import List, Optional, Tuple
+
+from app.utils.metrics import observe_rate_limit
+
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "300"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+LLM_RATE_LIMIT_FILE = os.getenv("LLM_RATE_LIMIT_FILE", "/tmp/llm-rate-limit.bin")
+LLM_BACKGROUND_RESERVE = float(os.getenv("LLM_BACKGROUND_RESERVE", "0.2"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+LLM_BACKGROUND_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_BACKGROUND_QUEUE_TIMEOUT_SECONDS", "120"))
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# How often a caller that is not at the head of the local queue re-checks.
+_QUEUE_POLL_SECONDS = 0.05
+
+
+class RateLimitExceeded(Exception):
+    """The call could not be admitted before its queue deadline."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM rate limit reached; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class SharedTokenBucket:
+    """Request and token buckets stored in a file shared by every worker on the host."""
+
+    _STATE = struct.Struct("ddd")  # requests, tokens, last refill (time.monotonic)
+
+    def __init__(
+        self,
+        path: str = LLM_RATE_LIMIT_FILE,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+    ):
+        self.path = path
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests_per_minute > 0 or self.tokens_per_minute > 0
+
+    def _file(self) -> int:
+        # Opened lazily and per process, so forked workers never share a descriptor.
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+    def refill_seconds(self, tokens: float) -> float:
+        """Seconds the buckets take to refill one call of ``tokens`` tokens."""
+        intervals = [0.0]
+        if self.requests_per_minute > 0:
+            intervals.append(60.0 / self.requests_per_minute)
+        if self.tokens_per_minute > 0:
+            intervals.append(min(tokens, self.tokens_per_minute) * 60.0 / self.tokens_per_minute)
+        return max(intervals)
+
+    @staticmethod
+    def _need(capacity: float, cost: float, reserve: float) -> float:
+        return min(cost + reserve * capacity, capacity)
+
+    @staticmethod
+    def _shortfall_seconds(capacity: float, level: float, need: float) -> float:
+        if capacity <= 0 or level >= need:
+            return 0.0
+        return (need - level) / (capacity / 60.0)
+
+    def try_acquire(self, tokens: float, reserve: float = 0.0) -> float:
+        """
+        Take one request and ``tokens`` tokens if both buckets can cover them
+        while keeping ``reserve`` (a fraction of capacity) untouched.
+
+        Returns 0 when admitted, otherwise the seconds until they could be.
+        """
+        fd = self._file()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            now = time.monotonic()
+            raw = os.pread(fd, self._STATE.size, 0)
+            if len(raw) == self._STATE.size:
+                requests, budget, updated = self._STATE.unpack(raw)
+            else:
+                requests, budget, updated = self.requests_per_minute, self.tokens_per_minute, now
+            if updated > now:
+                # State left over from before a reboot: start full.
+                requests, budget, updated = self.requests_per_minute, self.tokens_per_minute, now
+
+            elapsed = now - updated
+            requests = min(self.requests_per_minute, requests + elapsed * self.requests_per_minute / 60.0)
+            budget = min(self.tokens_per_minute, budget + elapsed * self.tokens_per_minute / 60.0)
+
+            need_requests = self._need(self.requests_per_minute, 1, reserve)
+            need_tokens = self._need(self.tokens_per_minute, tokens, reserve)
+            wait = max(
+                self._shortfall_seconds(self.requests_per_minute, requests, need_requests),
+                self._shortfall_seconds(self.tokens_per_minute, budget, need_tokens),
+            )
+            if wait == 0.0:
+                requests -= 1 if self.requests_per_minute > 0 else 0
+                budget -= min(tokens, self.tokens_per_minute) if self.tokens_per_minute > 0 else 0
+            os.pwrite(fd, self._STATE.pack(requests, budget, now), 0)
+            return wait
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class LLMRateLimiter:
+    """Priority- and deadline-aware admission in front of a ``SharedTokenBucket``."""
+
+    def __init__(
+        self,
+        bucket: Optional[SharedTokenBucket] = None,
+        background_reserve: float = LLM_BACKGROUND_RESERVE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+        background_queue_timeout: float = LLM_BACKGROUND_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.bucket = bucket or SharedTokenBucket()
+        self.background_reserve = background_reserve
+        self.queue_timeouts = {INTERACTIVE: queue_timeout, BACKGROUND: background_queue_timeout}
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        # Bucket wait last reported to the head of the queue, and when.
+        self._head_wait = 0.0
+        self._head_checked = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, tokens: float, priority: int = INTERACTIVE) -> None:
+        """Wait until the call may go ahead, or raise ``RateLimitExceeded``."""
+        if not self.bucket.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.queue_timeouts.get(priority, self.queue_timeouts[INTERACTIVE])
+        reserve = self.background_reserve if priority == BACKGROUND else 0.0
+        entry = (priority, next(self._sequence))
+        heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                if self._waiters[0] == entry:
+                    wait = self.bucket.try_acquire(tokens, reserve)
+                    self._head_wait, self._head_checked = wait, loop.time()
+                    if wait == 0.0:
+                        observe_rate_limit(PRIORITY_NAMES[priority], "admitted", loop.time() - started)
+                        return
+                    retry_after = wait
+                else:
+                    wait = _QUEUE_POLL_SECONDS
+                    retry_after = self._queued_wait(entry, tokens, loop.time())
+                remaining = deadline - loop.time()
+                if wait > remaining:
+                    observe_rate_limit(PRIORITY_NAMES[priority], "rejected", loop.time() - started)
+                    raise RateLimitExceeded(retry_after=max(retry_after, _QUEUE_POLL_SECONDS))
+                await asyncio.sleep(wait)
+        finally:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+    def _queued_wait(self, entry: Tuple[int, int], tokens: float, now: float) -> float:
+        """Estimated wait for a caller behind the head: the head's wait plus one refill per caller ahead."""
+        head_wait = max(self._head_wait - (now - self._head_checked), 0.0)
+        ahead = sum(1 for waiter in self._waiters if waiter < entry)
+        return head_wait + ahead * self.bucket.refill_seconds(tokens)
+
+
+_limiter: Optional[LLMRateLimiter] = None
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Return the process-wide limiter, creating it on first use."""
+    global _limiter
+    if _limiter is None:
+        _limiter = LLMRateLimiter()
+    return _limiter
+
+
+def set_rate_limiter(limiter: LLMRateLimiter) -> LLMRateLimiter:
+    """Replace the process-wide limiter (tests, benchmarks)."""
+    global _limiter
+    _limiter = limiter
+    return _limiter
@@ -0,0 +1,23 @@
+"""
+Server-Sent Events helpers.
+"""
+
+import json
+from typing import Any
+
+# Disable proxy buffering so events reach the browser as soon as they are written.
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode a single SSE frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_comment(text: str = "keep-alive") -> str:
+    """Encode an SSE comment line, used as a cheap heartbeat."""
+    return f": {text}\n\n"
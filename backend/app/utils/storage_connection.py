@@ -1,12 +1,45 @@
 import os
+import threading
 import uuid
+from typing import Optional
+
 from google.cloud import storage
 
+# Resumable uploads send the object in chunks of this size (a multiple of 256 KiB).
+RESUMABLE_CHUNK_BYTES = int(os.getenv("GCS_RESUMABLE_CHUNK_BYTES", str(1024 * 1024)))
+
+_client: Optional[storage.Client] = None
+_client_lock = threading.Lock()
+
+
+def get_storage_client() -> storage.Client:
+    """
+    Return the process-wide GCS client, creating it on first use.
+
+    Uploads run in worker threads, so creation is guarded by a lock.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = storage.Client()
+    return _client
+
+
+def set_storage_client(client: Optional[storage.Client]) -> None:
+    """Replace the process-wide client (used by tests and local tooling)."""
+    global _client
+    _client = client
 
-def upload_resume(file_path: str) -> dict:
+
+def upload_resume(file_path: str, content_type: Optional[str] = None, name: Optional[str] = None) -> dict:
     """
     Uploads file to GCS using env configuration and returns unique info.
 
+    The file is sent as a chunked resumable upload on the shared client, so
+    memory use stays at one chunk whatever the file size. ``name`` (without
+    extension) overrides the random object name, e.g. with a content hash.
+
     ENV required:
       GCS_BUCKET_NAME
       GCS_RESUME_FOLDER (optional, default="resume")
@@ -28,16 +61,14 @@ def upload_resume(file_path: str) -> dict:
 
     ext = file_path.split(".")[-1]
 
-    unique_name = f"{uuid.uuid4()}.{ext}"
+    unique_name = f"{name or uuid.uuid4()}.{ext}"
 
     gcs_path = f"{folder}/{unique_name}"
 
-    client = storage.Client()
-
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(gcs_path)
+    bucket = get_storage_client().bucket(bucket_name)
+    blob = bucket.blob(gcs_path, chunk_size=RESUMABLE_CHUNK_BYTES)
 
-    blob.upload_from_filename(file_path)
+    blob.upload_from_filename(file_path, content_type=content_type)
 
     return {
         "file_name": unique_name,
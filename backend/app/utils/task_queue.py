@@ -1,40 +1,285 @@
 """
-Cloud Tasks helper for enqueueing users into the interview queue.
+Join dispatch for newly created users.
+
+``create_user`` hands the user to a process-wide dispatcher that delivers
+``POST /users/join {"user_id": ...}``:
+
+* ``CloudTasksDispatcher`` keeps one ``CloudTasksAsyncClient`` for the life of
+  the worker and micro-batches bursts of sign-ups: enqueues collected within
+  ``TASKS_BATCH_WINDOW_MS`` (up to ``TASKS_BATCH_SIZE``) are flushed together
+  as concurrent ``create_task`` calls over the shared channel.
+* ``LocalJoinDispatcher`` is used when Cloud Tasks is not configured (and as
+  the fallback when a task cannot be created). It posts the same request
+  either to ``LOCAL_JOIN_URL`` or straight into the app through an in-process
+  ASGI transport, retrying 5xx and transport errors with exponential backoff,
+  from a bounded backlog.
 """
 
+import asyncio
 import json
 import os
+from typing import List, Optional
 
+import httpx
 from google.cloud import tasks_v2
 from google.cloud.tasks_v2.types import HttpMethod
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+TASKS_BATCH_SIZE = int(os.getenv("TASKS_BATCH_SIZE", "50"))
+TASKS_BATCH_WINDOW_MS = float(os.getenv("TASKS_BATCH_WINDOW_MS", "20"))
+JOIN_BACKLOG_LIMIT = int(os.getenv("JOIN_BACKLOG_LIMIT", "1000"))
+JOIN_DISPATCH_WORKERS = int(os.getenv("JOIN_DISPATCH_WORKERS", "4"))
+JOIN_MAX_ATTEMPTS = int(os.getenv("JOIN_MAX_ATTEMPTS", "5"))
+JOIN_RETRY_BASE_SECONDS = float(os.getenv("JOIN_RETRY_BASE_SECONDS", "0.5"))
+JOIN_RETRY_MAX_SECONDS = float(os.getenv("JOIN_RETRY_MAX_SECONDS", "10"))
+JOIN_PATH = "/users/join"
+
+
+class JoinBacklogFull(Exception):
+    """Raised when the in-process dispatcher cannot accept more users."""
+
+
+def _join_payload(user_id: str) -> bytes:
+    return json.dumps({"user_id": user_id}).encode("utf-8")
+
+
+class JoinDispatcher:
+    """Delivers ``POST /users/join`` for each enqueued user."""
+
+    async def enqueue(self, user_id: str) -> None:
+        raise NotImplementedError
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class LocalJoinDispatcher(JoinDispatcher):
+    """In-process dispatcher with retry/backoff and a bounded backlog."""
+
+    def __init__(
+        self,
+        app=None,
+        join_url: Optional[str] = None,
+        max_backlog: int = JOIN_BACKLOG_LIMIT,
+        workers: int = JOIN_DISPATCH_WORKERS,
+        max_attempts: int = JOIN_MAX_ATTEMPTS,
+    ):
+        self.app = app
+        self.join_url = join_url
+        self.max_backlog = max_backlog
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.delivered = 0
+        self.failed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def backlog(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            if self.join_url:
+                self._http = httpx.AsyncClient(timeout=30)
+            elif self.app is not None:
+                transport = httpx.ASGITransport(app=self.app)
+                self._http = httpx.AsyncClient(transport=transport, base_url="http://join-dispatcher", timeout=30)
+            else:
+                raise RuntimeError("LocalJoinDispatcher needs an app or LOCAL_JOIN_URL")
+        return self._http
+
+    def start(self) -> None:
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        loop = asyncio.get_running_loop()
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_backlog)
+        self._tasks = [loop.create_task(self._worker(idx)) for idx in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def enqueue(self, user_id: str) -> None:
+        self.start()
+        try:
+            self._queue.put_nowait(user_id)
+        except asyncio.QueueFull as exc:
+            raise JoinBacklogFull(f"join backlog is full ({self.max_backlog})") from exc
+
+    async def _worker(self, idx: int) -> None:
+        while True:
+            user_id = await self._queue.get()
+            try:
+                await self._deliver(user_id)
+            except Exception as exc:
+                logger.error(f"Join dispatcher {idx} crashed on user {user_id}: {exc}")
+            finally:
+                self._queue.task_done()
 
-def enqueue_user_for_join(user_id: str) -> None:
+    async def _deliver(self, user_id: str) -> None:
+        url = self.join_url or JOIN_PATH
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await self._client().post(
+                    url, content=_join_payload(user_id), headers={"Content-Type": "application/json"}
+                )
+                if response.status_code < 500:
+                    if response.is_success:
+                        self.delivered += 1
+                    else:
+                        # 4xx will not get better on retry (e.g. the user was deleted).
+                        self.failed += 1
+                        logger.warning(f"Join for user {user_id} rejected: {response.status_code} {response.text}")
+                    return
+                reason = f"HTTP {response.status_code}"
+            except httpx.HTTPError as exc:
+                reason = str(exc) or type(exc).__name__
+            if attempt < self.max_attempts:
+                delay = min(JOIN_RETRY_BASE_SECONDS * 2 ** (attempt - 1), JOIN_RETRY_MAX_SECONDS)
+                logger.warning(f"Join attempt {attempt} for user {user_id} failed ({reason}); retrying in {delay}s")
+                await asyncio.sleep(delay)
+        self.failed += 1
+        logger.error(f"Giving up on join for user {user_id} after {self.max_attempts} attempts: {reason}")
+
+
+class CloudTasksDispatcher(JoinDispatcher):
+    """Long-lived async Cloud Tasks client that flushes enqueues in micro-batches."""
+
+    def __init__(
+        self,
+        project: str,
+        location: str,
+        queue: str,
+        join_url: str,
+        fallback: Optional[JoinDispatcher] = None,
+        batch_size: int = TASKS_BATCH_SIZE,
+        batch_window_ms: float = TASKS_BATCH_WINDOW_MS,
+    ):
+        self.queue_path = tasks_v2.CloudTasksClient.queue_path(project, location, queue)
+        self.join_url = join_url
+        self.fallback = fallback
+        self.batch_size = batch_size
+        self.batch_window = batch_window_ms / 1000
+        self._client: Optional[tasks_v2.CloudTasksAsyncClient] = None
+        self._pending: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._flusher is not None and not self._flusher.done():
+            return
+        if self._client is None:
+            self._client = tasks_v2.CloudTasksAsyncClient()
+        if self._pending is None:
+            self._pending = asyncio.Queue()
+        self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+        if self.fallback is not None:
+            self.fallback.start()
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        if self.fallback is not None:
+            await self.fallback.stop()
+
+    async def enqueue(self, user_id: str) -> None:
+        self.start()
+        self._pending.put_nowait(user_id)
+
+    def _task(self, user_id: str) -> dict:
+        return {
+            "http_request": {
+                "http_method": HttpMethod.POST,
+                "url": self.join_url,
+                "headers": {"Content-Type": "application/json"},
+                "body": _join_payload(user_id),
+            }
+        }
+
+    async def _flush_loop(self) -> None:
+        while True:
+            batch = [await self._pending.get()]
+            deadline = asyncio.get_running_loop().time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, user_ids: List[str]) -> None:
+        results = await asyncio.gather(
+            *(self._client.create_task(parent=self.queue_path, task=self._task(user_id)) for user_id in user_ids),
+            return_exceptions=True,
+        )
+        created = 0
+        for user_id, result in zip(user_ids, results):
+            if not isinstance(result, Exception):
+                created += 1
+                continue
+            logger.error(f"Cloud Task for user {user_id} failed: {result}")
+            if self.fallback is not None:
+                try:
+                    await self.fallback.enqueue(user_id)
+                except JoinBacklogFull:
+                    logger.error(f"Fallback join backlog full; user {user_id} was not admitted")
+        logger.info(f"Enqueued {created}/{len(user_ids)} Cloud Tasks in one flush")
+
+
+_dispatcher: Optional[JoinDispatcher] = None
+
+
+def _build_default_dispatcher(app=None) -> JoinDispatcher:
+    local = LocalJoinDispatcher(app=app, join_url=os.getenv("LOCAL_JOIN_URL"))
     project = os.getenv("TASKS_PROJECT")
     location = os.getenv("TASKS_LOCATION")
     queue = os.getenv("TASKS_QUEUE", "interview-queue")
     join_url = os.getenv("TASKS_JOIN_URL")
 
     if not (project and location and join_url):
-        logger.warning("Cloud Tasks configuration missing; skipping enqueue.")
-        return
+        logger.info("Cloud Tasks configuration missing; dispatching joins in-process.")
+        return local
+    return CloudTasksDispatcher(project, location, queue, join_url, fallback=local)
 
-    client = tasks_v2.CloudTasksClient()
-    parent = client.queue_path(project, location, queue)
 
-    payload = json.dumps({"user_id": user_id}).encode("utf-8")
+def init_join_dispatcher(app=None) -> JoinDispatcher:
+    """Create (once) and start the process-wide dispatcher; ``app`` backs the in-process transport."""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = _build_default_dispatcher(app)
+    _dispatcher.start()
+    return _dispatcher
+
+
+def get_join_dispatcher() -> JoinDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = _build_default_dispatcher()
+    return _dispatcher
+
+
+def set_join_dispatcher(dispatcher: Optional[JoinDispatcher]) -> None:
+    """Replace the process-wide dispatcher (used by tests and local tooling)."""
+    global _dispatcher
+    _dispatcher = dispatcher
 
-    task = {
-        "http_request": {
-            "http_method": HttpMethod.POST,
-            "url": join_url,
-            "headers": {"Content-Type": "application/json"},
-            "body": payload,
-        }
-    }
 
-    created = client.create_task(parent=parent, task=task)
-    logger.info(f"Enqueued Cloud Task {created.name} for user {user_id}")
+async def enqueue_user_for_join(user_id: str) -> None:
+    await get_join_dispatcher().enqueue(user_id)
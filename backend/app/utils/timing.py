@@ -0,0 +1,114 @@
+"""
+Sampled per-request phase timing.
+
+``TimingMiddleware`` picks a fraction of requests (``TIMING_SAMPLE_RATE``, or
+any request sent with ``X-Request-Timing: 1``) and attaches a ``RequestTimer``
+to the request context. Code on the hot path wraps its phases in
+``with span("user_read"):``; on unsampled requests that is a single context
+variable lookup. A sampled request gets a ``Server-Timing`` header
+(``user_read;dur=4.1, llm;dur=812.0, total;dur=830.2``) and one structured
+``request_timing`` log record with the full breakdown. Streaming responses
+send their headers before the stream runs, so their header only covers the
+phases before the first byte; the log record covers everything.
+"""
+
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TIMING_SAMPLE_RATE = float(os.getenv("TIMING_SAMPLE_RATE", "0.05"))
+FORCE_HEADER = b"x-request-timing"
+
+
+class RequestTimer:
+    """Accumulated duration and call count per phase name."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimer]] = ContextVar("request_timer", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the enclosed block as phase ``name`` if this request is sampled."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+class TimingMiddleware:
+    def __init__(self, app: ASGIApp, sample_rate: float = TIMING_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    def _sampled(self, scope: Scope) -> bool:
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        return any(key == FORCE_HEADER and value == b"1" for key, value in scope.get("headers") or [])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._sampled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer()
+        token = _current.set(timer)
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers: List = list(message.get("headers") or [])
+                headers.append((b"server-timing", timer.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            record = {
+                "event": "request_timing",
+                "method": scope["method"],
+                "route": getattr(scope.get("route"), "path", None) or scope["path"],
+                "status": status,
+                "total_ms": round(timer.elapsed() * 1000, 1),
+                "phases": {
+                    name: {"ms": round(seconds * 1000, 1), "count": timer.counts[name]}
+                    for name, seconds in timer.durations.items()
+                },
+            }
+            logger.info(json.dumps(record))
@@ -0,0 +1,129 @@
+"""
+Join admission concurrency benchmark.
+
+Seeds N idle users, fires N simultaneous ``POST /users/join`` calls and
+reports throughput, latency percentiles and the resulting placement. Run it
+against the Firestore emulator (``FIRESTORE_EMULATOR_HOST``) or a scratch
+project; requests go through the app in-process unless ``--base-url`` points
+at a running server.
+
+    cd backend
+    python -m benchmarks.join_concurrency --users 300
+
+The run checks the admission invariants: at most ``SESSION_LIMIT`` users in
+session and no two queued users sharing a ticket.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import httpx
+
+from app.api.user_details.slots import SLOT_SHARDS, reconcile_slots
+from app.api.user_details.user_api import SESSION_LIMIT
+from app.utils.firestore_connection import FirestoreRepository, get_firestore_repository
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+async def _seed_users(repo: FirestoreRepository, count: int, prefix: str) -> List[str]:
+    user_ids = [f"{prefix}-{idx:05d}" for idx in range(count)]
+    now = datetime.utcnow()
+    for start in range(0, count, 400):
+        batch = repo.batch()
+        for user_id in user_ids[start:start + 400]:
+            batch.set(repo.users.ref(user_id), {"user_id": user_id, "status": "idle", "created_at": now})
+        await batch.commit()
+    return user_ids
+
+
+async def _join(client: httpx.AsyncClient, user_id: str) -> Tuple[int, float, Optional[str]]:
+    started = time.perf_counter()
+    response = await client.post("/users/join", json={"user_id": user_id})
+    elapsed = time.perf_counter() - started
+    status = response.json().get("status") if response.is_success else None
+    return response.status_code, elapsed, status
+
+
+async def _cleanup(repo: FirestoreRepository, user_ids: List[str]) -> None:
+    for start in range(0, len(user_ids), 100):
+        batch = repo.batch()
+        for user_id in user_ids[start:start + 100]:
+            batch.delete(repo.users.ref(user_id))
+            batch.delete(repo.queue.ref(user_id))
+            batch.delete(repo.in_session.ref(user_id))
+        await batch.commit()
+    await reconcile_slots(repo, SESSION_LIMIT)
+
+
+async def run(users: int, base_url: Optional[str], keep: bool) -> None:
+    repo = get_firestore_repository()
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    user_ids = await _seed_users(repo, users, prefix)
+
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=120)
+    else:
+        from app.main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(_join(client, user_id) for user_id in user_ids))
+        wall = time.perf_counter() - started
+    finally:
+        await client.aclose()
+
+    latencies = [elapsed for _, elapsed, _ in results]
+    codes = Counter(code for code, _, _ in results)
+    placements = Counter(status for _, _, status in results if status)
+
+    refs = [repo.queue.ref(user_id) for user_id in user_ids] + [repo.in_session.ref(user_id) for user_id in user_ids]
+    docs = await repo.get_all(refs)
+    tickets = [doc["ticket"] for path, doc in docs.items() if doc and path.startswith("queue/") and "ticket" in doc]
+    in_session = sum(1 for path, doc in docs.items() if doc and path.startswith("in_session/"))
+
+    print(f"joins:          {users} simultaneous ({SLOT_SHARDS} slot shard(s), limit {SESSION_LIMIT})")
+    print(f"wall time:      {wall:.2f}s  ->  {users / wall:.1f} joins/s")
+    print(
+        f"latency:        p50 {_percentile(latencies, 50) * 1000:.0f}ms  "
+        f"p95 {_percentile(latencies, 95) * 1000:.0f}ms  "
+        f"p99 {_percentile(latencies, 99) * 1000:.0f}ms  "
+        f"mean {statistics.mean(latencies) * 1000:.0f}ms"
+    )
+    print(f"http codes:     {dict(codes)}")
+    print(f"placements:     {dict(placements)}")
+    print(f"in_session:     {in_session} (limit {SESSION_LIMIT}, includes pre-existing sessions only if seeded here)")
+    print(f"unique tickets: {len(set(tickets))}/{len(tickets)}")
+
+    if in_session > SESSION_LIMIT or len(set(tickets)) != len(tickets):
+        print("INVARIANT VIOLATED")
+
+    if not keep:
+        await _cleanup(repo, user_ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=300, help="simultaneous joins to fire")
+    parser.add_argument("--base-url", help="hit a running server instead of the in-process app")
+    parser.add_argument("--keep", action="store_true", help="leave seeded documents in place")
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.base_url, args.keep))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+End-to-end load benchmark on in-memory Firestore, GCS and Gemini stand-ins.
+
+Simulates candidates walking the whole flow against the app in-process:
+
+    create (with resume) -> join (via the join dispatcher) -> poll /status
+    -> /interview/start -> N x /interview/respond -> exit or expiry -> poll /swot
+
+No GCP access is needed: Firestore and GCS are replaced with the fakes in
+``app/utils/fakes.py`` and Gemini with ``FakeLLMBackend``, each with its own
+injected latency, jitter and failure rate. The report lists per-endpoint
+p50/p95/p99 latency and error counts, throughput, and Firestore reads/writes
+(plus transaction aborts) per candidate, so data-access regressions show up
+before production.
+
+    cd backend
+    python -m benchmarks.load_test --candidates 2000 --concurrency 200 --turns 5
+
+Expiry is simulated by moving a session's ``expiry_time`` into the past and
+running the scheduler's expiry callback, which is what the lease holder does
+at that moment.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+# Benchmark defaults; anything already set in the environment wins.
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("GCS_BUCKET_NAME", "load-test")
+os.environ.setdefault("SESSION_LIMIT", "50")
+
+from app.utils.fakes import FakeFirestoreClient, FakeStorageClient, FaultProfile  # noqa: E402
+from app.utils.firestore_connection import FirestoreRepository, set_firestore_repository  # noqa: E402
+from app.utils.llm_client import FakeLLMBackend, set_llm_backend  # noqa: E402
+from app.utils.rate_limiter import LLMRateLimiter, SharedTokenBucket, set_rate_limiter  # noqa: E402
+from app.utils.storage_connection import set_storage_client  # noqa: E402
+
+SWOT_REPLY = json.dumps(
+    {
+        "strengths": ["Clear communication"],
+        "weaknesses": ["Limited production experience"],
+        "opportunities": ["Cloud certifications"],
+        "threats": ["Competitive market"],
+    }
+)
+INTERVIEW_REPLY = json.dumps(
+    {
+        "bot_response": "Thanks, that is a helpful answer.",
+        "next_question": "How would you scale a FastAPI service behind Cloud Run?",
+    }
+)
+
+
+def _fake_reply(prompt: str) -> str:
+    return SWOT_REPLY if "SWOT analysis" in prompt else INTERVIEW_REPLY
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+class Recorder:
+    """Per-endpoint latencies and status codes."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.codes: Dict[str, Counter] = defaultdict(Counter)
+
+    async def call(self, endpoint: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+            code = response.status_code
+        except Exception as exc:
+            response, code = None, type(exc).__name__
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        self.codes[endpoint][code] += 1
+        return response
+
+    def record(self, endpoint: str, elapsed: float, code) -> None:
+        self.latencies[endpoint].append(elapsed)
+        self.codes[endpoint][code] += 1
+
+    @property
+    def requests(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+
+class Candidate:
+    def __init__(self, idx: int, client: httpx.AsyncClient, recorder: Recorder, args: argparse.Namespace):
+        self.idx = idx
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.user_id: Optional[str] = None
+
+    async def _poll(self, endpoint: str, url: str, done, timeout: float) -> Optional[httpx.Response]:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            response = await self.recorder.call(endpoint, self.client.get(url))
+            if response is not None and done(response):
+                return response
+            await asyncio.sleep(self.args.poll_interval)
+        return None
+
+    async def _turn(self, endpoint: str, url: str, payload: dict) -> Optional[httpx.Response]:
+        """POST an interview turn, honouring ``Retry-After`` on 429 like the frontend should."""
+        for _ in range(self.args.rate_limit_retries + 1):
+            response = await self.recorder.call(endpoint, self.client.post(url, json=payload))
+            if response is None or response.status_code != 429:
+                break
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+        return response
+
+    async def run(self) -> str:
+        args = self.args
+        resume = f"Candidate {self.idx}\nPython, FastAPI, GCP, Firestore.\n".encode("utf-8")
+        if args.shared_resumes:
+            resume = f"Shared resume {self.idx % args.shared_resumes}\nPython, FastAPI.\n".encode("utf-8")
+        response = await self.recorder.call(
+            "create",
+            self.client.post(
+                "/users/",
+                data={
+                    "first_name": "Load",
+                    "last_name": f"Test{self.idx}",
+                    "email": f"load{self.idx}@example.com",
+                    "phone": "0000000000",
+                },
+                files={"resume": (f"resume-{self.idx}.txt", resume, "text/plain")},
+            ),
+        )
+        if response is None or not response.is_success:
+            return "create_failed"
+        self.user_id = response.json()["user_id"]
+
+        started = time.perf_counter()
+        admitted = await self._poll(
+            "status",
+            f"/status/{self.user_id}",
+            lambda r: r.is_success and r.json().get("status") == "in_session",
+            args.admission_timeout,
+        )
+        if admitted is None:
+            return "never_admitted"
+        self.recorder.record("queue_wait", time.perf_counter() - started, "ok")
+
+        response = await self._turn("start", "/interview/start", {"user_id": self.user_id})
+        if response is None or not response.is_success:
+            return "start_failed"
+        for turn in range(args.turns):
+            await asyncio.sleep(args.think_time)
+            response = await self._turn(
+                "respond",
+                "/interview/respond",
+                {"user_id": self.user_id, "user_response": f"Answer {turn} from candidate {self.idx}."},
+            )
+            if response is None or not response.is_success:
+                return "respond_failed"
+
+        if random.random() < args.expire_fraction:
+            await self._expire()
+        else:
+            response = await self.recorder.call("exit", self.client.post(f"/users/{self.user_id}/exit"))
+            if response is None or not response.is_success:
+                return "exit_failed"
+
+        swot = await self._poll(
+            "swot",
+            f"/swot/{self.user_id}",
+            lambda r: r.status_code in (200, 502),
+            args.swot_timeout,
+        )
+        if swot is None:
+            return "swot_timeout"
+        return "completed" if swot.status_code == 200 else "swot_failed"
+
+    async def _expire(self) -> None:
+        from app.api.user_details.user_api import expire_session
+        from app.utils.firestore_connection import get_firestore_repository
+
+        repo = get_firestore_repository()
+        await repo.in_session.set(self.user_id, {"expiry_time": datetime.utcnow()})
+        started = time.perf_counter()
+        try:
+            await expire_session(repo, self.user_id)
+            code = "ok"
+        except Exception as exc:
+            code = type(exc).__name__
+        self.recorder.record("expire", time.perf_counter() - started, code)
+
+
+def _install_fakes(args: argparse.Namespace) -> Dict[str, object]:
+    firestore_client = FakeFirestoreClient(
+        FaultProfile(args.firestore_latency_ms, args.firestore_jitter_ms, args.firestore_failure_rate, args.seed)
+    )
+    storage_client = FakeStorageClient(
+        FaultProfile(args.gcs_latency_ms, args.gcs_jitter_ms, args.gcs_failure_rate, args.seed)
+    )
+    llm_backend = FakeLLMBackend(
+        reply=_fake_reply,
+        latency_seconds=args.llm_latency_ms / 1000,
+        latency_jitter_seconds=args.llm_jitter_ms / 1000,
+        failure_rate=args.llm_failure_rate,
+        seed=args.seed,
+    )
+    set_firestore_repository(FirestoreRepository(firestore_client))
+    set_storage_client(storage_client)
+    set_llm_backend(llm_backend)
+    state_file = os.path.join(tempfile.mkdtemp(prefix="llm-rate-limit-"), "state.bin")
+    set_rate_limiter(LLMRateLimiter(SharedTokenBucket(state_file, args.llm_rpm, args.llm_tpm)))
+    return {"firestore": firestore_client, "storage": storage_client, "llm": llm_backend}
+
+
+def _report(
+    args: argparse.Namespace, recorder: Recorder, outcomes: Counter, wall: float, fakes: Dict[str, object]
+) -> None:
+    from app.api.user_details.user_api import SESSION_LIMIT
+
+    candidates = args.candidates
+    print(f"candidates:     {candidates} ({args.concurrency} concurrent, {args.turns} turns, limit {SESSION_LIMIT})")
+    print(f"wall time:      {wall:.2f}s")
+    print(
+        f"throughput:     {outcomes['completed'] / wall:.1f} candidates/s, "
+        f"{recorder.requests / wall:.1f} requests/s"
+    )
+    print(f"outcomes:       {dict(outcomes)}")
+    print()
+    print(f"{'endpoint':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}  codes")
+    for endpoint in ("create", "status", "queue_wait", "start", "respond", "exit", "expire", "swot"):
+        values = recorder.latencies.get(endpoint)
+        if not values:
+            continue
+        print(
+            f"{endpoint:<12}{len(values):>8}"
+            f"{_percentile(values, 50) * 1000:>10.1f}"
+            f"{_percentile(values, 95) * 1000:>10.1f}"
+            f"{_percentile(values, 99) * 1000:>10.1f}"
+            f"{statistics.mean(values) * 1000:>10.1f}  {dict(recorder.codes[endpoint])}"
+        )
+    print()
+    firestore_stats = fakes["firestore"].stats()
+    reads, writes = firestore_stats.get("reads", 0), firestore_stats.get("writes", 0)
+    print(
+        f"firestore:      {reads / candidates:.1f} reads/candidate, {writes / candidates:.1f} writes/candidate, "
+        f"{firestore_stats.get('aborted', 0)} aborted transaction attempt(s), "
+        f"{firestore_stats.get('lock_waits', 0)} lock wait(s)"
+    )
+    rpcs = {key[4:]: value for key, value in sorted(firestore_stats.items()) if key.startswith("rpc_")}
+    print(f"firestore rpcs: {rpcs}")
+    print(f"gcs:            {fakes['storage'].stats()}")
+    llm = fakes["llm"]
+    print(f"llm:            {len(llm.calls)} call(s), {llm.failures} injected failure(s)")
+
+
+async def run(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+    fakes = _install_fakes(args)
+
+    from app.main import app
+
+    recorder = Recorder()
+    outcomes: Counter = Counter()
+    limiter = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=120) as client:
+
+            async def candidate(idx: int) -> None:
+                async with limiter:
+                    try:
+                        outcome = await Candidate(idx, client, recorder, args).run()
+                    except Exception as exc:
+                        outcome = f"error:{type(exc).__name__}"
+                    outcomes[outcome] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(candidate(idx) for idx in range(args.candidates)))
+            wall = time.perf_counter() - started
+
+    _report(args, recorder, outcomes, wall, fakes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100, help="candidates in flight at once")
+    parser.add_argument("--turns", type=int, default=5, help="/interview/respond calls per candidate")
+    parser.add_argument("--think-time", type=float, default=0.05, help="seconds between answers")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="seconds between status/swot polls")
+    parser.add_argument("--expire-fraction", type=float, default=0.2, help="share of sessions that expire instead of exiting")
+    parser.add_argument("--admission-timeout", type=float, default=600)
+    parser.add_argument("--swot-timeout", type=float, default=120)
+    parser.add_argument("--shared-resumes", type=int, default=0, help="reuse N distinct resumes (0 = all unique)")
+    parser.add_argument("--firestore-latency-ms", type=float, default=8)
+    parser.add_argument("--firestore-jitter-ms", type=float, default=4)
+    parser.add_argument("--firestore-failure-rate", type=float, default=0.0)
+    parser.add_argument("--gcs-latency-ms", type=float, default=40)
+    parser.add_argument("--gcs-jitter-ms", type=float, default=20)
+    parser.add_argument("--gcs-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=300)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rpm", type=float, default=0, help="rate limiter requests/minute (0 = off)")
+    parser.add_argument("--llm-tpm", type=float, default=0, help="rate limiter tokens/minute (0 = off)")
+    parser.add_argument("--rate-limit-retries", type=int, default=5, help="retries after a 429 on start/respond")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
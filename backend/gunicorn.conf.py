@@ -0,0 +1,32 @@
+"""
+Gunicorn settings picked up automatically from the working directory.
+
+Only the Prometheus multiprocess wiring and the shared LLM rate-limit state
+live here; workers, bind address and logging stay on the command line in
+``start.sh`` and the Dockerfile.
+"""
+
+import os
+import shutil
+
+# Must be in the environment before workers import prometheus_client.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+os.environ.setdefault("LLM_RATE_LIMIT_FILE", "/tmp/llm-rate-limit.bin")
+
+
+def on_starting(server):
+    """Start every deployment with an empty metrics directory and full rate-limit buckets."""
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    try:
+        os.remove(os.environ["LLM_RATE_LIMIT_FILE"])
+    except FileNotFoundError:
+        pass
+
+
+def child_exit(server, worker):
+    """Drop live gauges of a dead worker so they stop counting."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -43,4 +43,5 @@ gunicorn \
     --access-logfile - \
     --error-logfile - \
     --log-level info \
+    --config "$SCRIPT_DIR/gunicorn.conf.py" \
     app.main:app
@@ -0,0 +1,37 @@
+"""
+Shared fixtures. Tests run against the in-memory stand-ins only:
+
+    cd backend
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GCS_BUCKET_NAME", "tests")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from app.utils.fakes import FakeFirestoreClient  # noqa: E402
+from app.utils.firestore_connection import FirestoreRepository  # noqa: E402
+from app.utils.rate_limiter import LLMRateLimiter, SharedTokenBucket, set_rate_limiter  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def unlimited_llm_rate(tmp_path):
+    """Keep tests off the host-wide rate-limit file; limits are disabled."""
+    set_rate_limiter(LLMRateLimiter(SharedTokenBucket(str(tmp_path / "llm-rate-limit.bin"), 0, 0)))
+    yield
+
+
+@pytest.fixture
+def firestore_client():
+    return FakeFirestoreClient()
+
+
+@pytest.fixture
+def repo(firestore_client):
+    return FirestoreRepository(firestore_client)
@@ -0,0 +1,64 @@
+import itertools
+
+import pytest
+
+from app.api.interview.bot_response import BotResponseStreamParser, parse_bot_response
+from app.api.interview.prompt import format_model_turn
+
+REPLIES = [
+    ("json", format_model_turn("Nice work.", "Why did you pick it?")),
+    ("json-escapes", '{"bot_response": "Say \\"hi\\"\\n\\u00e9 \\ud83d\\ude00", "next_question": "Next?"}'),
+    ("json-question-first", '{"next_question": "Q?", "bot_response": "R."}'),
+    ("json-fenced", '```json\n{"bot_response": "A", "next_question": "B"}\n```'),
+    ("json-truncated", '{"bot_response": "Cut off mid'),
+    ("json-empty-bot", '{"bot_response": "", "next_question": "Only a question"}'),
+    ("markers", "BOT_RESPONSE: Good answer.\nNEXT_QUESTION: What next?"),
+    ("markers-padded", "BOT_RESPONSE:  Hi there  \n\nNEXT_QUESTION:  Q  "),
+    ("markers-near-miss", "BOT_RESPONSE: NEXT steps are NEXT_ clear.\nNEXT_QUESTION: Go?"),
+    ("markers-bot-only", "BOT_RESPONSE: No question this time."),
+    ("question-marker-only", "Thanks.\nNEXT_QUESTION: Tell me more"),
+    ("plain-lines", "First line\nSecond line"),
+]
+
+
+def _stream(chunks):
+    parser = BotResponseStreamParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    events.extend(parser.close())
+    return events, parser.result()
+
+
+def _check(raw, chunks):
+    events, result = _stream(chunks)
+    expected = parse_bot_response(raw)
+    assert result == expected
+    bot = "".join(text for kind, text in events if kind == "bot_response")
+    questions = [text for kind, text in events if kind == "next_question"]
+    assert bot == expected[0], chunks
+    assert questions == ([expected[1]] if expected[1] else []), chunks
+    if questions:
+        # The question is only sent once the bot response is complete.
+        assert events[-1][0] == "next_question"
+
+
+def _splits(text, cuts):
+    for points in itertools.combinations(range(1, len(text)), cuts):
+        bounds = (0, *points, len(text))
+        yield [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize("raw", [reply for _, reply in REPLIES], ids=[name for name, _ in REPLIES])
+def test_stream_matches_full_parse_for_every_two_and_three_way_split(raw):
+    _check(raw, [raw])
+    for cuts in (1, 2):
+        for chunks in _splits(raw, cuts):
+            _check(raw, chunks)
+
+
+@pytest.mark.parametrize("raw", [reply for _, reply in REPLIES], ids=[name for name, _ in REPLIES])
+def test_stream_matches_full_parse_for_fixed_chunk_sizes(raw):
+    for size in range(1, len(raw) + 1):
+        _check(raw, [raw[idx:idx + size] for idx in range(0, len(raw), size)])
+
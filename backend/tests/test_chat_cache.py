@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.api.interview import api
+from app.api.interview.chat_cache import ChatSessionCache, chat_sessions
+from app.api.user_details.user_api import _session_record
+from app.utils.llm_client import FakeLLMBackend, LLMError, set_llm_backend
+
+USER_ID = "u1"
+
+
+async def _seat(repo):
+    await repo.users.set(USER_ID, {"user_id": USER_ID, "status": "in_session", "resume_text": "Python, GCP"})
+    await repo.in_session.set(USER_ID, _session_record(USER_ID, datetime.utcnow(), 0))
+
+
+async def _respond(repo, answer):
+    return await api.respond_to_interview(
+        api.InterviewAnswerRequest(user_id=USER_ID, user_response=answer), repo=repo
+    )
+
+
+def test_failed_turn_does_not_advance_the_cached_summary(repo):
+    backend = set_llm_backend(FakeLLMBackend()).backend
+    chat_sessions.discard(USER_ID)
+
+    async def run():
+        await _seat(repo)
+        await api.start_interview(api.InterviewInitRequest(user_id=USER_ID), repo=repo)
+        # Enough turns that the next prompt folds the oldest ones into the summary.
+        for idx in range(3):
+            await _respond(repo, f"answer {idx}")
+        before = await repo.users.get(USER_ID)
+
+        backend.failure_rate = 1.0
+        with pytest.raises(LLMError):
+            await _respond(repo, "answer 3")
+        backend.failure_rate = 0.0
+        after_failure = await repo.users.get(USER_ID)
+
+        await _respond(repo, "answer 3 again")
+        user_doc = await repo.users.get(USER_ID)
+        cached = await chat_sessions.load(repo, USER_ID, user_doc, None)
+        rebuilt = await ChatSessionCache().load(repo, USER_ID, user_doc, None)
+        return before, after_failure, user_doc, cached, rebuilt
+
+    before, after_failure, user_doc, cached, rebuilt = asyncio.run(run())
+    assert int(before.get("summary_upto") or 0) == 0
+    assert after_failure.get("turn_count") == before.get("turn_count")
+    # The fold computed for the failed turn is persisted by the next successful one.
+    assert user_doc["summary_upto"] > 0
+    assert user_doc["summary_upto"] == cached.summary_upto == rebuilt.summary_upto
+    assert user_doc["transcript_summary"] == cached.summary == rebuilt.summary
+    assert cached.history() == rebuilt.history()
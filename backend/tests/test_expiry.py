@@ -0,0 +1,138 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.api.user_details import expiry
+from app.api.user_details.expiry import ExpiryScheduler
+
+
+class StaticLease:
+    """Stand-in for ``LeaderLease`` whose leadership the test flips by hand."""
+
+    def __init__(self, is_leader=True):
+        self.is_leader = is_leader
+        self.changed = asyncio.Event()
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def promote(self):
+        self.is_leader = True
+        self.changed.set()
+
+
+async def _add_session(repo, user_id, expires_in):
+    expiry_time = datetime.utcnow() + timedelta(seconds=expires_in)
+    await repo.in_session.set(user_id, {"user_id": user_id, "expiry_time": expiry_time})
+    return expiry_time
+
+
+class Recorder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fired = {}
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, repo, user_id):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            self.fired[user_id] = datetime.utcnow()
+            await repo.in_session.delete(user_id)
+        finally:
+            self.active -= 1
+
+
+def test_sessions_expire_at_their_expiry_time(repo):
+    recorder = Recorder()
+
+    async def run():
+        deadlines = {
+            "early": await _add_session(repo, "early", 0.1),
+            "late": await _add_session(repo, "late", 0.3),
+        }
+        scheduler = ExpiryScheduler(repo, recorder, StaticLease())
+        scheduler.start()
+        await asyncio.sleep(0.2)
+        fired_early = dict(recorder.fired)
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        return deadlines, fired_early
+
+    deadlines, fired_early = asyncio.run(run())
+    assert list(fired_early) == ["early"]
+    for user_id, deadline in deadlines.items():
+        lag = (recorder.fired[user_id] - deadline).total_seconds()
+        assert 0 <= lag < 0.1, (user_id, lag)
+
+
+def test_rescheduling_moves_the_deadline(repo):
+    recorder = Recorder()
+
+    async def run():
+        await _add_session(repo, "u1", 0.05)
+        scheduler = ExpiryScheduler(repo, recorder, StaticLease())
+        # A session created after the resync is picked up through schedule().
+        scheduler.start()
+        await asyncio.sleep(0.01)
+        later = datetime.utcnow() + timedelta(seconds=0.2)
+        scheduler.schedule("u1", later)
+        await asyncio.sleep(0.1)
+        early = dict(recorder.fired)
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        return early, later
+
+    early, later = asyncio.run(run())
+    assert early == {}
+    assert list(recorder.fired) == ["u1"]
+    assert recorder.fired["u1"] >= later
+
+
+def test_backlog_expires_with_bounded_concurrency(repo, monkeypatch):
+    monkeypatch.setattr(expiry, "EXPIRY_CONCURRENCY", 3)
+    recorder = Recorder(delay=0.02)
+
+    async def run():
+        for idx in range(10):
+            await _add_session(repo, f"u{idx}", -60)
+        scheduler = ExpiryScheduler(repo, recorder, StaticLease())
+        scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+
+    asyncio.run(run())
+    assert len(recorder.fired) == 10
+    assert recorder.peak == 3
+
+
+def test_only_the_lease_holder_expires_sessions(repo):
+    recorder = Recorder()
+    housekeeping = []
+
+    async def run():
+        await _add_session(repo, "u1", -1)
+        lease = StaticLease(is_leader=False)
+        scheduler = ExpiryScheduler(
+            repo, recorder, lease, housekeeping=lambda repo: _record(housekeeping), housekeeping_interval=60
+        )
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        before = dict(recorder.fired), list(housekeeping)
+        lease.promote()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        return before
+
+    (fired_before, housekeeping_before) = asyncio.run(run())
+    assert fired_before == {} and housekeeping_before == []
+    assert list(recorder.fired) == ["u1"]
+    assert housekeeping == ["ran"]
+
+
+async def _record(calls):
+    calls.append("ran")
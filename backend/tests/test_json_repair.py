@@ -0,0 +1,52 @@
+import pytest
+
+from app.utils.json_repair import loads_lenient, repair_json
+
+CASES = [
+    # (id, model output, recovered value, repaired)
+    ("valid", '{"a": 1, "b": [true, null]}', {"a": 1, "b": [True, None]}, False),
+    ("fenced", '```json\n{"a": 1}\n```', {"a": 1}, True),
+    ("surrounding-prose", 'Sure! {"a": [1, 2]} Hope this helps.', {"a": [1, 2]}, True),
+    ("trailing-comma-object", '{"a": 1,}', {"a": 1}, True),
+    ("trailing-comma-array", "[1, 2, ]", [1, 2], True),
+    ("trailing-commas-nested", '{"a": [1, {"b": 2,},],}', {"a": [1, {"b": 2}]}, True),
+    ("text-after-close", '{"a": 1}} trailing', {"a": 1}, True),
+    ("cut-in-string", '{"a": "hel', {"a": "hel"}, True),
+    ("cut-in-key", '{"a": 1, "ke', {"a": 1, "ke": None}, True),
+    ("cut-after-key", '{"a"', {"a": None}, True),
+    ("cut-after-colon", '{"a": ', {"a": None}, True),
+    ("cut-after-comma", '{"a": 1,', {"a": 1}, True),
+    ("cut-in-true", '{"a": tr', {"a": True}, True),
+    ("cut-in-false", "[fal", [False], True),
+    ("cut-in-null", '{"a": n', {"a": None}, True),
+    ("cut-in-fraction", '{"a": 12.', {"a": 12}, True),
+    ("cut-in-exponent", "[1e", [1], True),
+    ("cut-at-sign", "[1, -", [1], True),
+    ("cut-in-escape", '{"a": "x\\', {"a": "x"}, True),
+    ("cut-in-unicode-escape", '{"a": "x\\u00', {"a": "x"}, True),
+    ("cut-in-surrogate-pair", '{"a": "x\\ud83d\\ude', {"a": "x"}, True),
+    ("complete-surrogate-pair", '{"a": "\\ud83d\\ude00"', {"a": "\U0001F600"}, True),
+    ("escaped-quote", '{"a": "say \\"hi', {"a": 'say "hi'}, True),
+    ("nested-arrays", "[[1, [2, 3", [[1, [2, 3]]], True),
+    ("nested-objects", '{"a": {"b": {"c": [1', {"a": {"b": {"c": [1]}}}, True),
+    ("array-before-object", 'x [{"a": 1}, {"b"', [{"a": 1}, {"b": None}], True),
+]
+
+
+@pytest.mark.parametrize("text, expected, repaired", [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_loads_lenient(text, expected, repaired):
+    assert loads_lenient(text) == (expected, repaired)
+
+
+@pytest.mark.parametrize("text", ["", "   ", "no json here", "}"])
+def test_no_json_value(text):
+    assert repair_json(text) == ""
+    with pytest.raises(ValueError):
+        loads_lenient(text)
+
+
+def test_every_prefix_of_a_reply_is_recoverable():
+    reply = '{"bot_response": "Use \\"async\\" \\u00e9\\ud83d\\ude00", "next_question": "Why, 1.5e3 or null?", "n": [true, -2.5e-1]}'
+    for end in range(reply.index("{") + 1, len(reply) + 1):
+        value, _ = loads_lenient(reply[:end])
+        assert isinstance(value, dict), reply[:end]
@@ -0,0 +1,84 @@
+import asyncio
+
+from app.utils.leader_lease import LeaderLease, _claim, _release
+
+
+def _lease(repo, ttl):
+    return LeaderLease(repo, "session-expiry", ttl_seconds=ttl)
+
+
+async def _try(repo, lease):
+    return await _claim(repo.transaction(), repo, lease.name, lease.holder, lease.ttl_seconds)
+
+
+def test_only_one_holder_claims_and_renews(repo):
+    first, second = _lease(repo, 5), _lease(repo, 5)
+
+    async def run():
+        claims = await asyncio.gather(_try(repo, first), _try(repo, second))
+        winner = first if claims[0] else second
+        loser = second if winner is first else first
+        before = (await repo.leases.get(winner.name))["expires_at"]
+        await asyncio.sleep(0.01)
+        renewed = await _try(repo, winner)
+        after = await repo.leases.get(winner.name)
+        return claims, renewed, await _try(repo, loser), before, after, winner
+
+    claims, renewed, stolen, before, after, winner = asyncio.run(run())
+    assert sorted(claims) == [False, True]
+    assert renewed and not stolen
+    assert after["holder"] == winner.holder
+    assert after["expires_at"] > before
+
+
+def test_expired_lease_is_taken_over(repo):
+    first, second = _lease(repo, 0.05), _lease(repo, 0.05)
+
+    async def run():
+        assert await _try(repo, first)
+        assert not await _try(repo, second)
+        await asyncio.sleep(0.08)
+        taken = await _try(repo, second)
+        return taken, await _try(repo, first), await repo.leases.get(first.name)
+
+    taken, reclaimed, lease = asyncio.run(run())
+    assert taken and not reclaimed
+    assert lease["holder"] == second.holder
+
+
+def test_release_only_deletes_own_lease(repo):
+    first, second = _lease(repo, 5), _lease(repo, 5)
+
+    async def run():
+        await _try(repo, first)
+        await _release(repo.transaction(), repo, second.name, second.holder)
+        kept = await repo.leases.get(first.name)
+        await _release(repo.transaction(), repo, first.name, first.holder)
+        return kept, await repo.leases.get(first.name), await _try(repo, second)
+
+    kept, released, claimed = asyncio.run(run())
+    assert kept["holder"] == first.holder
+    assert released is None
+    assert claimed
+
+
+def test_leadership_fails_over_on_stop(repo):
+    leases = [_lease(repo, 0.3) for _ in range(3)]
+
+    async def run():
+        for lease in leases:
+            lease.start()
+        await asyncio.sleep(0.05)
+        leaders = [lease for lease in leases if lease.is_leader]
+        assert len(leaders) == 1
+        await leaders[0].stop()
+        # Release is immediate, so the next renewal round (ttl / 3) picks a new leader.
+        await asyncio.sleep(0.15)
+        successors = [lease for lease in leases if lease.is_leader]
+        for lease in leases:
+            await lease.stop()
+        return leaders[0], successors
+
+    old, successors = asyncio.run(run())
+    assert not old.is_leader
+    assert len(successors) == 1 and successors[0] is not old
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app.utils.llm_client import FakeLLMBackend, LLMClient, LLMError, LLMTimeoutError
+
+
+class TrackingBackend(FakeLLMBackend):
+    """Fake backend that records how many calls overlap."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate(self, prompt, model_name, system_instruction=None, history=None, response_schema=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await super().generate(prompt, model_name, system_instruction, history, response_schema)
+        finally:
+            self.in_flight -= 1
+
+
+def test_generate_returns_reply_and_records_prompt():
+    backend = FakeLLMBackend(reply=lambda prompt: f"echo: {prompt}")
+    client = LLMClient(backend)
+
+    assert asyncio.run(client.generate("hello")) == "echo: hello"
+    assert backend.calls == ["hello"]
+
+
+def test_semaphore_bounds_concurrent_calls():
+    backend = TrackingBackend(reply="ok", latency_seconds=0.02)
+    client = LLMClient(backend, max_concurrency=2)
+
+    async def run():
+        return await asyncio.gather(*(client.generate(f"p{idx}") for idx in range(8)))
+
+    assert asyncio.run(run()) == ["ok"] * 8
+    assert backend.max_in_flight == 2
+
+
+def test_generate_times_out_per_call():
+    client = LLMClient(FakeLLMBackend(reply="late", latency_seconds=0.5), timeout_seconds=5)
+
+    with pytest.raises(LLMTimeoutError):
+        asyncio.run(client.generate("slow", timeout_seconds=0.05))
+
+
+def test_generate_falls_back_to_the_client_timeout():
+    client = LLMClient(FakeLLMBackend(reply="late", latency_seconds=0.5), timeout_seconds=0.05)
+
+    with pytest.raises(LLMTimeoutError):
+        asyncio.run(client.generate("slow"))
+
+
+def test_timeout_releases_the_concurrency_slot():
+    client = LLMClient(FakeLLMBackend(reply="late", latency_seconds=0.2), max_concurrency=1)
+
+    async def run():
+        with pytest.raises(LLMTimeoutError):
+            await client.generate("slow", timeout_seconds=0.01)
+        client.backend.latency_seconds = 0
+        return await asyncio.wait_for(client.generate("fast"), 1)
+
+    assert asyncio.run(run()) == "late"
+
+
+def test_backend_failure_surfaces_as_llm_error():
+    client = LLMClient(FakeLLMBackend(failure_rate=1.0, seed=1))
+
+    with pytest.raises(LLMError):
+        asyncio.run(client.generate("boom"))
+    assert client.backend.failures == 1
+
+
+def test_stream_yields_reply_in_chunks():
+    reply = "abcdefghijklmnopqrstuvwxyz"
+    client = LLMClient(FakeLLMBackend(reply=reply, chunk_size=5))
+
+    async def run():
+        return [chunk async for chunk in client.stream("go")]
+
+    chunks = asyncio.run(run())
+    assert chunks == ["abcde", "fghij", "klmno", "pqrst", "uvwxy", "z"]
+    assert "".join(chunks) == reply
+
+
+def test_stream_timeout_bounds_the_whole_stream():
+    client = LLMClient(FakeLLMBackend(reply="x" * 10, latency_seconds=0.3))
+
+    async def run():
+        return [chunk async for chunk in client.stream("go", timeout_seconds=0.05)]
+
+    with pytest.raises(LLMTimeoutError):
+        asyncio.run(run())
+
+
+def test_closing_a_stream_early_releases_the_slot():
+    client = LLMClient(FakeLLMBackend(reply="y" * 64, chunk_size=4), max_concurrency=1)
+
+    async def run():
+        stream = client.stream("first")
+        assert await stream.__anext__() == "yyyy"
+        await stream.aclose()
+        return await asyncio.wait_for(client.generate("second"), 1)
+
+    assert asyncio.run(run()) == "y" * 64
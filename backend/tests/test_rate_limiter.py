@@ -0,0 +1,174 @@
+import asyncio
+import multiprocessing
+import types
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.utils import rate_limiter
+from app.utils.rate_limiter import (
+    BACKGROUND,
+    INTERACTIVE,
+    LLMRateLimiter,
+    RateLimitExceeded,
+    SharedTokenBucket,
+    set_rate_limiter,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def _drain(bucket, tokens=0):
+    while bucket.try_acquire(tokens) == 0.0:
+        pass
+
+
+def test_buckets_on_one_file_share_requests(tmp_path, clock):
+    path = str(tmp_path / "bucket.bin")
+    first, second = SharedTokenBucket(path, 60, 0), SharedTokenBucket(path, 60, 0)
+
+    admitted = sum(bucket.try_acquire(0) == 0.0 for _ in range(40) for bucket in (first, second))
+    assert admitted == 60
+    assert first.try_acquire(0) == pytest.approx(1.0)
+
+    clock.now += 1.0
+    assert second.try_acquire(0) == 0.0
+    assert first.try_acquire(0) == pytest.approx(1.0)
+
+
+def test_token_bucket_refills_at_its_rate(tmp_path, clock):
+    path = str(tmp_path / "bucket.bin")
+    first, second = SharedTokenBucket(path, 0, 600), SharedTokenBucket(path, 0, 600)
+
+    assert first.try_acquire(500) == 0.0
+    # 100 tokens left, 200 needed, refilling at 10 tokens/s.
+    assert second.try_acquire(200) == pytest.approx(10.0)
+    clock.now += 10.0
+    assert second.try_acquire(200) == 0.0
+    # A call larger than the bucket waits for a full bucket, not forever.
+    clock.now += 60.0
+    assert first.try_acquire(5000) == 0.0
+
+
+def test_background_calls_leave_the_reserve(tmp_path, clock):
+    bucket = SharedTokenBucket(str(tmp_path / "bucket.bin"), 10, 0)
+    for _ in range(7):
+        assert bucket.try_acquire(0) == 0.0
+
+    # Three requests left: background needs its own plus a reserve of two.
+    assert bucket.try_acquire(0, reserve=0.2) == 0.0
+    assert bucket.try_acquire(0, reserve=0.2) == pytest.approx(6.0)
+    assert bucket.try_acquire(0) == 0.0
+
+
+def _take(path, attempts, results):
+    bucket = SharedTokenBucket(path, 60, 0)
+    results.put(sum(bucket.try_acquire(0) == 0.0 for _ in range(attempts)))
+
+
+def test_processes_share_one_budget(tmp_path):
+    path = str(tmp_path / "bucket.bin")
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=_take, args=(path, 30, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    # Refill during the run can admit one or two more calls.
+    assert 60 <= sum(results.get(timeout=1) for _ in workers) <= 62
+
+
+def test_interactive_calls_go_ahead_of_background(tmp_path):
+    bucket = SharedTokenBucket(str(tmp_path / "bucket.bin"), 600, 0)
+    limiter = LLMRateLimiter(bucket, background_reserve=0, queue_timeout=5, background_queue_timeout=5)
+    _drain(bucket)
+    order = []
+
+    async def call(name, priority):
+        await limiter.acquire(0, priority)
+        order.append(name)
+
+    async def run():
+        background = asyncio.ensure_future(call("background", BACKGROUND))
+        await asyncio.sleep(0.01)
+        interactive = [asyncio.ensure_future(call(f"interactive-{idx}", INTERACTIVE)) for idx in range(2)]
+        await asyncio.gather(background, *interactive)
+
+    asyncio.run(run())
+    assert order == ["interactive-0", "interactive-1", "background"]
+    assert limiter.queued == 0
+
+
+def test_deadline_rejects_with_the_bucket_wait(tmp_path):
+    bucket = SharedTokenBucket(str(tmp_path / "bucket.bin"), 6, 0)
+    limiter = LLMRateLimiter(bucket, queue_timeout=0.2)
+    _drain(bucket)
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        asyncio.run(limiter.acquire(0))
+    assert excinfo.value.retry_after == pytest.approx(10.0, abs=0.5)
+    assert limiter.queued == 0
+
+
+def test_queued_callers_get_a_hint_past_the_head(tmp_path):
+    bucket = SharedTokenBucket(str(tmp_path / "bucket.bin"), 6, 0)
+    limiter = LLMRateLimiter(bucket, queue_timeout=30)
+    _drain(bucket)
+
+    async def run():
+        head = asyncio.ensure_future(limiter.acquire(0))
+        await asyncio.sleep(0.01)
+        limiter.queue_timeouts[INTERACTIVE] = 0.2
+        with pytest.raises(RateLimitExceeded) as excinfo:
+            await limiter.acquire(0)
+        head.cancel()
+        await asyncio.gather(head, return_exceptions=True)
+        return excinfo.value.retry_after
+
+    # The head waits ~10s for the next request; the caller behind it ~10s more.
+    assert asyncio.run(run()) == pytest.approx(20.0, abs=0.5)
+
+
+def test_rate_limited_turn_returns_429(tmp_path, repo):
+    from app.api.user_details.user_api import _session_record
+    from app.main import app
+    from app.utils.firestore_connection import get_repository
+    from app.utils.llm_client import FakeLLMBackend, set_llm_backend
+
+    set_llm_backend(FakeLLMBackend())
+    bucket = SharedTokenBucket(str(tmp_path / "bucket.bin"), 6, 0)
+    set_rate_limiter(LLMRateLimiter(bucket, queue_timeout=0.1))
+    _drain(bucket)
+
+    async def seat():
+        await repo.users.set("u1", {"user_id": "u1", "status": "in_session", "resume_text": ""})
+        await repo.in_session.set("u1", _session_record("u1", datetime.utcnow(), 0))
+
+    asyncio.run(seat())
+    app.dependency_overrides[get_repository] = lambda: repo
+    try:
+        client = TestClient(app)
+        plain = client.post("/interview/start", json={"user_id": "u1"})
+        streamed = client.post("/interview/start/stream", json={"user_id": "u1"})
+    finally:
+        app.dependency_overrides.clear()
+
+    for response in (plain, streamed):
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 9
+        assert response.json()["retry_after"] >= 9
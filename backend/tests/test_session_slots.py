@@ -0,0 +1,228 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from google.cloud import firestore
+
+from app.api.swot_details import jobs
+from app.api.user_details import slots, user_api
+from app.api.user_details.slots import free_slots, read_slots
+from app.utils.fakes import FakeFirestoreClient, FaultProfile
+from app.utils.firestore_connection import FirestoreRepository
+from app.utils.llm_client import FakeLLMBackend, set_llm_backend
+
+LIMIT = 5
+
+
+@pytest.fixture(params=[1, 3], ids=["one-shard", "three-shards"])
+def shards(request, monkeypatch):
+    monkeypatch.setattr(slots, "SLOT_SHARDS", request.param)
+    monkeypatch.setattr(user_api, "SESSION_LIMIT", LIMIT)
+    monkeypatch.setattr(user_api, "swot_jobs", jobs.SwotJobPool(workers=1))
+    set_llm_backend(FakeLLMBackend())
+    return request.param
+
+
+@pytest.fixture
+def repo():
+    # Small jittered RPC latency so concurrent transactions interleave and conflict.
+    return FirestoreRepository(FakeFirestoreClient(FaultProfile(latency_ms=1, jitter_ms=1, seed=7)))
+
+
+async def _create_users(repo, count):
+    user_ids = [f"user-{idx:03d}" for idx in range(count)]
+    for user_id in user_ids:
+        await repo.users.set(user_id, {"user_id": user_id, "status": "idle"})
+    return user_ids
+
+
+async def _retrying(call, attempts=20):
+    """Retry a transaction that ran out of attempts, as the join dispatcher retries a 500."""
+    for attempt in range(attempts):
+        try:
+            return await call()
+        except ValueError:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(random.uniform(0, 0.005 * 2 ** min(attempt, 4)))
+
+
+async def _join(repo, user_id):
+    return await _retrying(lambda: user_api._join_transaction(repo.transaction(), repo, user_id))
+
+
+async def _exit(repo, user_id):
+    return await _retrying(lambda: user_api.release_and_promote(repo, user_id))
+
+
+async def _occupancy(repo):
+    """``(in_session ids, occupied slots per shard, queue entries by ticket)``."""
+    sessions = [doc.id for doc in await repo.in_session.active(LIMIT * 4)]
+    counters = {}
+    for shard in range(slots.SLOT_SHARDS):
+        counters[shard] = int((await repo.counters.get(repo.counters.slot_id(shard)) or {}).get("occupied", 0))
+    queue = sorted((doc.to_dict()["ticket"], doc.id) for doc in await repo.queue.oldest(limit=1000))
+    return sessions, counters, queue
+
+
+async def _assert_consistent(repo):
+    sessions, counters, queue = await _occupancy(repo)
+    assert len(sessions) <= LIMIT
+    assert sum(counters.values()) == len(sessions)
+    for shard, occupied in counters.items():
+        assert 0 <= occupied <= slots.shard_capacity(shard, LIMIT)
+    per_shard = {shard: 0 for shard in counters}
+    for user_id in sessions:
+        per_shard[(await repo.in_session.get(user_id))["slot_shard"]] += 1
+    assert per_shard == counters
+    for user_id in sessions:
+        assert (await repo.users.get(user_id))["status"] == "in_session"
+    for _, user_id in queue:
+        assert (await repo.users.get(user_id))["status"] == "pending"
+    return sessions, counters, queue
+
+
+def test_concurrent_joins_never_exceed_the_limit(shards, repo):
+    async def run():
+        user_ids = await _create_users(repo, 30)
+        statuses = await asyncio.gather(*(_join(repo, user_id) for user_id in user_ids))
+        sessions, _, queue = await _assert_consistent(repo)
+        return statuses, sessions, queue
+
+    statuses, sessions, queue = asyncio.run(run())
+    assert statuses.count("in_session") == LIMIT == len(sessions)
+    assert statuses.count("pending") == 30 - LIMIT == len(queue)
+    tickets = [ticket for ticket, _ in queue]
+    assert tickets == list(range(1, len(queue) + 1))
+
+
+def test_rejoining_keeps_the_existing_place(shards, repo):
+    async def run():
+        user_ids = await _create_users(repo, LIMIT + 1)
+        first = [await _join(repo, user_id) for user_id in user_ids]
+        again = await asyncio.gather(*(_join(repo, user_id) for user_id in user_ids))
+        await _assert_consistent(repo)
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert first == again == ["in_session"] * LIMIT + ["pending"]
+
+
+def test_exits_promote_in_ticket_order(shards, repo):
+    async def run():
+        user_ids = await _create_users(repo, LIMIT + 6)
+        for user_id in user_ids:
+            await _join(repo, user_id)
+        _, _, queue = await _assert_consistent(repo)
+        waiting = [user_id for _, user_id in queue]
+
+        leaving = user_ids[:3]
+        results = await asyncio.gather(*(_exit(repo, user_id) for user_id in leaving))
+        sessions, _, queue = await _assert_consistent(repo)
+        return waiting, leaving, results, sessions, queue
+
+    waiting, leaving, results, sessions, queue = asyncio.run(run())
+    promoted = sorted(user_id for _, ids in results for user_id in ids)
+    assert all(ended for ended, _ in results)
+    assert promoted == waiting[:3]
+    assert len(sessions) == LIMIT
+    assert not set(leaving) & set(sessions)
+    assert [user_id for _, user_id in queue] == waiting[3:]
+
+
+def test_joins_and_exits_interleaved(shards, repo):
+    async def run():
+        user_ids = await _create_users(repo, 40)
+        rng = random.Random(3)
+
+        async def candidate(user_id):
+            await asyncio.sleep(rng.uniform(0, 0.02))
+            status = await _join(repo, user_id)
+            if status == "in_session" and rng.random() < 0.5:
+                await asyncio.sleep(rng.uniform(0, 0.02))
+                await _exit(repo, user_id)
+
+        await asyncio.gather(*(candidate(user_id) for user_id in user_ids))
+        await user_api.promote_waiting_users(repo)
+        return await _assert_consistent(repo)
+
+    sessions, _, queue = asyncio.run(run())
+    # Every slot freed while someone was waiting was handed on.
+    assert len(sessions) == LIMIT or not queue
+
+
+def test_expiry_frees_the_slot_and_queues_swot(shards, repo):
+    async def run():
+        user_ids = await _create_users(repo, LIMIT + 2)
+        for user_id in user_ids:
+            await _join(repo, user_id)
+        expired = user_ids[0]
+        await repo.in_session.set(expired, {"expiry_time": datetime.utcnow() - timedelta(seconds=1)})
+
+        # A session that has not expired yet is left alone.
+        await user_api.expire_session(repo, user_ids[1])
+        await user_api.expire_session(repo, expired)
+        sessions, _, queue = await _assert_consistent(repo)
+        user = await repo.users.get(expired)
+        await user_api.swot_jobs.stop()
+        return user_ids, sessions, queue, user
+
+    user_ids, sessions, queue, user = asyncio.run(run())
+    assert user_ids[0] not in sessions and user_ids[1] in sessions
+    assert user_ids[LIMIT] in sessions
+    assert [user_id for _, user_id in queue] == [user_ids[LIMIT + 1]]
+    assert user["status"] == "idle"
+    # Claimed for generation; the pool may already have picked it up.
+    assert user["swot_status"] in (jobs.PENDING, jobs.RUNNING)
+
+
+def test_legacy_entries_are_ticketed_ahead_of_new_joins(shards, repo):
+    async def run():
+        user_ids = await _create_users(repo, LIMIT + 4)
+        seated, newcomers = user_ids[:LIMIT], user_ids[LIMIT + 2:]
+        legacy = user_ids[LIMIT:LIMIT + 2]
+        for user_id in seated:
+            await _join(repo, user_id)
+        # Queued by a release that predates tickets: no ticket field.
+        for minute, user_id in enumerate(reversed(legacy)):
+            await repo.users.set(user_id, {"status": "pending"})
+            queued_at = datetime(2024, 1, 1, 0, 1 - minute)
+            await repo.queue.set(user_id, {"user_id": user_id, "status": "pending", "created_at": queued_at})
+        for user_id in newcomers:
+            await _join(repo, user_id)
+
+        before = [await repo.queue.position(user_id) for user_id in legacy]
+        assert await user_api.assign_legacy_tickets(repo) == 2
+        assert await user_api.assign_legacy_tickets(repo) == 0
+        after = [await repo.queue.position(user_id) for user_id in legacy + newcomers]
+        await _assert_consistent(repo)
+
+        promoted = []
+        for user_id in seated[:3]:
+            _, ids = await _exit(repo, user_id)
+            promoted.extend(ids)
+        return legacy, newcomers, before, after, promoted
+
+    legacy, newcomers, before, after, promoted = asyncio.run(run())
+    assert before == [1, 2]
+    assert after == [1, 2, 3, 4]
+    assert promoted == legacy + newcomers[:1]
+
+
+@firestore.async_transactional
+async def _read_slots(txn, repo):
+    return await read_slots(txn, repo, LIMIT)
+
+
+def test_read_slots_reports_free_capacity(shards, repo):
+    async def run():
+        user_ids = await _create_users(repo, 2)
+        for user_id in user_ids:
+            await _join(repo, user_id)
+        return await _read_slots(repo.transaction(), repo)
+
+    state = asyncio.run(run())
+    assert sorted(state) == list(range(shards))
+    assert sum(capacity for _, capacity in state.values()) == LIMIT
+    assert free_slots(state) == LIMIT - 2
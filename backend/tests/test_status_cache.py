@@ -0,0 +1,63 @@
+import asyncio
+
+from app.api.user_details.status_cache import StatusCache
+from app.api.user_details.status_watcher import NOT_FOUND
+from app.utils.fakes import FakeFirestoreClient, FaultProfile
+from app.utils.firestore_connection import FirestoreRepository
+
+
+def _repo(latency_ms=0.0):
+    return FirestoreRepository(FakeFirestoreClient(FaultProfile(latency_ms=latency_ms)))
+
+
+def test_concurrent_polls_share_one_fetch():
+    repo = _repo(latency_ms=20)
+    cache = StatusCache(ttl_seconds=60)
+
+    async def run():
+        await repo.users.set("u1", {"user_id": "u1", "status": "idle"})
+        repo.client.reset_stats()
+        results = await asyncio.gather(*(cache.get(repo, "u1") for _ in range(10)))
+        return results, repo.client.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [("idle", 0)] * 10
+    assert cache.stats()["misses"] == 1 and cache.stats()["coalesced"] == 9
+    assert stats.get("rpc_get_all") == 1
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    repo = _repo(latency_ms=20)
+    cache = StatusCache(ttl_seconds=60)
+
+    async def run():
+        await repo.users.set("u1", {"user_id": "u1", "status": "idle"})
+        leader = asyncio.ensure_future(cache.get(repo, "u1"))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(cache.get(repo, "u1")) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        return leader, results
+
+    leader, results = asyncio.run(run())
+    assert leader.cancelled()
+    assert results == [("idle", 0)] * 3
+    assert cache.stats()["size"] == 1
+
+
+def test_missing_user_and_invalidation():
+    repo = _repo()
+    cache = StatusCache(ttl_seconds=60)
+
+    async def run():
+        missing = await cache.get(repo, "ghost")
+        await repo.users.set("ghost", {"user_id": "ghost", "status": "idle"})
+        stale = await cache.get(repo, "ghost")
+        cache.invalidate(["ghost", None])
+        fresh = await cache.get(repo, "ghost")
+        return missing, stale, fresh
+
+    missing, stale, fresh = asyncio.run(run())
+    assert missing == stale == (NOT_FOUND, 0)
+    assert fresh == ("idle", 0)
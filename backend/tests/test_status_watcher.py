@@ -0,0 +1,58 @@
+import asyncio
+
+from app.api.user_details import status_watcher as watcher_module
+from app.api.user_details.status_watcher import NOT_FOUND, StatusWatcher
+
+
+async def _next(queue, timeout=0.5):
+    return await asyncio.wait_for(queue.get(), timeout)
+
+
+def test_failed_ticks_are_retried_with_backoff(repo, monkeypatch):
+    attempts = []
+
+    def flaky_repository():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) < 3:
+            raise RuntimeError("firestore unavailable")
+        return repo
+
+    monkeypatch.setattr(watcher_module, "get_firestore_repository", flaky_repository)
+    watcher = StatusWatcher(interval_seconds=0.02, max_backoff_seconds=0.05)
+
+    async def run():
+        await repo.users.set("u1", {"user_id": "u1", "status": "pending"})
+        queue = watcher.subscribe("u1")
+        update = await _next(queue)
+        watcher.unsubscribe("u1", queue)
+        return update
+
+    update = asyncio.run(run())
+    assert update["status"] == "pending"
+    assert len(attempts) == 3
+    # 0.04s after the first failure, then capped at 0.05s.
+    assert attempts[1] - attempts[0] >= 0.035
+    assert attempts[2] - attempts[1] >= 0.045
+
+
+def test_missing_status_field_is_not_reported_as_gone(repo, monkeypatch):
+    monkeypatch.setattr(watcher_module, "get_firestore_repository", lambda: repo)
+    watcher = StatusWatcher(interval_seconds=0.02)
+
+    async def run():
+        await repo.users.set("u1", {"user_id": "u1"})
+        incomplete = watcher.subscribe("u1")
+        missing = watcher.subscribe("ghost")
+        gone = await _next(missing)
+        await asyncio.sleep(0.05)
+        pending = incomplete.qsize()
+        await repo.users.set("u1", {"status": "pending"})
+        update = await _next(incomplete)
+        watcher.unsubscribe("u1", incomplete)
+        watcher.unsubscribe("ghost", missing)
+        return gone, pending, update
+
+    gone, pending, update = asyncio.run(run())
+    assert gone["status"] == NOT_FOUND
+    assert pending == 0
+    assert update["status"] == "pending"
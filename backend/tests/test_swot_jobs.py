@@ -0,0 +1,120 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.api.swot_details import jobs
+from app.utils.fakes import FakeFirestoreClient, FaultProfile
+from app.utils.firestore_connection import FirestoreRepository
+from app.utils.llm_client import FakeLLMBackend, set_llm_backend
+
+SWOT_REPLY = json.dumps({field: [f"{field} item"] for field in ("strengths", "weaknesses", "opportunities", "threats")})
+
+
+class RecordingPool(jobs.SwotJobPool):
+    """Job pool that records enqueues instead of running them."""
+
+    def __init__(self):
+        super().__init__(workers=1)
+        self.enqueued = []
+        self.claims = {}
+
+    def _enqueue(self, repo, user_id, claim):
+        self._queued.add(user_id)
+        self.enqueued.append(user_id)
+        self.claims[user_id] = claim
+
+
+@pytest.fixture
+def repo():
+    return FirestoreRepository(FakeFirestoreClient(FaultProfile(latency_ms=1, jitter_ms=1, seed=5)))
+
+
+def test_concurrent_submits_across_workers_enqueue_once(repo):
+    # Separate pools stand in for separate gunicorn workers sharing Firestore.
+    pools = [RecordingPool() for _ in range(4)]
+
+    async def run():
+        await repo.users.set("u1", {"user_id": "u1"})
+        return await asyncio.gather(*(pool.submit(repo, "u1") for pool in pools for _ in range(3)))
+
+    statuses = asyncio.run(run())
+    assert set(statuses) == {jobs.PENDING}
+    assert sum(len(pool.enqueued) for pool in pools) == 1
+
+
+@pytest.mark.parametrize(
+    "status, retry_failed, enqueued, reported",
+    [
+        (jobs.RUNNING, False, False, jobs.RUNNING),
+        (jobs.PENDING, True, False, jobs.PENDING),
+        (jobs.READY, True, False, jobs.READY),
+        (jobs.FAILED, False, False, jobs.FAILED),
+        (jobs.FAILED, True, True, jobs.PENDING),
+    ],
+)
+def test_submit_only_claims_unowned_jobs(repo, status, retry_failed, enqueued, reported):
+    pool = RecordingPool()
+
+    async def run():
+        await repo.users.set("u1", {"user_id": "u1", "swot_status": status})
+        # A stale copy without a job must not bypass the transactional check.
+        result = await pool.submit(repo, "u1", user_doc={"user_id": "u1"}, retry_failed=retry_failed)
+        return result, await repo.users.get("u1")
+
+    result, user = asyncio.run(run())
+    assert result == reported
+    assert pool.enqueued == (["u1"] if enqueued else [])
+    assert user["swot_status"] == reported
+
+
+def test_submit_for_missing_user_fails(repo):
+    pool = RecordingPool()
+    assert asyncio.run(pool.submit(repo, "ghost")) == jobs.FAILED
+    assert pool.enqueued == []
+
+
+def test_stale_job_queued_elsewhere_is_generated_once(repo):
+    backend = set_llm_backend(FakeLLMBackend(reply=SWOT_REPLY)).backend
+    slow, leader = RecordingPool(), RecordingPool()
+
+    async def run():
+        await repo.users.set("u1", {"user_id": "u1"})
+        await slow.submit(repo, "u1")
+        # The job waits in the slow worker's queue past SWOT_STALE_SECONDS.
+        stale = datetime.utcnow() - timedelta(seconds=jobs.SWOT_STALE_SECONDS + 1)
+        await repo.users.set("u1", {"swot_updated_at": stale})
+
+        recovered = await leader.recover_stale_jobs(repo)
+        # A second pass must not take the job again.
+        again = await leader.recover_stale_jobs(repo)
+        await leader._run_job(repo, "u1", leader.claims["u1"])
+        await slow._run_job(repo, "u1", slow.claims["u1"])
+        return recovered, again, await repo.users.get("u1")
+
+    recovered, again, user = asyncio.run(run())
+    assert recovered == 1 and again == 0
+    assert len(backend.calls) == 1
+    assert user["swot_status"] == jobs.READY
+    assert user["swot_analysis"]["strengths"] == ["strengths item"]
+
+
+def test_run_job_drops_a_reclaimed_job_before_generating(repo):
+    backend = set_llm_backend(FakeLLMBackend(reply=SWOT_REPLY)).backend
+    slow, leader = RecordingPool(), RecordingPool()
+
+    async def run():
+        await repo.users.set("u1", {"user_id": "u1"})
+        await slow.submit(repo, "u1")
+        stale = datetime.utcnow() - timedelta(seconds=jobs.SWOT_STALE_SECONDS + 1)
+        await repo.users.set("u1", {"swot_updated_at": stale})
+        await leader.recover_stale_jobs(repo)
+        # The slow worker gets to its stale copy first.
+        await slow._run_job(repo, "u1", slow.claims["u1"])
+        return await repo.users.get("u1")
+
+    user = asyncio.run(run())
+    assert backend.calls == []
+    assert user["swot_status"] == jobs.PENDING
+    assert user["swot_claim"] == leader.claims["u1"]
@@ -3,6 +3,56 @@ import { Send, Loader2, Sparkles } from "lucide-react";
 import { useLocation } from "react-router-dom";
 
 const API_ENDPOINT = import.meta.env.VITE_API_ENDPOINT;
+// How many times a rate-limited turn (HTTP 429) is retried after its Retry-After delay.
+const MAX_RATE_LIMIT_RETRIES = 3;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+class RateLimitedError extends Error {
+  constructor(message, retryAfter) {
+    super(message);
+    this.retryAfter = retryAfter;
+  }
+}
+
+// Seconds to wait before retrying a 429, from Retry-After or the JSON body.
+async function retryAfterSeconds(response) {
+  const header = Number(response.headers.get("Retry-After"));
+  if (header > 0) return header;
+  try {
+    const body = await response.json();
+    return Number(body.retry_after) || 1;
+  } catch {
+    return 1;
+  }
+}
+
+// Read a Server-Sent Events response body and dispatch each frame to its handler.
+async function readEventStream(response, handlers) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (data) handlers[event]?.(JSON.parse(data));
+    }
+  }
+}
 
 export default function ChatWindow({ timeExpired, onFinalResponse, onSessionOver }) {
   const location = useLocation();
@@ -13,6 +63,60 @@ export default function ChatWindow({ timeExpired, onFinalResponse, onSessionOver
 
   const chatRef = useRef(null);
 
+  // Stream one interview turn, waiting out rate limits before giving up.
+  const streamTurn = async (path, body) => {
+    for (let attempt = 0; ; attempt++) {
+      const res = await fetch(`${API_ENDPOINT}${path}`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", "Accept": "text/event-stream" },
+        body: JSON.stringify(body),
+      });
+      try {
+        if (res.status === 429) {
+          throw new RateLimitedError("Interview is busy", await retryAfterSeconds(res));
+        }
+        if (!res.ok || !res.body) throw new Error("Interview request failed");
+        return await readTurn(res);
+      } catch (err) {
+        if (!(err instanceof RateLimitedError) || attempt >= MAX_RATE_LIMIT_RETRIES) throw err;
+        await sleep(err.retryAfter * 1000);
+      }
+    }
+  };
+
+  // Read one streamed turn, growing the AI bubble as tokens arrive.
+  const readTurn = async (res) => {
+    let streamed = false;
+    let result = null;
+    await readEventStream(res, {
+      bot_response: ({ text }) => {
+        const first = !streamed;
+        streamed = true;
+        setMessages(prev => {
+          if (first) return [...prev, { sender: "ai", text }];
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, text: last.text + text }];
+        });
+      },
+      next_question: ({ text }) => {
+        setMessages(prev => [...prev, { sender: "ai", text }]);
+      },
+      done: (data) => {
+        result = data;
+        // Non-streamed outcomes (queue, idle, session over) only send the final payload.
+        if (!streamed && data.bot_response) {
+          setMessages(prev => [...prev, { sender: "ai", text: data.bot_response }]);
+        }
+      },
+      error: ({ detail, retry_after }) => {
+        // Only retry a provider quota error if nothing was shown yet.
+        if (retry_after && !streamed) throw new RateLimitedError(detail, retry_after);
+        throw new Error(detail || "Interview stream failed");
+      },
+    });
+    return result || {};
+  };
+
   // Auto-scroll on new messages
   useEffect(() => {
     chatRef.current?.scrollTo({ top: chatRef.current.scrollHeight, behavior: "smooth" });
@@ -37,22 +141,8 @@ export default function ChatWindow({ timeExpired, onFinalResponse, onSessionOver
       if (!userId || hasStarted) return;
 
       try {
-        const res = await fetch(`${API_ENDPOINT}/interview/start`, {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ user_id: userId }),
-        });
-
-        const data = await res.json();
         setHasStarted(true);
-
-        if (data.bot_response) {
-          setMessages(prev => [...prev, { sender: "ai", text: data.bot_response }]);
-        }
-
-        if (data.next_question) {
-          setMessages(prev => [...prev, { sender: "ai", text: data.next_question }]);
-        }
+        await streamTurn("/interview/start/stream", { user_id: userId });
       } catch {
         setMessages(prev => [...prev, { sender: "ai", text: "⚠️ Interview failed to start." }]);
       }
@@ -74,21 +164,7 @@ export default function ChatWindow({ timeExpired, onFinalResponse, onSessionOver
     setLoading(true);
 
     try {
-      const res = await fetch(`${API_ENDPOINT}/interview/respond`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ user_id: userId, user_response: message }),
-      });
-
-      const data = await res.json();
-
-      if (data.bot_response) {
-        setMessages(prev => [...prev, { sender: "ai", text: data.bot_response }]);
-      }
-
-      if (data.next_question) {
-        setMessages(prev => [...prev, { sender: "ai", text: data.next_question }]);
-      }
+      const data = await streamTurn("/interview/respond/stream", { user_id: userId, user_response: message });
 
       // Detect end of session
       if (
@@ -103,6 +179,8 @@ export default function ChatWindow({ timeExpired, onFinalResponse, onSessionOver
       if (data.status === "completed" || timeExpired) {
         onFinalResponse?.(data);
       }
+    } catch {
+      setMessages(prev => [...prev, { sender: "ai", text: "⚠️ Failed to get a response. Please try again." }]);
     } finally {
       setLoading(false);
     }
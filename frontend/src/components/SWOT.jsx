@@ -1,7 +1,25 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 
 const API_BASE_URL = import.meta.env.VITE_API_ENDPOINT;
 
+// Polling for a pending SWOT stops after this many checks or this long overall
+const MAX_SWOT_POLLS = 60;
+const MAX_SWOT_WAIT_MS = 3 * 60 * 1000;
+
+// setTimeout that rejects with an AbortError as soon as the signal aborts
+const sleep = (ms, signal) =>
+  new Promise((resolve, reject) => {
+    const timer = setTimeout(resolve, ms);
+    signal.addEventListener(
+      "abort",
+      () => {
+        clearTimeout(timer);
+        reject(new DOMException("Aborted", "AbortError"));
+      },
+      { once: true }
+    );
+  });
+
 // Mapping for SWOT categories to display properties
 const swotConfig = {
   strengths: {
@@ -81,9 +99,15 @@ export default function SWOT() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [swotData, setSwotData] = useState(null);
-  const [retryCount, setRetryCount] = useState(0);
+  const controllerRef = useRef(null);
 
   const fetchSWOT = async (isRetry = false) => {
+    // Only the latest request may update the page; leaving it cancels polling
+    controllerRef.current?.abort();
+    const controller = new AbortController();
+    controllerRef.current = controller;
+    const { signal } = controller;
+
     setLoading(true);
     setError(null);
 
@@ -95,36 +119,43 @@ export default function SWOT() {
     }
 
     try {
-      // Step 1: Try to fetch SWOT
-      const response = await fetch(`${API_BASE_URL}/swot/${userId}`);
-      
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.detail || "Failed to fetch SWOT analysis");
-      }
-
-      const data = await response.json();
+      // Step 1: Fetch SWOT; a retry re-queues a failed generation job
+      let response = await fetch(
+        `${API_BASE_URL}/swot/${userId}${isRetry ? "?retry=true" : ""}`,
+        { signal }
+      );
 
-      // Step 2: If not found and haven't retried yet, trigger generation
-      if ((!data.found || !data.swot_analysis) && retryCount < 2) {
-        console.log("SWOT not ready, triggering generation...");
-        
-        // Call response API to trigger SWOT generation
+      // An expired session is only closed by /interview/respond, which queues SWOT
+      if (response.status === 404) {
         await fetch(`${API_BASE_URL}/interview/respond`, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ 
-            user_id: userId, 
-            user_response: "" 
-          }),
+          body: JSON.stringify({ user_id: userId, user_response: "" }),
+          signal,
         });
+        response = await fetch(`${API_BASE_URL}/swot/${userId}`, { signal });
+      }
 
-        // Wait and retry
-        setRetryCount(prev => prev + 1);
-        await new Promise(resolve => setTimeout(resolve, 3000));
-        return fetchSWOT(true);
+      // Step 2: 202 means the background job is still pending/running
+      const deadline = Date.now() + MAX_SWOT_WAIT_MS;
+      for (let polls = 0; response.status === 202; polls++) {
+        const retryAfter = Number(response.headers.get("Retry-After")) || 2;
+        if (polls >= MAX_SWOT_POLLS || Date.now() + retryAfter * 1000 > deadline) {
+          throw new Error(
+            "Your SWOT analysis is taking longer than expected. Please try again in a moment."
+          );
+        }
+        await sleep(retryAfter * 1000, signal);
+        response = await fetch(`${API_BASE_URL}/swot/${userId}`, { signal });
+      }
+
+      if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.detail || "Failed to fetch SWOT analysis");
       }
 
+      const data = await response.json();
+
       // Step 3: Check if we have valid data
       if (!data.found || !data.swot_analysis) {
         throw new Error("SWOT analysis could not be generated. Please try again.");
@@ -151,18 +182,19 @@ export default function SWOT() {
       }
 
       setSwotData(parsedSwotData);
-      setRetryCount(0);
       
     } catch (err) {
+      if (signal.aborted) return;
       console.error("SWOT fetch error:", err);
       setError(err.message);
     } finally {
-      setLoading(false);
+      if (!signal.aborted) setLoading(false);
     }
   };
 
   useEffect(() => {
     fetchSWOT();
+    return () => controllerRef.current?.abort();
   }, []);
 
   const handleBackToHome = () => {
@@ -181,7 +213,7 @@ export default function SWOT() {
   };
 
   if (loading) return <SkeletonLoader />;
-  if (error) return <ErrorState message={error} onRetry={() => fetchSWOT()} />;
+  if (error) return <ErrorState message={error} onRetry={() => fetchSWOT(true)} />;
 
   const displayData = Object.entries(swotConfig).map(([key, config]) => {
     const content = swotData?.[key];
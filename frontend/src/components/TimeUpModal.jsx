@@ -18,15 +18,12 @@ export default function TimeUpModal({ onViewResults }) {
     }
 
     try {
-      // Step 1: Try to fetch SWOT
+      // Step 1: Make sure SWOT generation is queued; the results page waits for it
       setStatus("Checking for SWOT analysis...");
       const swotResponse = await fetch(`${API_ENDPOINT}/swot/${userId}`);
-      const swotData = await swotResponse.json();
 
-      // Step 2: If SWOT not found, trigger response API to generate it
-      if (!swotData.found || !swotData.swot_analysis) {
-        setStatus("Generating your SWOT analysis...");
-        
+      if (swotResponse.status === 404) {
+        // Session not closed yet: /interview/respond ends it and queues SWOT
         await fetch(`${API_ENDPOINT}/interview/respond`, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
@@ -35,12 +32,10 @@ export default function TimeUpModal({ onViewResults }) {
             user_response: "" 
           }),
         });
-
-        // Wait a moment for processing
-        await new Promise(resolve => setTimeout(resolve, 2000));
       }
+      setStatus("Generating your SWOT analysis...");
 
-      // Step 3: Navigate to SWOT page (which will fetch the data)
+      // Step 2: Navigate to SWOT page (which will fetch the data)
       setStatus("Loading your results...");
       await onViewResults();
       
@@ -85,7 +85,7 @@ const StatusCard = ({ ui, status, queueNumber, error, retryCount, onRetry }) =>
       {status === "waiting" && (
         <div className="mt-6 pt-6 border-t border-gray-100 flex items-center justify-center gap-2 text-gray-400">
           <div className="w-2 h-2 bg-green-400 rounded-full animate-pulse"></div>
-          <span className="text-xs">Checking status every 5 seconds</span>
+          <span className="text-xs">Live status updates</span>
         </div>
       )}
 
@@ -106,6 +106,7 @@ export default function WaitingArea() {
   const [retryCount, setRetryCount] = useState(0);
   
   const pollerRef = useRef(null);
+  const eventSourceRef = useRef(null);
   const isMountedRef = useRef(true);
   const isRedirectingRef = useRef(false);
   const consecutiveErrorsRef = useRef(0);
@@ -127,6 +128,7 @@ export default function WaitingArea() {
     return () => {
       isMountedRef.current = false;
       clearInterval(pollerRef.current);
+      eventSourceRef.current?.close();
       clearTimeout(timer);
       clearTimeout(loadingTimer);
     };
@@ -174,7 +176,7 @@ export default function WaitingArea() {
       if (data.status === "in_session") {
         redirectToInterview();
       } else {
-        startPolling();
+        startWatching();
       }
       consecutiveErrorsRef.current = 0;
       setRetryCount(0);
@@ -185,6 +187,38 @@ export default function WaitingArea() {
     }
   };
 
+  // Prefer the server-pushed status stream; fall back to polling if it is unavailable.
+  const startWatching = () => {
+    if (typeof EventSource === "undefined") return startPolling();
+    eventSourceRef.current?.close();
+
+    const source = new EventSource(`${api}/status/${userId}/events`);
+    eventSourceRef.current = source;
+
+    source.addEventListener("status", (event) => {
+      if (!isMountedRef.current) return source.close();
+      const data = JSON.parse(event.data);
+      consecutiveErrorsRef.current = 0;
+      updateState(data);
+
+      if (data.status === "in_session") {
+        source.close();
+        redirectToInterview();
+      }
+    });
+
+    source.addEventListener("gone", () => {
+      source.close();
+      setStatus("error");
+      setError("User not found. Please restart the application.");
+    });
+
+    source.onerror = () => {
+      source.close();
+      if (isMountedRef.current && !isRedirectingRef.current) startPolling();
+    };
+  };
+
   const startPolling = () => {
     if (pollerRef.current) clearInterval(pollerRef.current);
     consecutiveErrorsRef.current = 0;